@@ -5,36 +5,234 @@ Milestone 1 – Local Development
 
 EXTENDED WITH:
 - Blood Compatibility AI Engine: Rule-based expert system for blood type compatibility
+- Pluggable storage (blood_storage.py): in-memory, journaled or SQLite, chosen by config
+- Password hashing (blood_passwords.py): configurable cost, bounded worker pool
+- Page data cache (blood_cache.py): LRU cache for dashboard/donors data
+- Live request feed (blood_events.py): server-sent events for compatible donors
+- Notification outbox (blood_notifications.py): batched background delivery
+- Donor locations (blood_geo.py): nearest compatible donors for located requests
+- Request profiler (blood_profiler.py): opt-in cProfile of sampled or slow requests
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from flask import (Flask, render_template, request, redirect, url_for, session, flash, jsonify,
+                   make_response, Response, g)
+from datetime import date, datetime, timedelta
+import hashlib
+import json
+import os
+import threading
+import time
 import uuid
 from blood_ai_engine import (
     get_compatible_donors,
+    get_compatible_recipients,
     is_donor_compatible,
-    filter_compatible_donors,
+    get_all_blood_groups,
     get_compatibility_explanation
 )
+from blood_passwords import HasherBusyError, PasswordHasher
+from blood_cache import PageCache
+from blood_events import FeedFullError, RequestFeed
+from blood_expiry import ExpiryScheduler
+from blood_geo import parse_coordinates
+from blood_metrics import Metrics
+from blood_notifications import NotificationOutbox, create_transport
+from blood_profiler import RequestProfiler
+from blood_storage import create_storage
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'BLOOD_BANK_SECRET_KEY_2026'
 app.config['DEBUG'] = True
 
+# Storage backend: 'memory' (default), 'journal' or 'sqlite'
+app.config['STORAGE_BACKEND'] = os.environ.get('BLOOD_STORAGE_BACKEND', 'memory')
+app.config['SQLITE_PATH'] = os.environ.get('BLOOD_SQLITE_PATH', 'blood_bank.db')
+app.config['JOURNAL_DIR'] = os.environ.get('BLOOD_JOURNAL_DIR', 'blood_journal')
+
+# Password hashing: method/cost, worker pool size and queue limit.
+# Stored hashes made with another setting are upgraded on the next login.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('BLOOD_PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('BLOOD_PASSWORD_HASH_WORKERS', 4))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('BLOOD_PASSWORD_HASH_MAX_PENDING', 64))
+
+# Days a donor must wait after a donation before donating again
+app.config['DONATION_COOLDOWN_DAYS'] = int(os.environ.get('BLOOD_DONATION_COOLDOWN_DAYS', 56))
+
+# Per-route latency histograms and AI engine call counters on /metrics
+app.config['METRICS_ENABLED'] = os.environ.get('BLOOD_METRICS_ENABLED', '1') != '0'
+
+# Request profiler (off unless a sample rate or slow threshold is set):
+# cProfile stats aggregated per endpoint in PROFILE_DIR, rotated at
+# PROFILE_MAX_BYTES. A slow threshold profiles every request, so it is
+# meant for diagnosis rather than permanent use.
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('BLOOD_PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_SLOW_MS'] = float(os.environ.get('BLOOD_PROFILE_SLOW_MS', 0))
+app.config['PROFILE_DIR'] = os.environ.get('BLOOD_PROFILE_DIR', 'blood_profiles')
+app.config['PROFILE_MAX_BYTES'] = int(os.environ.get('BLOOD_PROFILE_MAX_BYTES', 5_000_000))
+app.config['PROFILE_BACKUPS'] = int(os.environ.get('BLOOD_PROFILE_BACKUPS', 3))
+
+# Hours a new request stays open before it expires (0 = never, the
+# default); the request form and bulk API can set an expiry per request
+app.config['REQUEST_TTL_HOURS'] = int(os.environ.get('BLOOD_REQUEST_TTL_HOURS', 0))
+
+# Largest batch accepted by the bulk request API (POST /api/requests)
+app.config['BULK_REQUEST_MAX_ITEMS'] = int(os.environ.get('BLOOD_BULK_REQUEST_MAX_ITEMS', 5000))
+
+# Nearest compatible donors shown for requests with coordinates
+app.config['NEAREST_DONORS'] = int(os.environ.get('BLOOD_NEAREST_DONORS', 5))
+app.config['NEAREST_DONOR_RADIUS_KM'] = float(os.environ.get('BLOOD_NEAREST_DONOR_RADIUS_KM', 50))
+
+# Keyset pagination for request lists (?after=<cursor>&per_page=<n>)
+app.config['PAGE_SIZE'] = int(os.environ.get('BLOOD_PAGE_SIZE', 20))
+app.config['MAX_PAGE_SIZE'] = 100
+
+# Page data cache for /dashboard and /donors (0 entries disables it).
+# Keys carry the storage change tag, so other workers' writes are seen;
+# PAGE_CACHE_MAX_AGE (seconds) optionally expires entries as well.
+app.config['PAGE_CACHE_SIZE'] = int(os.environ.get('BLOOD_PAGE_CACHE_SIZE', 10_000))
+app.config['PAGE_CACHE_MAX_AGE'] = float(os.environ.get('BLOOD_PAGE_CACHE_MAX_AGE', 0)) or None
+
+# Server-sent events feed (/events), off by default: each open /donors tab
+# holds a stream, and so a server thread, for as long as it stays open.
+# Only enable it under a threaded or async worker (e.g. `gunicorn -k gevent`
+# or `-k gthread --threads N`); with the default sync worker every tab ties
+# up a whole worker until the worker timeout kills it.
+app.config['EVENT_FEED_ENABLED'] = os.environ.get('BLOOD_EVENT_FEED_ENABLED', '0') == '1'
+# Open stream limit and heartbeat interval
+app.config['EVENT_MAX_SUBSCRIBERS'] = int(os.environ.get('BLOOD_EVENT_MAX_SUBSCRIBERS', 5000))
+app.config['EVENT_HEARTBEAT'] = float(os.environ.get('BLOOD_EVENT_HEARTBEAT', 15))
+
+# Notifications: 'log' (default), 'stub' or 'sns', delivered off the request path
+app.config['NOTIFY_TRANSPORT'] = os.environ.get('BLOOD_NOTIFY_TRANSPORT', 'log')
+app.config['NOTIFY_LOG_PATH'] = os.environ.get('BLOOD_NOTIFY_LOG_PATH', 'blood_notifications.log')
+app.config['NOTIFY_SNS_TOPIC_ARN'] = os.environ.get('BLOOD_NOTIFY_SNS_TOPIC_ARN')
+app.config['NOTIFY_BATCH_SIZE'] = int(os.environ.get('BLOOD_NOTIFY_BATCH_SIZE', 50))
+
+# ============================
+# INSTRUMENTATION
+# ============================
+
+metrics = Metrics(prefix='blood')
+
+# Count the AI engine lookups the app makes (exported on /metrics)
+get_compatible_donors = metrics.counted('get_compatible_donors', get_compatible_donors)
+get_compatible_recipients = metrics.counted('get_compatible_recipients', get_compatible_recipients)
+is_donor_compatible = metrics.counted('is_donor_compatible', is_donor_compatible)
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started, for the latency histogram"""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Record the request's latency and status per endpoint. Streamed
+    responses (/events) are timed until their headers are ready.
+    """
+    started = g.get('request_started')
+    if started is not None and app.config['METRICS_ENABLED']:
+        metrics.observe_request(request.endpoint or 'unmatched', request.method,
+                                response.status_code, time.perf_counter() - started)
+        g.request_recorded = True
+    return response
+
+@app.teardown_request
+def record_failed_request_metrics(exc):
+    """
+    Record requests that ended in an unhandled exception as 500s. When
+    exceptions propagate (DEBUG, TESTING) no after_request hook runs.
+    """
+    started = g.get('request_started')
+    if exc is not None and started is not None and not g.get('request_recorded') \
+            and app.config['METRICS_ENABLED']:
+        metrics.observe_request(request.endpoint or 'unmatched', request.method,
+                                500, time.perf_counter() - started)
+
+request_profiler = None
+if app.config['PROFILE_SAMPLE_RATE'] > 0 or app.config['PROFILE_SLOW_MS'] > 0:
+    request_profiler = RequestProfiler(app.config['PROFILE_DIR'],
+                                       sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+                                       slow_ms=app.config['PROFILE_SLOW_MS'],
+                                       max_bytes=app.config['PROFILE_MAX_BYTES'],
+                                       backups=app.config['PROFILE_BACKUPS'])
+
+@app.before_request
+def start_request_profile():
+    """Profile this request if the profiler samples it"""
+    if request_profiler is not None:
+        g.request_profile = request_profiler.start()
+
+@app.teardown_request
+def finish_request_profile(exc):
+    """
+    Stop the request's profile and aggregate it if kept. Runs on teardown so
+    a failing request still releases the profiler.
+    """
+    profile = g.pop('request_profile', None) if request_profiler is not None else None
+    if profile is not None:
+        request_profiler.finish(profile, request.endpoint or 'unmatched',
+                                time.perf_counter() - g.request_started)
+
 # ============================
-# IN-MEMORY DATA STORAGE
+# DATA STORAGE
 # ============================
 
-users = {}
-requests_list = []
-donation_history = {}
+storage = create_storage(app.config['STORAGE_BACKEND'],
+                         sqlite_path=app.config['SQLITE_PATH'],
+                         journal_dir=app.config['JOURNAL_DIR'],
+                         donation_cooldown_days=app.config['DONATION_COOLDOWN_DAYS'])
+
+password_hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'],
+                                 workers=app.config['PASSWORD_HASH_WORKERS'],
+                                 max_pending=app.config['PASSWORD_HASH_MAX_PENDING'])
+
+page_cache = PageCache(app.config['PAGE_CACHE_SIZE'], max_age=app.config['PAGE_CACHE_MAX_AGE'])
+
+request_feed = RequestFeed(max_subscribers=app.config['EVENT_MAX_SUBSCRIBERS'],
+                           compatible_donors=get_compatible_donors)
+
+outbox = NotificationOutbox(create_transport(app.config['NOTIFY_TRANSPORT'],
+                                             log_path=app.config['NOTIFY_LOG_PATH'],
+                                             sns_topic_arn=app.config['NOTIFY_SNS_TOPIC_ARN']),
+                            batch_size=app.config['NOTIFY_BATCH_SIZE'])
+
+# Late-bound, so the callback always uses the current module-level storage
+expiry_scheduler = ExpiryScheduler(lambda request_id: expire_request(request_id))
+_pending_expiries_loaded = False
+_pending_expiries_lock = threading.Lock()
+
+@app.before_request
+def schedule_pending_expiries():
+    """
+    Schedule the stored requests' expiries on the process's first request,
+    so importing the app starts no background thread
+    """
+    global _pending_expiries_loaded
+    if _pending_expiries_loaded:
+        return
+    with _pending_expiries_lock:
+        if not _pending_expiries_loaded:
+            for request_id, expires_at in storage.pending_expiries():
+                expiry_scheduler.schedule(request_id, expires_at)
+            _pending_expiries_loaded = True
+
+# Gauges read at scrape time (late-bound like the scheduler callback)
+metrics.gauge('notification_queue_depth', 'Notifications waiting to be sent',
+              lambda: outbox.queue_depth())
+metrics.gauge('event_subscribers', 'Open /events streams', lambda: request_feed.subscriber_count())
+metrics.gauge('expiry_pending', 'Scheduled request expiries', lambda: expiry_scheduler.pending())
+metrics.gauge('page_cache_entries', 'Cached page data entries',
+              lambda: page_cache.stats()['entries'])
 
 # ============================
 # HELPER FUNCTIONS
 # ============================
 
+# Blood groups a request may ask for (the AI engine's groups)
+BLOOD_GROUPS = frozenset(get_all_blood_groups())
+
 def generate_donor_id():
     """Generate unique donor ID"""
     return f"DONOR_{uuid.uuid4().hex[:8].upper()}"
@@ -47,27 +245,226 @@ def generate_request_id():
     """Generate unique request ID"""
     return f"REQ_{uuid.uuid4().hex[:12].upper()}"
 
+def parse_request_fields(blood_group, units, latitude=None, longitude=None, expires_in_hours=None):
+    """
+    Validate the fields of a new blood request (form or JSON).
+    
+    Args:
+        blood_group (str): Requested blood group
+        units: Units needed (str or int)
+        latitude, longitude: Optional location
+        expires_in_hours: Optional hours until expiry (default REQUEST_TTL_HOURS, 0 = never)
+    
+    Returns:
+        dict: blood_group, units, latitude, longitude and ttl_hours
+    
+    Raises:
+        ValueError: With the message to show the user
+    """
+    if not blood_group or units in (None, ''):
+        raise ValueError('Blood group and units are required!')
+    if not isinstance(blood_group, str) or blood_group not in BLOOD_GROUPS:
+        raise ValueError(f'Unknown blood group: {blood_group}!')
+    try:
+        # Through str(), so JSON values are held to the form's rules (no 2.5, no true)
+        units = int(str(units).strip())
+    except ValueError:
+        raise ValueError('Units must be a valid number!') from None
+    if units <= 0:
+        raise ValueError('Units must be greater than 0!')
+    try:
+        latitude, longitude = parse_coordinates(latitude, longitude)
+    except (TypeError, ValueError):
+        raise ValueError('Location must be a valid latitude and longitude!') from None
+    if expires_in_hours in (None, ''):
+        expires_in_hours = app.config['REQUEST_TTL_HOURS']
+    try:
+        ttl_hours = int(str(expires_in_hours).strip())
+        if ttl_hours < 0:
+            raise ValueError
+    except ValueError:
+        raise ValueError('Expiry must be a whole number of hours!') from None
+    return {'blood_group': blood_group, 'units': units, 'latitude': latitude,
+            'longitude': longitude, 'ttl_hours': ttl_hours}
+
+def new_blood_request(fields, requestor_email, now):
+    """Build a new 'Requested' request from validated fields, created at `now`"""
+    ttl_hours = fields['ttl_hours']
+    return {
+        'id': generate_request_id(),
+        'blood_group': fields['blood_group'],
+        'units': fields['units'],
+        'requestor_email': requestor_email,
+        'donor_email': None,
+        'status': 'Requested',
+        'timestamp': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'latitude': fields['latitude'],
+        'longitude': fields['longitude'],
+        'expires_at': ((now + timedelta(hours=ttl_hours)).strftime('%Y-%m-%d %H:%M:%S')
+                       if ttl_hours else None)
+    }
+
+def publish_new_requests(new_requests):
+    """Schedule expiry, refresh cached views, push and notify for created requests"""
+    refreshed = set()
+    for new_request in new_requests:
+        expiry_scheduler.schedule(new_request['id'], new_request['expires_at'])
+        # Requests of one group and requestor invalidate the same views
+        views = (new_request['blood_group'], new_request['requestor_email'])
+        if views not in refreshed:
+            refreshed.add(views)
+            invalidate_request_views(new_request)
+        request_feed.publish(new_request)
+        notify_request_created(new_request)
+
 def is_logged_in():
     """Check if user is logged in"""
     return 'email' in session
 
+def get_page_args():
+    """
+    Read keyset pagination arguments from the query string.
+    
+    Returns:
+        tuple: (cursor of the previous page or None, page size)
+    """
+    after = request.args.get('after', type=int)
+    per_page = request.args.get('per_page', app.config['PAGE_SIZE'], type=int)
+    return after, max(1, min(per_page, app.config['MAX_PAGE_SIZE']))
+
 def get_current_user():
     """Get current logged-in user data"""
     if is_logged_in():
-        return users.get(session['email'])
+        return storage.get_user(session['email'])
     return None
 
 def get_user_requests(email):
     """Get all requests created by a requestor"""
-    return [r for r in requests_list if r['requestor_email'] == email]
+    return storage.requests_by_requestor(email)
 
 def get_active_requests():
     """Get all active blood requests"""
-    return [r for r in requests_list if r['status'] == 'Requested']
+    return storage.requests_with_status('Requested')
+
+def count_active_requests():
+    """Count all active blood requests"""
+    return storage.count_requests('Requested')
 
 def get_donor_accepted_requests(donor_email):
     """Get all requests accepted by a donor"""
-    return [r for r in requests_list if r['donor_email'] == donor_email and r['status'] == 'Confirmed']
+    return storage.requests_by_donor(donor_email, status='Confirmed')
+
+def cached_page_data(key, build):
+    """
+    Return page data from the page cache, building and storing it on a miss.
+    
+    Args:
+        key (tuple): (role, storage change tag, blood group, user, ...)
+            identifying the view and the data version it shows
+        build (callable): returns (data, invalidation tags) when not cached
+    
+    Returns:
+        The cached or freshly built data
+    """
+    data = page_cache.get(key)
+    if data is None:
+        data, tags = build()
+        page_cache.put(key, data, tags)
+    return data
+
+def page_etag(change_tag):
+    """
+    ETag for the current page: the URL (with page arguments), the logged-in
+    user and a storage change tag. Returns None when the page will show
+    flash messages, so such a one-off render is never reused.
+    
+    Read the tag before the page data (and its cache key), so the body is
+    never older than the ETag a client will revalidate with.
+    """
+    if '_flashes' in session:
+        return None
+    parts = (request.full_path, session.get('email'), change_tag)
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+def not_modified(etag):
+    """Return a 304 response if the client's If-None-Match copy is current, else None"""
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    return conditional_response(app.response_class(status=304), etag)
+
+def conditional_response(response, etag):
+    """Attach the ETag and ask clients to revalidate on every view"""
+    response = make_response(response)
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def notify_request_created(blood_request):
+    """Queue a notification for the donor groups that can answer a new request"""
+    donor_groups = get_compatible_donors(blood_request['blood_group'])
+    outbox.enqueue('request_created',
+                   f"New {blood_request['blood_group']} blood request",
+                   f"{blood_request['units']} unit(s) of {blood_request['blood_group']} blood "
+                   f"needed. Compatible donor groups: {', '.join(donor_groups)}.",
+                   request_id=blood_request['id'],
+                   blood_group=blood_request['blood_group'],
+                   donor_groups=donor_groups)
+
+def notify_request_confirmed(blood_request):
+    """Queue a notification telling the requestor a donor accepted their request"""
+    outbox.enqueue('request_confirmed',
+                   f"Blood request {blood_request['id']} confirmed",
+                   f"A donor ({blood_request['donor_email']}) accepted your request for "
+                   f"{blood_request['units']} unit(s) of {blood_request['blood_group']} blood.",
+                   request_id=blood_request['id'],
+                   blood_group=blood_request['blood_group'],
+                   recipient=blood_request['requestor_email'])
+
+def notify_request_expired(blood_request):
+    """Queue a notification telling the requestor their request expired unanswered"""
+    outbox.enqueue('request_expired',
+                   f"Blood request {blood_request['id']} expired",
+                   f"No donor accepted your request for {blood_request['units']} unit(s) of "
+                   f"{blood_request['blood_group']} blood before it expired.",
+                   request_id=blood_request['id'],
+                   blood_group=blood_request['blood_group'],
+                   recipient=blood_request['requestor_email'])
+
+def expire_request(request_id):
+    """
+    Expire a request that is still open (called by the expiry scheduler).
+    
+    Returns:
+        dict: The expired request, or None if it was confirmed (or expired) already
+    """
+    expired = storage.expire_request(request_id)
+    if expired is not None:
+        invalidate_request_views(expired)
+        notify_request_expired(expired)
+    return expired
+
+def request_has_expired(blood_request):
+    """True if a request's expiry time has passed (whatever its status says)"""
+    expires_at = blood_request.get('expires_at')
+    return bool(expires_at) and expires_at <= datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def invalidate_request_views(blood_request):
+    """
+    Drop cached views that can show a request after it is created, confirmed or expired:
+    the views of donor groups compatible with it, its requestor's dashboard
+    and, once confirmed, its donor's dashboard.
+    """
+    tags = [('donor_group', bg) for bg in get_compatible_donors(blood_request['blood_group'])]
+    tags.append(('requestor', blood_request['requestor_email']))
+    if blood_request.get('donor_email'):
+        tags.append(('donor', blood_request['donor_email']))
+    page_cache.invalidate(*tags)
+
+def invalidate_donor_views(donor):
+    """Drop cached requestor views whose compatible-donor counts a new donor changes"""
+    page_cache.invalidate(*[('request_group', bg)
+                            for bg in get_compatible_recipients(donor['blood_group'])])
 
 # ============================
 # AI ENGINE HELPER FUNCTIONS
@@ -80,7 +477,7 @@ def get_all_donors():
     Returns:
         list: List of donor user dictionaries
     """
-    return [user for user in users.values() if user['role'] == 'donor']
+    return storage.all_donors()
 
 def get_compatible_donors_for_request(blood_group):
     """
@@ -89,22 +486,73 @@ def get_compatible_donors_for_request(blood_group):
     Uses the Blood Compatibility AI Engine to filter donors based on
     medical blood transfusion compatibility rules.
     
+    Donors still in their post-donation cooldown are left out.
+    
     Args:
         blood_group (str): The blood group that needs blood (receiver)
     
     Returns:
         list: List of compatible donor user dictionaries
     """
-    all_donors = get_all_donors()
-    compatible_groups = get_compatible_donors(blood_group)
-    return [donor for donor in all_donors if donor['blood_group'] in compatible_groups]
+    return storage.donors_for_groups(get_compatible_donors(blood_group), eligible_on=date.today())
+
+def get_nearest_compatible_donors(blood_request):
+    """
+    AI Helper: Nearest donors compatible with a request that has coordinates.
+    
+    Combines the AI engine's compatible blood groups with the storage's
+    per-blood-group location index, so only donors near the request are
+    examined.
+    
+    Args:
+        blood_request (dict): Request with 'blood_group' and optional
+                              'latitude'/'longitude'
+    
+    Returns:
+        list: Up to NEAREST_DONORS eligible donor dictionaries with
+              'distance_km', nearest first ([] if the request has no coordinates)
+    """
+    if blood_request.get('latitude') is None:
+        return []
+    return storage.nearest_donors(blood_request['latitude'], blood_request['longitude'],
+                                  get_compatible_donors(blood_request['blood_group']),
+                                  k=app.config['NEAREST_DONORS'],
+                                  radius_km=app.config['NEAREST_DONOR_RADIUS_KM'],
+                                  eligible_on=date.today())
+
+def count_compatible_donors_for_request(blood_group):
+    """
+    AI Helper: Count donors compatible with a requested blood group.
+    
+    Sums the per-blood-group counts of donors eligible today for the
+    compatible groups returned by the Blood Compatibility AI Engine (at
+    most 8 additions); donors still cooling down are not counted.
+    
+    Args:
+        blood_group (str): The blood group that needs blood (receiver)
+    
+    Returns:
+        int: Number of compatible registered donors eligible to donate today
+    """
+    return storage.count_donors(get_compatible_donors(blood_group), eligible_on=date.today())
+
+def next_donation_date(donor):
+    """
+    First date a donor may donate again, if they are still cooling down.
+    
+    Returns:
+        str: ISO date (YYYY-MM-DD) after today, or None if the donor is eligible
+    """
+    next_eligible = donor.get('next_eligible') or ''
+    return next_eligible if next_eligible > date.today().isoformat() else None
 
 def get_compatible_active_requests(donor_blood_group):
     """
     AI Helper: Get active requests compatible with a donor's blood group.
     
-    Uses the Blood Compatibility AI Engine to filter requests where
-    the donor's blood group can donate to the requested blood group.
+    Uses the Blood Compatibility AI Engine to find the requested blood groups
+    this donor can give to, then reads only those groups from the
+    (status, blood_group) index.
     
     Args:
         donor_blood_group (str): The blood group of the donor
@@ -112,11 +560,22 @@ def get_compatible_active_requests(donor_blood_group):
     Returns:
         list: List of compatible active request dictionaries
     """
-    active_reqs = get_active_requests()
-    return [
-        req for req in active_reqs
-        if is_donor_compatible(donor_blood_group, req['blood_group'])
-    ]
+    return storage.requests_with_status('Requested', get_compatible_recipients(donor_blood_group))
+
+def count_compatible_active_requests(donor_blood_group):
+    """
+    AI Helper: Count active requests compatible with a donor's blood group.
+    
+    Adds up the live active-request counters of the (at most 8) blood groups
+    this donor can give to.
+    
+    Args:
+        donor_blood_group (str): The blood group of the donor
+    
+    Returns:
+        int: Number of compatible active requests
+    """
+    return storage.count_requests('Requested', get_compatible_recipients(donor_blood_group))
 
 # ============================
 # ROUTES
@@ -155,25 +614,44 @@ def register(user_type):
             flash('Passwords do not match!', 'warning')
             return render_template('register.html', user_type=user_type)
         
-        if email in users:
+        try:
+            latitude, longitude = parse_coordinates(request.form.get('latitude', '').strip(),
+                                                    request.form.get('longitude', '').strip())
+        except ValueError:
+            flash('Location must be a valid latitude and longitude!', 'warning')
+            return render_template('register.html', user_type=user_type)
+        
+        if storage.get_user(email):
             flash('Email already registered!', 'danger')
             return render_template('register.html', user_type=user_type)
         
         # Create user
         user_id = generate_donor_id() if user_type == 'donor' else generate_requestor_id()
         
-        users[email] = {
+        try:
+            pwhash = password_hasher.hash(password)
+        except HasherBusyError:
+            flash('The server is busy, please try again in a moment.', 'warning')
+            return render_template('register.html', user_type=user_type), 503
+        
+        new_user = {
             'id': user_id,
             'name': name,
             'email': email,
-            'password': generate_password_hash(password),
+            'password': pwhash,
             'blood_group': blood_group,
-            'role': user_type
+            'role': user_type,
+            'latitude': latitude,
+            'longitude': longitude
         }
         
-        # Initialize donation history for donors
+        # add_user re-checks atomically: another worker may have registered the email
+        if not storage.add_user(new_user):
+            flash('Email already registered!', 'danger')
+            return render_template('register.html', user_type=user_type)
+        
         if user_type == 'donor':
-            donation_history[email] = []
+            invalidate_donor_views(new_user)
         
         flash(f'Registration successful! Please login.', 'success')
         return redirect(url_for('login_type'))
@@ -200,9 +678,18 @@ def login(user_type):
             flash('Email and password required!', 'warning')
             return render_template('login.html', user_type=user_type)
         
-        user = users.get(email)
+        user = storage.get_user(email)
+        
+        try:
+            valid = bool(user) and password_hasher.verify(user['password'], password)
+            # Upgrade hashes made with an older method/cost while we have the password
+            if valid and password_hasher.needs_rehash(user['password']):
+                storage.update_user_password(email, password_hasher.hash(password))
+        except HasherBusyError:
+            flash('The server is busy, please try again in a moment.', 'warning')
+            return render_template('login.html', user_type=user_type), 503
         
-        if not user or not check_password_hash(user['password'], password):
+        if not valid:
             flash('Invalid email or password!', 'danger')
             return render_template('login.html', user_type=user_type)
         
@@ -235,36 +722,70 @@ def dashboard():
     
     user = get_current_user()
     
+    # Both dashboards show running totals across blood groups, so their
+    # ETag follows every group's change counter. Donor eligibility also
+    # changes with the date alone (cooldowns ending), so the day is part
+    # of the tag. The cached page data is keyed by a change tag too, read
+    # after the ETag's, so a body is never older than the ETag it is sent
+    # with, even after another worker's write.
+    today = date.today().isoformat()
+    change_tag = f"{storage.change_tag()}-{today}"
+    etag = page_etag(change_tag)
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+    
     if user['role'] == 'requestor':
-        user_requests = get_user_requests(session['email'])
+        after, per_page = get_page_args()
+        
+        def build_requestor_page():
+            user_requests, next_cursor = storage.page_requests_by_requestor(
+                session['email'], after=after, limit=per_page)
+            
+            # AI ENGINE: For each request, count compatible donors
+            requests_with_ai_info = []
+            for req in user_requests:
+                req_copy = req.copy()
+                req_copy['compatible_donors_count'] = count_compatible_donors_for_request(req['blood_group'])
+                req_copy['compatibility_explanation'] = get_compatibility_explanation(req['blood_group'])
+                req_copy['nearest_donors'] = get_nearest_compatible_donors(req)
+                requests_with_ai_info.append(req_copy)
+            
+            tags = {('requestor', session['email'])}
+            tags.update(('request_group', req['blood_group']) for req in user_requests)
+            return (requests_with_ai_info, next_cursor), tags
         
-        # AI ENGINE: For each request, get compatible donors
-        requests_with_ai_info = []
-        for req in user_requests:
-            compatible_donors = get_compatible_donors_for_request(req['blood_group'])
-            req_copy = req.copy()
-            req_copy['compatible_donors_count'] = len(compatible_donors)
-            req_copy['compatibility_explanation'] = get_compatibility_explanation(req['blood_group'])
-            requests_with_ai_info.append(req_copy)
+        user_requests, next_cursor = cached_page_data(
+            ('requestor', change_tag, session['email'], after, per_page), build_requestor_page)
         
-        return render_template('dashboard.html', 
-                               user=user, 
-                               user_requests=requests_with_ai_info,
-                               role='requestor')
+        return conditional_response(render_template('dashboard.html', 
+                                                    user=user, 
+                                                    user_requests=user_requests,
+                                                    next_cursor=next_cursor,
+                                                    per_page=per_page,
+                                                    role='requestor'), etag)
     else:  # donor
-        accepted_requests = get_donor_accepted_requests(session['email'])
-        donor_history = donation_history.get(session['email'], [])
+        def build_donor_dashboard():
+            data = {
+                'accepted_requests': get_donor_accepted_requests(session['email']),
+                'donation_history': storage.get_donation_history(session['email']),
+                # AI ENGINE: Count compatible requests for this donor
+                'compatible_requests_count': count_compatible_active_requests(user['blood_group']),
+            }
+            return data, [('donor', session['email']), ('donor_group', user['blood_group'])]
         
-        # AI ENGINE: Get compatible requests for this donor
-        compatible_reqs = get_compatible_active_requests(user['blood_group'])
+        # Only writes to the groups it can accept from or donate to change it
+        groups = sorted({user['blood_group'], *get_compatible_recipients(user['blood_group'])})
+        data = cached_page_data(('donor', storage.change_tag(groups), user['blood_group'],
+                                 session['email']), build_donor_dashboard)
         
-        return render_template('dashboard.html',
-                               user=user,
-                               accepted_requests=accepted_requests,
-                               donation_history=donor_history,
-                               compatible_requests_count=len(compatible_reqs),
-                               all_active_requests_count=len(get_active_requests()),
-                               role='donor')
+        # The total changes with every request, so it is read live
+        return conditional_response(render_template('dashboard.html',
+                                                    user=user,
+                                                    all_active_requests_count=count_active_requests(),
+                                                    next_eligible=next_donation_date(user),
+                                                    role='donor',
+                                                    **data), etag)
 
 @app.route('/request', methods=['GET', 'POST'])
 def request_blood():
@@ -285,38 +806,81 @@ def request_blood():
         return redirect(url_for('dashboard'))
     
     if request.method == 'POST':
-        blood_group = request.form.get('blood_group', '')
-        units = request.form.get('units', '')
-        
-        if not blood_group or not units:
-            flash('Blood group and units are required!', 'warning')
-            return render_template('request.html', user=user)
-        
         try:
-            units = int(units)
-            if units <= 0:
-                flash('Units must be greater than 0!', 'warning')
-                return render_template('request.html', user=user)
-        except ValueError:
-            flash('Units must be a valid number!', 'warning')
-            return render_template('request.html', user=user)
+            fields = parse_request_fields(request.form.get('blood_group', ''),
+                                          request.form.get('units', ''),
+                                          request.form.get('latitude', '').strip(),
+                                          request.form.get('longitude', '').strip(),
+                                          request.form.get('expires_in_hours', '').strip())
+        except ValueError as e:
+            flash(str(e), 'warning')
+            return render_template('request.html', user=user,
+                                   request_ttl_hours=app.config['REQUEST_TTL_HOURS'])
         
         # Create request
-        new_request = {
-            'id': generate_request_id(),
-            'blood_group': blood_group,
-            'units': units,
-            'requestor_email': session['email'],
-            'donor_email': None,
-            'status': 'Requested',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        requests_list.append(new_request)
+        new_request = new_blood_request(fields, session['email'], datetime.now())
+        storage.add_request(new_request)
+        publish_new_requests([new_request])
         flash(f'Blood request created successfully! ID: {new_request["id"]}', 'success')
         return redirect(url_for('dashboard'))
     
-    return render_template('request.html', user=user)
+    return render_template('request.html', user=user,
+                           request_ttl_hours=app.config['REQUEST_TTL_HOURS'])
+
+@app.route('/api/requests', methods=['POST'])
+def api_create_requests():
+    """
+    Bulk JSON API: create many blood requests in one call (Requestor only).
+    
+    Body: a JSON list of requests, or {"requests": [...]}. Each item has
+    blood_group and units, and optionally latitude, longitude and
+    expires_in_hours, validated as on the /request form.
+    
+    Valid items are inserted together in one storage transaction; invalid
+    items are skipped and reported.
+    
+    Returns:
+        JSON {"created": n, "failed": m, "results": [...]} where each result
+        is {"index": i, "id": ...} or {"index": i, "error": ...}; status 201
+        if any request was created, 400 if none was
+    """
+    if not is_logged_in():
+        return jsonify({'error': 'Login required'}), 401
+    if session.get('role') != 'requestor':
+        return jsonify({'error': 'Only requestors can create requests'}), 403
+    
+    body = request.get_json(silent=True)
+    items = body.get('requests') if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        return jsonify({'error': 'Expected a JSON list of requests'}), 400
+    if len(items) > app.config['BULK_REQUEST_MAX_ITEMS']:
+        return jsonify({'error': f"At most {app.config['BULK_REQUEST_MAX_ITEMS']} "
+                                 f"requests per call"}), 413
+    
+    now = datetime.now()
+    results, new_requests = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({'index': index, 'error': 'Each request must be a JSON object'})
+            continue
+        try:
+            fields = parse_request_fields(item.get('blood_group'), item.get('units'),
+                                          item.get('latitude'), item.get('longitude'),
+                                          item.get('expires_in_hours'))
+        except ValueError as e:
+            results.append({'index': index, 'error': str(e)})
+            continue
+        new_request = new_blood_request(fields, session['email'], now)
+        new_requests.append(new_request)
+        results.append({'index': index, 'id': new_request['id']})
+    
+    if new_requests:
+        storage.add_requests(new_requests)
+        publish_new_requests(new_requests)
+    
+    return jsonify({'created': len(new_requests),
+                    'failed': len(items) - len(new_requests),
+                    'results': results}), 201 if new_requests else 400
 
 @app.route('/donors')
 def donors():
@@ -337,31 +901,102 @@ def donors():
         flash('Only donors can view requests!', 'danger')
         return redirect(url_for('dashboard'))
     
-    # AI ENGINE INTEGRATION: Get only AI-compatible active requests for this donor
-    compatible_requests = get_compatible_active_requests(user['blood_group'])
+    # The page also shows the total of active requests, so its ETag
+    # follows every group's change counter, not only the compatible ones
+    etag = page_etag(storage.change_tag())
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+    
+    # AI ENGINE INTEGRATION: Get one page of AI-compatible active requests for this donor
+    # The page only depends on the blood group, so donors of one group share it.
+    # It is keyed by the change tag of the groups it shows, read after the
+    # ETag's tag, so another worker's write to them is seen and the body is
+    # never older than its ETag.
+    after, per_page = get_page_args()
+    recipient_groups = get_compatible_recipients(user['blood_group'])
+    
+    def build_donors_page():
+        page, next_cursor = storage.page_requests_with_status(
+            'Requested', recipient_groups, after=after, limit=per_page)
+        data = (page, next_cursor, count_compatible_active_requests(user['blood_group']))
+        return data, [('donor_group', user['blood_group'])]
+    
+    compatible_requests, next_cursor, compatible_count = cached_page_data(
+        ('donors', storage.change_tag(recipient_groups), user['blood_group'], after, per_page),
+        build_donors_page)
+    
+    return conditional_response(render_template('donors.html', 
+                                                user=user, 
+                                                active_requests=compatible_requests,
+                                                compatible_requests_count=compatible_count,
+                                                all_active_requests_count=count_active_requests(),
+                                                next_cursor=next_cursor,
+                                                per_page=per_page,
+                                                is_first_page=after is None,
+                                                event_feed=app.config['EVENT_FEED_ENABLED'],
+                                                donor_blood_group=user['blood_group']), etag)
+
+@app.route('/events')
+def events():
+    """
+    Server-sent events stream of new requests compatible with the donor.
+    
+    AI INTEGRATION:
+    - The feed delivers each new request only to donors whose blood group the
+      AI engine allows to give to it
+    """
+    if not is_logged_in():
+        flash('Please login first!', 'danger')
+        return redirect(url_for('login_type'))
+    
+    if not app.config['EVENT_FEED_ENABLED']:
+        # EventSource clients stop reconnecting on a non-200 status
+        return Response('', status=404, mimetype='text/event-stream')
+    
+    user = get_current_user()
+    if user['role'] != 'donor':
+        flash('Only donors can follow new requests!', 'danger')
+        return redirect(url_for('dashboard'))
+    
+    try:
+        subscription = request_feed.subscribe(user['blood_group'])
+    except FeedFullError:
+        return Response('retry: 30000\n\n', status=503, mimetype='text/event-stream')
+    
+    heartbeat = app.config['EVENT_HEARTBEAT']
     
-    # AI ENGINE: Get all active requests for comparison (optional display)
-    all_active_requests = get_active_requests()
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                new_requests = subscription.wait(heartbeat)
+                if not new_requests:
+                    # Comment line: keeps proxies from closing an idle stream
+                    # and lets the server notice a closed connection
+                    yield ': keepalive\n\n'
+                for blood_request in new_requests:
+                    yield (f"id: {blood_request['id']}\nevent: request\n"
+                           f"data: {json.dumps(blood_request)}\n\n")
+        finally:
+            request_feed.unsubscribe(subscription)
     
-    return render_template('donors.html', 
-                         user=user, 
-                         active_requests=compatible_requests,
-                         all_active_requests=all_active_requests,
-                         donor_blood_group=user['blood_group'])
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/donor/<donor_email>')
 def donor_profile(donor_email):
     """View donor profile"""
-    if donor_email not in users:
+    donor = storage.get_user(donor_email)
+    if not donor:
         flash('Donor not found!', 'danger')
         return redirect(url_for('index'))
     
-    donor = users[donor_email]
     if donor['role'] != 'donor':
         flash('User is not a donor!', 'danger')
         return redirect(url_for('index'))
     
-    donor_history_data = donation_history.get(donor_email, [])
+    donor_history_data = storage.get_donation_history(donor_email)
     
     return render_template('donor_profile.html', 
                            donor=donor, 
@@ -386,16 +1021,18 @@ def donate_blood(request_id):
         return redirect(url_for('dashboard'))
     
     # Find the request
-    blood_request = None
-    for req in requests_list:
-        if req['id'] == request_id:
-            blood_request = req
-            break
+    blood_request = storage.get_request(request_id)
     
     if not blood_request:
         flash('Request not found!', 'danger')
         return redirect(url_for('donors'))
     
+    # The scheduler may not have run yet (or the request came from another worker)
+    if blood_request['status'] == 'Requested' and request_has_expired(blood_request):
+        expire_request(request_id)
+        flash('This request has expired!', 'danger')
+        return redirect(url_for('donors'))
+    
     if blood_request['status'] != 'Requested':
         flash('This request is no longer available!', 'danger')
         return redirect(url_for('donors'))
@@ -405,10 +1042,17 @@ def donate_blood(request_id):
         flash(f'Your blood group ({user["blood_group"]}) is not compatible with the requested blood group ({blood_request["blood_group"]})!', 'danger')
         return redirect(url_for('donors'))
     
+    next_eligible = next_donation_date(user)
+    if next_eligible:
+        flash(f'You donated recently and can donate again from {next_eligible}.', 'warning')
+        return redirect(url_for('donors'))
+    
     if request.method == 'POST':
-        # Update request status to Confirmed
-        blood_request['donor_email'] = session['email']
-        blood_request['status'] = 'Confirmed'
+        # Atomically claim the request: only one donor can confirm it
+        claimed = storage.claim_request(request_id, session['email'])
+        if claimed is None:
+            flash('This request is no longer available!', 'danger')
+            return redirect(url_for('donors'))
         
         # Add to donation history
         donation_entry = {
@@ -418,10 +1062,11 @@ def donate_blood(request_id):
             'date_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
-        if session['email'] not in donation_history:
-            donation_history[session['email']] = []
-        
-        donation_history[session['email']].append(donation_entry)
+        storage.add_donation(session['email'], donation_entry)
+        invalidate_request_views(claimed)
+        # The donor now cools down and drops out of compatible-donor counts
+        invalidate_donor_views(user)
+        notify_request_confirmed(claimed)
         
         flash(f'Blood request accepted! Request ID: {request_id}', 'success')
         return redirect(url_for('dashboard'))
@@ -448,6 +1093,33 @@ def confirm():
     
     return render_template('confirmation.html', user=user)
 
+@app.route('/cache-stats')
+def cache_stats():
+    """Page cache hit/miss counters as JSON"""
+    return jsonify(page_cache.stats())
+
+@app.route('/notification-stats')
+def notification_stats():
+    """Notification queue depth, counters and delivery latency as JSON"""
+    return jsonify(outbox.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request latency histograms, counters and gauges in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/expiry-stats')
+def expiry_stats():
+    """Request expiry heap size, next expiry and counters as JSON"""
+    return jsonify(expiry_scheduler.stats())
+
+@app.route('/profile-stats')
+def profile_stats():
+    """Request profiler settings and counters as JSON"""
+    if request_profiler is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(request_profiler.stats(), enabled=True))
+
 @app.route('/logout')
 def logout():
     """Logout user"""
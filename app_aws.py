@@ -5,7 +5,8 @@ import uuid
 
 from werkzeug.utils import secure_filename
 from boto3.dynamodb.conditions import Key
-from botocore.exceptions import ClientError
+
+from blood_notifications import NotificationOutbox, SNSTransport
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here'
@@ -32,15 +33,14 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Notifications are queued and published to SNS in batches by a background
+# thread, so a slow or failing SNS call never holds up a route. The topic
+# and client are looked up on each send, so changing SNS_TOPIC_ARN (or sns)
+# after import takes effect.
+notification_outbox = NotificationOutbox(SNSTransport(lambda: SNS_TOPIC_ARN, client=lambda: sns))
+
 def send_notification(subject, message):
-    try:
-        sns.publish(
-            TopicArn=SNS_TOPIC_ARN,
-            Subject=subject,
-            Message=message
-        )
-    except ClientError as e:
-        print(f"Error sending notification: {e}")
+    notification_outbox.enqueue('app_event', subject, message)
 
 @app.route('/')
 def index():
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Benchmark Script for the Blood Bank Flask Application
+Times route latency through the Flask test client for each storage backend,
+login throughput per password hash method, and request ingestion through
+the /request form versus the bulk JSON API
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import app as blood_app
+from blood_ai_engine import get_all_blood_groups
+from blood_cache import PageCache
+from blood_notifications import NotificationOutbox, StubTransport
+from blood_passwords import PasswordHasher
+from blood_storage import create_storage
+
+# Templates live next to app.py in this checkout rather than in templates/
+blood_app.app.template_folder = os.path.dirname(os.path.abspath(__file__))
+
+
+def seed(storage, request_count, requestor_count=100, active_ratio=0.01, seed=42):
+    """Fill a backend with one donor per blood group, requestors and requests"""
+    rng = random.Random(seed)
+    groups = get_all_blood_groups()
+    for group in groups:
+        storage.add_user({'id': f'DONOR_{group}', 'name': f'Donor {group}',
+                          'email': f'donor{group}@bench.test', 'password': 'x',
+                          'blood_group': group, 'role': 'donor'})
+    for n in range(requestor_count):
+        storage.add_user({'id': f'REQ_{n}', 'name': f'Requestor {n}',
+                          'email': f'req{n}@bench.test', 'password': 'x',
+                          'blood_group': rng.choice(groups), 'role': 'requestor'})
+
+    batch = []
+    for i in range(request_count):
+        group = rng.choice(groups)
+        active = rng.random() < active_ratio
+        batch.append({
+            'id': f'REQ_{i:012d}',
+            'blood_group': group,
+            'units': rng.randint(1, 5),
+            'requestor_email': f'req{i % requestor_count}@bench.test',
+            'donor_email': None if active else f'donor{group}@bench.test',
+            'status': 'Requested' if active else 'Confirmed',
+            'timestamp': '2026-01-01 00:00:00'
+        })
+        if len(batch) == 10_000:
+            storage.add_requests(batch)
+            batch = []
+    if batch:
+        storage.add_requests(batch)
+
+
+def time_route(client, email, role, path, repeat):
+    """Log in as a user and return the median latency of GET path in ms"""
+    with client.session_transaction() as session:
+        session['email'] = email
+        session['name'] = email
+        session['role'] = role
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, (path, response.status_code)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+def bench_backend(backend, request_count, repeat):
+    """Seed one backend and time the main routes against it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = create_storage(backend, os.path.join(tmp, 'bench.db'))
+        started = time.perf_counter()
+        seed(storage, request_count)
+        print(f"\n▶ {backend} backend: seeded {request_count:,} requests "
+              f"in {time.perf_counter() - started:.2f}s")
+        blood_app.storage = storage
+        blood_app.page_cache = PageCache(blood_app.app.config['PAGE_CACHE_SIZE'])
+        blood_app.app.config['TESTING'] = True
+        with blood_app.app.test_client() as client:
+            routes = [
+                ('donor dashboard', 'donorO-@bench.test', 'donor', '/dashboard'),
+                ('requestor dashboard', 'req0@bench.test', 'requestor', '/dashboard'),
+                ('donors (AB+ donor)', 'donorAB+@bench.test', 'donor', '/donors'),
+                ('donate-blood (GET)', 'donorO-@bench.test', 'donor', '/donate-blood/'
+                 + storage.requests_with_status('Requested')[0]['id']),
+            ]
+            for label, email, role, path in routes:
+                latency = time_route(client, email, role, path, repeat)
+                print(f"  {label:<28} {latency:9.2f} ms (median of {repeat})")
+            stats = blood_app.page_cache.stats()
+            print(f"  page cache: {stats['hits']} hits, {stats['misses']} misses")
+        storage.close()
+
+
+def bench_login(methods, logins, threads):
+    """Time concurrent logins for each password hash method"""
+    blood_app.app.config['TESTING'] = True
+    for method in methods:
+        blood_app.storage = create_storage('memory')
+        blood_app.password_hasher = PasswordHasher(method, workers=threads, max_pending=threads * 4)
+        with blood_app.app.test_client() as client:
+            client.post('/register/donor', data={
+                'name': 'Bench Donor', 'email': 'donor@bench.test', 'password': 'password',
+                'confirm_password': 'password', 'phone': '555-0100', 'blood_group': 'O+',
+            })
+        form = {'email': 'donor@bench.test', 'password': 'password'}
+        per_thread = max(1, logins // threads)
+
+        def worker():
+            with blood_app.app.test_client() as client:
+                for _ in range(per_thread):
+                    response = client.post('/login/donor', data=form)
+                    assert response.status_code == 302, response.status_code
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        total = per_thread * threads
+        print(f"  {method:<28} {total / elapsed:9.1f} logins/s "
+              f"({elapsed / total * 1000:.1f} ms each, {threads} threads)")
+        blood_app.password_hasher.close()
+
+
+def bench_ingest(backend, total, batch_size):
+    """Requests/s created through the /request form versus POST /api/requests"""
+    groups = get_all_blood_groups()
+    with tempfile.TemporaryDirectory() as tmp:
+        blood_app.storage = create_storage(backend, os.path.join(tmp, 'bench.db'))
+        blood_app.page_cache = PageCache(blood_app.app.config['PAGE_CACHE_SIZE'])
+        # Keep notifications off disk; delivery is off the request path anyway
+        blood_app.outbox = NotificationOutbox(StubTransport())
+        blood_app.app.config['TESTING'] = True
+        blood_app.storage.add_user({'id': 'HOSPITAL', 'name': 'Hospital',
+                                    'email': 'hospital@bench.test', 'password': 'x',
+                                    'blood_group': 'A+', 'role': 'requestor'})
+        with blood_app.app.test_client() as client:
+            with client.session_transaction() as session:
+                session.update(email='hospital@bench.test', name='Hospital', role='requestor')
+
+            # The form path is a POST plus the redirect to the dashboard, as in a browser
+            started = time.perf_counter()
+            for n in range(total):
+                response = client.post('/request', data={'blood_group': groups[n % len(groups)],
+                                                          'units': '2'}, follow_redirects=True)
+                assert response.status_code == 200, response.status_code
+            form_rate = total / (time.perf_counter() - started)
+
+            items = [{'blood_group': groups[n % len(groups)], 'units': 2}
+                     for n in range(batch_size)]
+            started = time.perf_counter()
+            for _ in range(max(1, total // batch_size)):
+                response = client.post('/api/requests', json=items)
+                assert response.status_code == 201, response.status_code
+            api_rate = max(1, total // batch_size) * batch_size / (time.perf_counter() - started)
+
+        print(f"  {backend:<8} form {form_rate:9.0f} req/s   "
+              f"bulk API (x{batch_size}) {api_rate:9.0f} req/s   {api_rate / form_rate:5.1f}x")
+        blood_app.outbox.close()
+        blood_app.storage.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark blood bank routes per backend.')
+    parser.add_argument('--requests', type=int, default=100_000, help='requests to seed')
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per route')
+    parser.add_argument('--backends', nargs='+', default=['memory', 'sqlite'])
+    parser.add_argument('--suite', choices=['routes', 'login', 'ingest'], default='routes')
+    parser.add_argument('--hash-methods', nargs='+',
+                        default=['pbkdf2:sha256:100000', 'pbkdf2:sha256:600000', 'scrypt:32768:8:1'],
+                        help='password hash methods for the login suite')
+    parser.add_argument('--logins', type=int, default=40, help='logins per hash method')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent login clients')
+    parser.add_argument('--ingest', type=int, default=5000, help='requests created per path')
+    parser.add_argument('--batch-size', type=int, default=500, help='requests per bulk API call')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BLOOD BANK APPLICATION - ROUTE BENCHMARKS")
+    print("=" * 60)
+    if args.suite == 'login':
+        print(f"\n▶ login throughput ({args.logins} logins per method)")
+        bench_login(args.hash_methods, args.logins, args.threads)
+    elif args.suite == 'ingest':
+        print(f"\n▶ request ingestion ({args.ingest:,} requests per path)")
+        for backend in args.backends:
+            bench_ingest(backend, args.ingest, args.batch_size)
+    else:
+        for backend in args.backends:
+            bench_backend(backend, args.requests, args.repeat)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Load Test for the Server-Sent Events Feed
+Opens thousands of idle /events streams against a local threaded server,
+then times how long each new request takes to reach every compatible donor
+"""
+
+import argparse
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+from urllib.parse import urlencode
+
+from werkzeug.serving import make_server
+
+import app as blood_app
+from blood_ai_engine import get_all_blood_groups, get_compatible_donors
+from blood_storage import create_storage
+
+# Templates live next to app.py in this checkout rather than in templates/
+blood_app.app.template_folder = os.path.dirname(os.path.abspath(__file__))
+
+
+def rss_mb():
+    """Resident memory of this process in MB (Linux)"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def session_cookie(email, role):
+    """Signed session cookie for a user, as the login route would set it"""
+    serializer = blood_app.app.session_interface.get_signing_serializer(blood_app.app)
+    value = serializer.dumps({'email': email, 'name': email, 'role': role})
+    return f"{blood_app.app.config['SESSION_COOKIE_NAME']}={value}"
+
+
+def open_stream(port, cookie):
+    """Open one /events connection and return its socket"""
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(f"GET /events HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n"
+                 f"Accept: text/event-stream\r\n\r\n".encode())
+    sock.setblocking(False)
+    return sock
+
+
+def post_request(port, cookie, blood_group):
+    """Create a blood request through the form route"""
+    body = urlencode({'blood_group': blood_group, 'units': 1})
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        sock.sendall(f"POST /request HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n"
+                     f"Content-Type: application/x-www-form-urlencoded\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n{body}".encode())
+        while sock.recv(65536):
+            pass
+
+
+def wait_for(selector, streams, expected, marker, timeout):
+    """Read all streams until `expected` of them have seen marker; return who did"""
+    seen = set()
+    deadline = time.perf_counter() + timeout
+    while len(seen) < expected and time.perf_counter() < deadline:
+        for key, _ in selector.select(timeout=0.5):
+            data = key.fileobj.recv(65536)
+            if marker in data:
+                seen.add(key.data)
+    return seen
+
+
+def run(connections, rounds, heartbeat):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # Each stream holds a server thread; small stacks keep idle ones cheap
+    threading.stack_size(256 * 1024)
+    blood_app.app.config['DEBUG'] = False
+    blood_app.app.config['EVENT_HEARTBEAT'] = heartbeat
+    blood_app.app.config['EVENT_FEED_ENABLED'] = True
+    blood_app.storage = create_storage('memory')
+    blood_app.request_feed.max_subscribers = connections
+
+    groups = get_all_blood_groups()
+    donors = []
+    for n in range(connections):
+        email = f'donor{n}@load.test'
+        group = groups[n % len(groups)]
+        blood_app.storage.add_user({'id': f'DONOR_{n}', 'name': email, 'email': email,
+                                    'password': 'unused', 'blood_group': group, 'role': 'donor'})
+        donors.append((email, group))
+    blood_app.storage.add_user({'id': 'REQ_1', 'name': 'Hospital', 'email': 'hospital@load.test',
+                                'password': 'unused', 'blood_group': 'A+', 'role': 'requestor'})
+
+    server = make_server('127.0.0.1', 0, blood_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    selector = selectors.DefaultSelector()
+    streams = []
+    for n, (email, group) in enumerate(donors):
+        sock = open_stream(port, session_cookie(email, 'donor'))
+        selector.register(sock, selectors.EVENT_READ, data=n)
+        streams.append(sock)
+    connected = wait_for(selector, streams, connections, b'retry:', timeout=120)
+    print(f"  opened {len(connected):,}/{connections:,} streams in "
+          f"{time.perf_counter() - started:.2f}s")
+    print(f"  memory: {rss_mb() - baseline:.1f} MB for {connections:,} idle streams "
+          f"({(rss_mb() - baseline) * 1024 / max(1, connections):.1f} KB each), "
+          f"{threading.active_count()} threads")
+
+    # Idle streams must not burn CPU between events
+    cpu_before = time.process_time()
+    time.sleep(2)
+    print(f"  idle CPU: {(time.process_time() - cpu_before) / 2 * 100:.1f}% over 2s")
+
+    hospital = session_cookie('hospital@load.test', 'requestor')
+    print(f"\n  {'request':<8} {'fan-out':>8} {'delivered':>10} {'latency':>10}")
+    for _ in range(rounds):
+        for group in groups:
+            expected = {n for n, (_, donor_group) in enumerate(donors)
+                        if donor_group in get_compatible_donors(group)}
+            before = blood_app.storage.count_requests('Requested')
+            started = time.perf_counter()
+            post_request(port, hospital, group)
+            assert blood_app.storage.count_requests('Requested') == before + 1
+            seen = wait_for(selector, streams, len(expected), b'event: request', timeout=30)
+            elapsed = time.perf_counter() - started
+            assert seen == expected, f"{group}: wrong recipients"
+            print(f"  {group:<8} {len(expected):>8,} {len(seen):>10,} {elapsed * 1000:>8.1f} ms")
+
+    for sock in streams:
+        selector.unregister(sock)
+        sock.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the /events SSE feed.')
+    parser.add_argument('--connections', type=int, default=2000, help='idle donor streams')
+    parser.add_argument('--rounds', type=int, default=1, help='requests per blood group')
+    parser.add_argument('--heartbeat', type=float, default=15, help='keepalive interval (s)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BLOOD BANK APPLICATION - EVENT FEED LOAD TEST")
+    print("=" * 60)
+    run(args.connections, args.rounds, args.heartbeat)
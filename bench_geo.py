@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark Script for the Nearest-Donor Location Index
+Times "k nearest compatible donors within R km" over synthetic donors,
+against a full scan of the compatible donors
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from blood_ai_engine import get_all_blood_groups, get_compatible_donors
+from blood_geo import GeoGrid, haversine_km
+from blood_storage import create_storage
+
+# (latitude, longitude) of cities donors cluster around
+CITIES = [(51.51, -0.13), (48.86, 2.35), (40.71, -74.01), (34.05, -118.24), (35.68, 139.69),
+          (28.61, 77.21), (13.08, 80.27), (-33.87, 151.21), (-23.55, -46.63), (55.76, 37.62),
+          (19.43, -99.13), (30.04, 31.24), (1.35, 103.82), (-26.20, 28.05), (41.01, 28.98),
+          (39.90, 116.40), (6.52, 3.38), (43.65, -79.38), (52.52, 13.40), (-17.71, 178.07)]
+
+
+def make_donors(count, seed=42):
+    """Synthetic donors: 90% around cities (~30 km spread), 10% anywhere"""
+    rng = random.Random(seed)
+    groups = get_all_blood_groups()
+    donors = []
+    for n in range(count):
+        if n % 10 == 0:
+            lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        else:
+            city_lat, city_lon = rng.choice(CITIES)
+            lat, lon = rng.gauss(city_lat, 0.3), (rng.gauss(city_lon, 0.3) + 180) % 360 - 180
+        donors.append({'id': f'DONOR_{n}', 'name': f'Donor {n}', 'email': f'donor{n}@bench.test',
+                       'password': 'unused', 'blood_group': rng.choice(groups), 'role': 'donor',
+                       'latitude': lat, 'longitude': lon})
+    return donors
+
+
+def make_queries(count, seed=7):
+    """Request locations near random cities, with a random requested group"""
+    rng = random.Random(seed)
+    groups = get_all_blood_groups()
+    return [(rng.gauss(lat, 0.2), rng.gauss(lon, 0.2), rng.choice(groups))
+            for lat, lon in (rng.choice(CITIES) for _ in range(count))]
+
+
+def time_queries(nearest, queries, k, radius_km):
+    """Median and p95 latency (ms) of nearest(lat, lon, groups, k, radius_km)"""
+    samples = []
+    for lat, lon, group in queries:
+        started = time.perf_counter()
+        nearest(lat, lon, get_compatible_donors(group), k, radius_km)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def full_scan(donors):
+    """Baseline: scan every compatible donor and keep the k nearest"""
+    def nearest(lat, lon, groups, k, radius_km):
+        groups = set(groups)
+        hits = []
+        for donor in donors:
+            if donor['blood_group'] in groups:
+                distance = haversine_km(lat, lon, donor['latitude'], donor['longitude'])
+                if distance <= radius_km:
+                    hits.append((distance, donor))
+        hits.sort(key=lambda pair: pair[0])
+        return hits[:k]
+    return nearest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the nearest-donor index.')
+    parser.add_argument('--donors', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--radius', type=float, default=50.0, help='search radius in km')
+    parser.add_argument('--backends', nargs='+', default=['grid', 'sqlite', 'scan'],
+                        choices=['grid', 'sqlite', 'scan'])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BLOOD BANK - NEAREST COMPATIBLE DONOR BENCHMARK")
+    print("=" * 60)
+    started = time.perf_counter()
+    donors = make_donors(args.donors)
+    queries = make_queries(args.queries)
+    print(f"\n▶ {args.donors:,} synthetic donors generated in {time.perf_counter() - started:.1f}s; "
+          f"k={args.k}, radius={args.radius:g} km, {args.queries} queries")
+
+    results = {}
+    if 'grid' in args.backends:
+        started = time.perf_counter()
+        grid = GeoGrid()
+        for donor in donors:
+            grid.add(donor['blood_group'], donor['latitude'], donor['longitude'], donor)
+        print(f"  grid index built in {time.perf_counter() - started:.2f}s")
+        results['grid (memory backend)'] = time_queries(grid.nearest, queries, args.k, args.radius)
+
+    if 'sqlite' in args.backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = create_storage('sqlite', os.path.join(tmp, 'bench.db'))
+            started = time.perf_counter()
+            conn = storage._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO users (id, name, email, password, blood_group, role, latitude, longitude) "
+                    "VALUES (:id, :name, :email, :password, :blood_group, :role, :latitude, :longitude)",
+                    donors)
+            print(f"  sqlite loaded in {time.perf_counter() - started:.2f}s")
+            results['sqlite (latitude index)'] = time_queries(storage.nearest_donors, queries,
+                                                              args.k, args.radius)
+            storage.close()
+
+    if 'scan' in args.backends:
+        # A full scan is slow: time a handful of queries only
+        results['full scan (baseline)'] = time_queries(full_scan(donors), queries[:5],
+                                                       args.k, args.radius)
+
+    print(f"\n  {'method':<26} {'median':>10} {'p95':>10}")
+    for label, (median, p95) in results.items():
+        print(f"  {label:<26} {median:>8.3f}ms {p95:>8.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
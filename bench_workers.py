@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Multi-Worker Load Test for the Blood Bank Flask Application
+Starts N prefork worker processes sharing one listening socket and one
+SQLite database (like `gunicorn -w N`), then measures request throughput
+"""
+
+import argparse
+import http.client
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+from werkzeug.security import generate_password_hash
+
+from blood_ai_engine import get_all_blood_groups
+
+
+def serve(sock_fd, db_path):
+    """Worker process: import the app against the shared SQLite file and serve"""
+    os.environ['BLOOD_STORAGE_BACKEND'] = 'sqlite'
+    os.environ['BLOOD_SQLITE_PATH'] = db_path
+    from werkzeug.serving import make_server
+    import app as blood_app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    blood_app.app.config['DEBUG'] = False
+    # Templates live next to app.py in this checkout rather than in templates/
+    blood_app.app.template_folder = os.path.dirname(os.path.abspath(__file__))
+    make_server('127.0.0.1', 0, blood_app.app, threaded=True, fd=sock_fd).serve_forever()
+
+
+def seed(db_path, request_count):
+    """Create donors, one requestor and a request history in the shared database"""
+    from blood_storage import create_storage
+    storage = create_storage('sqlite', sqlite_path=db_path)
+    # Cheap hash: this test measures routing/storage, not password hashing
+    password = generate_password_hash('secret', method='pbkdf2:sha256:1000')
+    groups = get_all_blood_groups()
+    for group in groups:
+        storage.add_user({'id': f'DONOR_{group}', 'name': f'Donor {group}',
+                          'email': f'donor{group}@load.test', 'password': password,
+                          'blood_group': group, 'role': 'donor'})
+    storage.add_user({'id': 'REQ_1', 'name': 'Hospital', 'email': 'hospital@load.test',
+                      'password': password, 'blood_group': 'A+', 'role': 'requestor'})
+    storage.add_requests([
+        {'id': f'REQ_{i:012d}', 'blood_group': groups[i % 8], 'units': 1,
+         'requestor_email': 'hospital@load.test', 'donor_email': None,
+         'status': 'Requested' if i % 50 == 0 else 'Cancelled',
+         'timestamp': '2026-01-01 00:00:00'}
+        for i in range(request_count)
+    ])
+    storage.close()
+
+
+def login_cookie(port, email, role):
+    """Log in over HTTP (through any worker) and return the session cookie"""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    body = f'email={email}&password=secret'
+    conn.request('POST', f'/login/{role}', body,
+                 {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader('Set-Cookie').split(';')[0]
+
+
+def client(port, cookie, path, duration, results):
+    """Load generator process: hammer one path for duration seconds"""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        conn.request('GET', path, headers={'Cookie': cookie})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path} returned {response.status}")
+        done += 1
+    conn.close()
+    results.put(done)
+
+
+def run(workers, clients, duration, db_path):
+    """Start workers, run the load and return requests/sec"""
+    # fork: workers inherit the listening socket, as in a prefork server
+    context = multiprocessing.get_context('fork')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(128)
+    sock.set_inheritable(True)
+    port = sock.getsockname()[1]
+
+    servers = []
+    for _ in range(workers):
+        process = context.Process(target=serve, args=(sock.fileno(), db_path), daemon=True)
+        process.start()
+        servers.append(process)
+    try:
+        cookie = None
+        for _ in range(100):
+            try:
+                cookie = login_cookie(port, 'donorO-@load.test', 'donor')
+                break
+            except (ConnectionError, AttributeError):
+                time.sleep(0.1)
+        if cookie is None:
+            raise RuntimeError("workers did not start")
+        results = context.Queue()
+        loaders = [context.Process(target=client, args=(port, cookie, path, duration, results))
+                   for path in (['/donors', '/dashboard'] * clients)[:clients]]
+        for loader in loaders:
+            loader.start()
+        total = sum(results.get(timeout=duration + 60) for _ in loaders)
+        for loader in loaders:
+            loader.join()
+        return total / duration
+    finally:
+        for process in servers:
+            process.terminate()
+            process.join()
+        sock.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-worker throughput test (SQLite backend).')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='worker counts to compare')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per run')
+    parser.add_argument('--requests', type=int, default=20_000, help='requests to seed')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BLOOD BANK APPLICATION - MULTI-WORKER LOAD TEST")
+    print("=" * 60)
+    print(f"CPUs: {os.cpu_count()}  clients: {args.clients}  duration: {args.duration}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'shared.db')
+        seed(db_path, args.requests)
+        baseline = None
+        for workers in args.workers:
+            rate = run(workers, args.clients, args.duration, db_path)
+            baseline = baseline or rate
+            print(f"  {workers} worker(s): {rate:9,.0f} req/s  ({rate / baseline:.2f}x)")
@@ -25,8 +25,17 @@ From a RECEIVER perspective (Requested blood group):
 This module provides a reusable function to:
 1. Take a requested blood group as input
 2. Return a list of compatible donor blood groups
+3. Answer donor/receiver compatibility with a precomputed bitmask lookup
+4. Filter large donor registries in bulk through a columnar DonorBatch
+5. Assign a whole pool of donors to many open requests at once
+6. Stream compatible donors from JSON Lines exports with flat memory use
 """
 
+import json
+import os
+from array import array
+from itertools import islice
+
 # Blood compatibility mapping
 # Key: Requested Blood Group (Receiver)
 # Value: List of compatible donor blood groups (that can donate to this receiver)
@@ -42,6 +51,58 @@ BLOOD_COMPATIBILITY_MAP = {
     'O-': ['O-'],  # Universal Donor
 }
 
+# Compact compatibility engine
+# Blood groups are interned as small integer codes (0-7). For every receiver
+# code, COMPATIBILITY_MASKS holds an 8-bit mask whose bit N is set when the
+# donor with code N can donate to that receiver. Together the masks form the
+# 8x8 compatibility matrix, so a compatibility check is a single bit test.
+# The masks are derived from BLOOD_COMPATIBILITY_MAP, which stays the single
+# source of truth for the medical rules.
+
+BLOOD_GROUPS = tuple(BLOOD_COMPATIBILITY_MAP)
+BLOOD_GROUP_CODES = {group: code for code, group in enumerate(BLOOD_GROUPS)}
+
+# Code used for missing/unknown blood groups; no mask ever has this bit set
+UNKNOWN_BLOOD_GROUP_CODE = len(BLOOD_GROUPS)
+
+COMPATIBILITY_MASKS = tuple(
+    sum(1 << BLOOD_GROUP_CODES[donor] for donor in BLOOD_COMPATIBILITY_MAP[receiver])
+    for receiver in BLOOD_GROUPS
+)
+
+
+def encode_blood_group(blood_group):
+    """
+    Convert a blood group string into its integer code.
+    
+    Args:
+        blood_group (str): Blood group such as 'A+' or 'O-'
+    
+    Returns:
+        int: Code in range 0-7, or UNKNOWN_BLOOD_GROUP_CODE for invalid input
+        
+    Example:
+        >>> encode_blood_group('A+')
+        0
+    """
+    return BLOOD_GROUP_CODES.get(blood_group, UNKNOWN_BLOOD_GROUP_CODE)
+
+
+def is_code_compatible(donor_code, requested_code):
+    """
+    Check donor/receiver compatibility using integer codes (single bit test).
+    
+    Args:
+        donor_code (int): Code of the donor blood group
+        requested_code (int): Code of the requested (receiver) blood group
+    
+    Returns:
+        bool: True if compatible, False otherwise (including unknown codes)
+    """
+    if requested_code >= UNKNOWN_BLOOD_GROUP_CODE:
+        return False
+    return (COMPATIBILITY_MASKS[requested_code] >> donor_code) & 1 == 1
+
 
 def get_compatible_donors(requested_blood_group):
     """
@@ -74,6 +135,32 @@ def get_compatible_donors(requested_blood_group):
     return BLOOD_COMPATIBILITY_MAP.get(requested_blood_group, [])
 
 
+# Reverse view of the compatibility map: donor group -> receiver groups
+DONOR_RECIPIENTS_MAP = {
+    donor: [receiver for receiver in BLOOD_GROUPS
+            if (COMPATIBILITY_MASKS[BLOOD_GROUP_CODES[receiver]] >> BLOOD_GROUP_CODES[donor]) & 1]
+    for donor in BLOOD_GROUPS
+}
+
+
+def get_compatible_recipients(donor_blood_group):
+    """
+    Determine which requested blood groups a donor can give to.
+    
+    Args:
+        donor_blood_group (str): The blood group of the donor
+    
+    Returns:
+        list: Receiver blood groups this donor is compatible with, or empty
+              list if invalid input
+        
+    Example:
+        >>> get_compatible_recipients('O+')
+        ['A+', 'B+', 'AB+', 'O+']
+    """
+    return DONOR_RECIPIENTS_MAP.get(donor_blood_group, [])
+
+
 def is_donor_compatible(donor_blood_group, requested_blood_group):
     """
     Check if a specific donor's blood group is compatible with a requested blood group.
@@ -92,8 +179,11 @@ def is_donor_compatible(donor_blood_group, requested_blood_group):
         >>> is_donor_compatible('B+', 'A+')
         False
     """
-    compatible_groups = get_compatible_donors(requested_blood_group)
-    return donor_blood_group in compatible_groups
+    requested_code = BLOOD_GROUP_CODES.get(requested_blood_group, UNKNOWN_BLOOD_GROUP_CODE)
+    if requested_code == UNKNOWN_BLOOD_GROUP_CODE:
+        return False
+    donor_code = BLOOD_GROUP_CODES.get(donor_blood_group, UNKNOWN_BLOOD_GROUP_CODE)
+    return (COMPATIBILITY_MASKS[requested_code] >> donor_code) & 1 == 1
 
 
 def filter_compatible_donors(donor_list, requested_blood_group):
@@ -122,13 +212,452 @@ def filter_compatible_donors(donor_list, requested_blood_group):
         compatible = filter_compatible_donors(donors, 'A+')
         # Returns [donor1, donor3] (O- and A+ are compatible with A+ receiver)
     """
-    compatible_groups = get_compatible_donors(requested_blood_group)
+    requested_code = BLOOD_GROUP_CODES.get(requested_blood_group, UNKNOWN_BLOOD_GROUP_CODE)
+    if requested_code == UNKNOWN_BLOOD_GROUP_CODE:
+        return []
+    mask = COMPATIBILITY_MASKS[requested_code]
+    codes = BLOOD_GROUP_CODES
     return [
         donor for donor in donor_list
-        if donor.get('blood_group') in compatible_groups
+        if (mask >> codes.get(donor.get('blood_group'), UNKNOWN_BLOOD_GROUP_CODE)) & 1
     ]
 
 
+def read_jsonl_chunks(path, chunk_size=1000):
+    """
+    Read a JSON Lines file in chunks of parsed records.
+    
+    Only one chunk is held in memory at a time, so memory use does not depend
+    on the size of the file. Blank lines are skipped.
+    
+    Args:
+        path (str): Path to a JSON Lines file (one JSON object per line)
+        chunk_size (int): Maximum number of records per chunk
+    
+    Yields:
+        list: Up to chunk_size parsed records
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be greater than 0")
+    with open(path, 'r', encoding='utf-8') as handle:
+        chunk = []
+        for line in handle:
+            if not line.strip():
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _iter_chunks(iterable, chunk_size):
+    """Split any iterable into lists of at most chunk_size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_compatible_donors(donors, requested_blood_group, chunk_size=1000):
+    """
+    Streaming version of filter_compatible_donors.
+    
+    AI FILTERING LOGIC:
+    - Reads donors chunk by chunk and yields compatible ones one at a time
+    - Each chunk goes through filter_compatible_donors, so the compatibility
+      rules are exactly the same as the in-memory path
+    
+    Args:
+        donors (iterable or str): Any iterable of donor dictionaries, or the
+                                  path to a JSON Lines donor export
+        requested_blood_group (str): The blood group that needs blood (receiver)
+        chunk_size (int): Number of donors processed per chunk
+    
+    Yields:
+        dict: Compatible donors, in input order
+        
+    Example:
+        for donor in stream_compatible_donors('donors.jsonl', 'A+'):
+            notify(donor['email'])
+    """
+    if isinstance(donors, (str, os.PathLike)):
+        chunks = read_jsonl_chunks(donors, chunk_size)
+    else:
+        chunks = _iter_chunks(donors, chunk_size)
+    for chunk in chunks:
+        yield from filter_compatible_donors(chunk, requested_blood_group)
+
+
+# Translation tables used by DonorBatch: for every receiver code, a 256-byte
+# table mapping a donor code byte to 1 (compatible) or 0 (not compatible).
+# bytes.translate() applies it to a whole column in C.
+_MASK_TABLES = tuple(
+    bytes((mask >> code) & 1 if code < UNKNOWN_BLOOD_GROUP_CODE else 0 for code in range(256))
+    for mask in COMPATIBILITY_MASKS
+)
+_EMPTY_TABLE = bytes(256)
+
+
+def _merge_rows(parts):
+    """Merge sorted row id arrays into one sorted array"""
+    if len(parts) == 1:
+        return parts[0]
+    # Each part is already sorted, so Timsort only merges the runs
+    merged = []
+    for rows in parts:
+        merged.extend(rows)
+    merged.sort()
+    return array('q', merged)
+
+
+class DonorBatch:
+    """
+    Columnar view of a donor registry for bulk compatibility filtering.
+    
+    The donor list is converted once into a bytes column of blood group codes
+    plus, per receiving blood group, an array of the row ids (positions in the
+    source list, offset by `start`) of its compatible donors. Every later
+    query runs over those columns at C speed instead of looping over donor
+    dictionaries in Python; compatible_rows() is a copy of a prebuilt array.
+    The row arrays cost about 27 bytes per donor (8 bytes per row id, and
+    with an even spread of groups each donor suits ~3.4 receiving groups).
+    
+    Example:
+        batch = DonorBatch.from_donors(donors)
+        rows = filter_compatible_donors_batch(batch, 'A+')
+        compatible = batch.take(rows)
+    """
+
+    def __init__(self, codes, donors=None, start=0):
+        if donors is not None and len(donors) != len(codes):
+            raise ValueError("codes and donors must have the same length")
+        self.codes = bytes(codes)
+        self.start = start
+        self.donors = donors
+        group_rows = [self._rows_with_code(code) for code in range(len(BLOOD_GROUPS))]
+        self._compatible_rows = tuple(
+            _merge_rows([rows for code, rows in enumerate(group_rows) if mask >> code & 1])
+            for mask in COMPATIBILITY_MASKS
+        )
+
+    def _rows_with_code(self, code):
+        """Row ids of every donor with a blood group code, found with bytes.find"""
+        find = self.codes.find
+        needle = bytes((code,))
+        rows = array('q')
+        append = rows.append
+        position = find(needle)
+        start = self.start
+        while position != -1:
+            append(start + position)
+            position = find(needle, position + 1)
+        return rows
+
+    @classmethod
+    def from_donors(cls, donor_list, start=0):
+        """
+        Build a batch from a list of donor dictionaries.
+        
+        Args:
+            donor_list (list): Donor dictionaries with a 'blood_group' key
+            start (int): Row id of the first donor (useful for shards)
+        
+        Returns:
+            DonorBatch: Columnar batch referencing the original donors
+        """
+        codes = BLOOD_GROUP_CODES
+        column = bytes(
+            codes.get(donor.get('blood_group'), UNKNOWN_BLOOD_GROUP_CODE)
+            for donor in donor_list
+        )
+        return cls(column, donors=donor_list, start=start)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def compatible_mask(self, requested_blood_group):
+        """
+        Boolean mask (bytes of 0/1) of donors compatible with a receiver.
+        
+        Args:
+            requested_blood_group (str): The blood group that needs blood
+        
+        Returns:
+            bytes: One byte per donor, 1 if compatible and 0 otherwise
+        """
+        code = BLOOD_GROUP_CODES.get(requested_blood_group)
+        table = _EMPTY_TABLE if code is None else _MASK_TABLES[code]
+        return self.codes.translate(table)
+
+    def compatible_rows(self, requested_blood_group):
+        """
+        Row ids of donors compatible with a receiver.
+        
+        Args:
+            requested_blood_group (str): The blood group that needs blood
+        
+        Returns:
+            array: Row ids (array of signed 64-bit ints) in source order
+        """
+        code = BLOOD_GROUP_CODES.get(requested_blood_group)
+        if code is None:
+            return array('q')
+        return self._compatible_rows[code][:]
+
+    def count_by_group(self):
+        """
+        Count donors per blood group.
+        
+        Returns:
+            dict: Blood group -> number of donors in the batch
+        """
+        return {group: self.codes.count(code) for code, group in enumerate(BLOOD_GROUPS)}
+
+    def take(self, row_ids):
+        """
+        Materialize donor dictionaries for row ids returned by a query.
+        
+        Args:
+            row_ids (iterable): Row ids from compatible_rows()
+        
+        Returns:
+            list: The matching donor dictionaries
+        """
+        if self.donors is None:
+            raise ValueError("DonorBatch was built without donor records")
+        start = self.start
+        donors = self.donors
+        return [donors[row_id - start] for row_id in row_ids]
+
+
+def filter_compatible_donors_batch(donors, requested_blood_groups, as_mask=False):
+    """
+    Bulk version of filter_compatible_donors for large registries.
+    
+    AI FILTERING LOGIC:
+    - Applies the same compatibility rules as filter_compatible_donors, but
+      over a DonorBatch column instead of a list of dictionaries
+    - One or many requested blood groups can be answered from a single batch
+    
+    Args:
+        donors (DonorBatch or list): A prepared batch, or a list of donor
+                                     dictionaries (converted once)
+        requested_blood_groups (str or iterable): One requested blood group,
+                                                  or several of them
+        as_mask (bool): Return boolean masks instead of row id arrays
+    
+    Returns:
+        For a single blood group: bytes mask or array of row ids.
+        For several blood groups: dict mapping each group to its result.
+        
+    Example:
+        batch = DonorBatch.from_donors(donors)
+        filter_compatible_donors_batch(batch, 'A+')
+        # array('q', [0, 2])
+        filter_compatible_donors_batch(batch, ['A+', 'O-'], as_mask=True)
+        # {'A+': b'\x01\x00\x01', 'O-': b'\x01\x00\x00'}
+    """
+    batch = donors if isinstance(donors, DonorBatch) else DonorBatch.from_donors(donors)
+    query = batch.compatible_mask if as_mask else batch.compatible_rows
+    
+    if isinstance(requested_blood_groups, str):
+        return query(requested_blood_groups)
+    return {group: query(group) for group in requested_blood_groups}
+
+
+# Number of receiver groups each donor code can serve. Used as the cost of a
+# cross-group match so that versatile donors (O- reaches all 8 groups) are
+# the last to be spent on receivers who could take someone else.
+_DONOR_REACH = tuple(
+    sum((mask >> code) & 1 for mask in COMPATIBILITY_MASKS)
+    for code in range(len(BLOOD_GROUPS))
+)
+
+
+def _plan_group_flows(supply, demand):
+    """
+    Min-cost max-flow between donor groups and receiver groups.
+    
+    The network has a source, 8 donor group nodes, 8 receiver group nodes and
+    a sink, so successive shortest paths (Bellman-Ford) converge in a handful
+    of iterations regardless of how many donors or requests there are.
+    
+    Args:
+        supply (list): Available donors per donor code
+        demand (list): Requested units per receiver code
+    
+    Returns:
+        list: 8x8 matrix, flows[donor_code][receiver_code] = units assigned
+    """
+    n_groups = len(BLOOD_GROUPS)
+    source, sink = 2 * n_groups, 2 * n_groups + 1
+    # Edge list: to, capacity, cost, index of reverse edge
+    graph = [[] for _ in range(2 * n_groups + 2)]
+
+    def add_edge(u, v, capacity, cost):
+        graph[u].append([v, capacity, cost, len(graph[v])])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    for code in range(n_groups):
+        if supply[code]:
+            add_edge(source, code, supply[code], 0)
+        if demand[code]:
+            add_edge(n_groups + code, sink, demand[code], 0)
+    for receiver in range(n_groups):
+        if not demand[receiver]:
+            continue
+        for donor in range(n_groups):
+            if supply[donor] and (COMPATIBILITY_MASKS[receiver] >> donor) & 1:
+                cost = 0 if donor == receiver else _DONOR_REACH[donor]
+                add_edge(donor, n_groups + receiver, supply[donor], cost)
+
+    while True:
+        # Bellman-Ford: residual edges may carry negative costs
+        dist = [None] * len(graph)
+        parent = [None] * len(graph)
+        dist[source] = 0
+        for _ in range(len(graph)):
+            updated = False
+            for u, edges in enumerate(graph):
+                if dist[u] is None:
+                    continue
+                for i, (v, capacity, cost, _) in enumerate(edges):
+                    if capacity > 0 and (dist[v] is None or dist[u] + cost < dist[v]):
+                        dist[v] = dist[u] + cost
+                        parent[v] = (u, i)
+                        updated = True
+            if not updated:
+                break
+        if dist[sink] is None:
+            break
+
+        # Find bottleneck capacity along the path, then push flow
+        pushed = None
+        v = sink
+        while v != source:
+            u, i = parent[v]
+            capacity = graph[u][i][1]
+            pushed = capacity if pushed is None else min(pushed, capacity)
+            v = u
+        v = sink
+        while v != source:
+            u, i = parent[v]
+            edge = graph[u][i]
+            edge[1] -= pushed
+            graph[v][edge[3]][1] += pushed
+            v = u
+
+    flows = [[0] * n_groups for _ in range(n_groups)]
+    for receiver in range(n_groups):
+        for v, capacity, _, _ in graph[n_groups + receiver]:
+            # Reverse edges back to donor nodes hold the pushed flow
+            if v < n_groups:
+                flows[v][receiver] = capacity
+    return flows
+
+
+def assign_donors_to_requests(open_requests, available_donors):
+    """
+    Assign a pool of available donors to many open requests at once.
+    
+    AI MATCHING LOGIC:
+    - Each donor gives one unit; each request needs request['units'] units
+    - Covers as many units as possible across all requests (maximum flow)
+    - Among maximum assignments, prefers exact blood group matches and spends
+      versatile donors (e.g. O-) only when no one else can cover the demand,
+      so scarce O- donors are saved for O- receivers
+    - Requests of the same blood group are filled in list order
+    
+    Args:
+        open_requests (list): Request dictionaries with 'id', 'blood_group'
+                              and 'units'
+        available_donors (list): Donor dictionaries with 'blood_group'
+    
+    Returns:
+        dict: {
+            'assignments': {request_id: [donor, ...]},
+            'units_requested': int,
+            'units_covered': int,
+            'exact_matches': int,
+            'unassigned_donors': [donor, ...]
+        }
+        
+    Example:
+        requests = [{'id': 'R1', 'blood_group': 'O-', 'units': 1},
+                    {'id': 'R2', 'blood_group': 'A+', 'units': 1}]
+        donors = [{'email': 'a@x.com', 'blood_group': 'O-'},
+                  {'email': 'b@x.com', 'blood_group': 'A+'}]
+        assign_donors_to_requests(requests, donors)['assignments']
+        # {'R1': [a@x.com donor], 'R2': [b@x.com donor]}
+    """
+    n_groups = len(BLOOD_GROUPS)
+    codes = BLOOD_GROUP_CODES
+
+    donor_pools = [[] for _ in range(n_groups)]
+    unassigned = []
+    for donor in available_donors:
+        code = codes.get(donor.get('blood_group'))
+        if code is None:
+            unassigned.append(donor)
+        else:
+            donor_pools[code].append(donor)
+
+    request_queues = [[] for _ in range(n_groups)]
+    demand = [0] * n_groups
+    for req in open_requests:
+        code = codes.get(req.get('blood_group'))
+        units = int(req.get('units') or 0)
+        if code is None or units <= 0:
+            continue
+        request_queues[code].append((req['id'], units))
+        demand[code] += units
+
+    flows = _plan_group_flows([len(pool) for pool in donor_pools], demand)
+
+    assignments = {req_id: [] for queue in request_queues for req_id, _ in queue}
+    pool_positions = [0] * n_groups
+    units_covered = 0
+    exact_matches = 0
+    for receiver in range(n_groups):
+        queue = request_queues[receiver]
+        if not queue:
+            continue
+        # Exact group first, then cheapest (least versatile) donor groups
+        donor_order = sorted(
+            (donor for donor in range(n_groups) if flows[donor][receiver]),
+            key=lambda donor: (donor != receiver, _DONOR_REACH[donor])
+        )
+        req_index, remaining = 0, queue[0][1]
+        for donor in donor_order:
+            count = flows[donor][receiver]
+            start = pool_positions[donor]
+            pool_positions[donor] = start + count
+            units_covered += count
+            if donor == receiver:
+                exact_matches += count
+            for donor_record in donor_pools[donor][start:start + count]:
+                while remaining == 0:
+                    req_index += 1
+                    remaining = queue[req_index][1]
+                assignments[queue[req_index][0]].append(donor_record)
+                remaining -= 1
+
+    for code in range(n_groups):
+        unassigned.extend(donor_pools[code][pool_positions[code]:])
+
+    return {
+        'assignments': assignments,
+        'units_requested': sum(demand),
+        'units_covered': units_covered,
+        'exact_matches': exact_matches,
+        'unassigned_donors': unassigned,
+    }
+
+
 def get_all_blood_groups():
     """
     Get a list of all valid blood groups.
@@ -0,0 +1,123 @@
+"""
+Page Data Cache
+===============
+
+Size-bounded LRU cache for the data behind the dashboard and donors pages.
+
+WHY:
+Donors keep refreshing /donors while they wait for a matching request, and
+each refresh rebuilds the same page of requests and counts. Caching the
+page data per (role, blood group, user, page) lets repeat views skip storage
+until something they show actually changes.
+
+INVALIDATION:
+Each entry is stored with a set of tags, e.g. ('donor_group', 'O-') for a
+donor's view of open requests. When a request for blood group G is created
+or confirmed, the app invalidates the tags of exactly the views that can
+show it (the donor groups compatible with G and the requestor's own views),
+and leaves every other entry warm.
+
+The cache is per process. With several worker processes sharing one SQLite
+database, other workers' writes don't reach this cache's invalidation, so
+the app also puts the storage change tag of the groups a view shows into
+its key: a write from any worker changes that tag, and the next view misses
+and rebuilds. max_age only bounds how long superseded entries linger before
+the LRU drops them.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache with tag-based invalidation and hit/miss counters.
+
+    Example:
+        cache = PageCache(max_entries=1000)
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.put(key, data, tags=[('donor_group', 'O-')])
+        cache.invalidate(('donor_group', 'O-'))
+    """
+
+    def __init__(self, max_entries=10_000, max_age=None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()   # key -> (value, tags, stored_at)
+        self._by_tag = {}               # tag -> set of keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.max_age is not None \
+                    and time.monotonic() - entry[2] > self.max_age:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, tags=()):
+        """Store value under key; any of its tags invalidates it later"""
+        if self.max_entries <= 0:
+            return
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, tags, time.monotonic())
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry stored with any of the given tags"""
+        with self._lock:
+            for tag in tags:
+                for key in self._by_tag.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
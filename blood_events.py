@@ -0,0 +1,142 @@
+"""
+Live Request Feed
+=================
+
+Pushes newly created blood requests to the donors who can answer them,
+as server-sent events (SSE) on the /events route.
+
+FAN-OUT:
+Subscribers are kept in one set per donor blood group. A new request for
+group G is delivered only to the sets of the donor groups the Blood
+Compatibility AI Engine allows to give to G (get_compatible_donors), so an
+O- request wakes O- donors only and never touches the other seven sets.
+
+IDLE CONNECTIONS:
+A subscription is a small deque plus an Event. Waiting donors sleep on the
+Event (with a heartbeat timeout) and cost no CPU until a compatible request
+arrives. Each open stream still holds a server thread or greenlet, so the
+feed is off unless EVENT_FEED_ENABLED is set, and it needs a threaded or
+async worker: `gunicorn -k gthread --threads N` for a few hundred streams,
+`gunicorn -k gevent` (which patches the threading primitives used here)
+for many thousands. gevent is not in requirements.txt; install it on the
+servers that enable the feed. Under the default sync worker each open
+/donors tab would occupy a whole worker until the worker timeout kills it.
+
+The feed is per process: requests created through another worker process
+are not pushed to this process's subscribers.
+"""
+
+import threading
+from collections import deque
+
+from blood_ai_engine import get_compatible_donors
+
+
+class FeedFullError(Exception):
+    """Raised when the feed already has its maximum number of subscribers"""
+
+
+class Subscription:
+    """One donor's connection to the feed"""
+
+    def __init__(self, donor_blood_group, backlog=100):
+        self.blood_group = donor_blood_group
+        # A client too slow to keep up loses its oldest events, not memory
+        self._events = deque(maxlen=backlog)
+        self._ready = threading.Event()
+
+    def push(self, event):
+        self._events.append(event)
+        self._ready.set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for events.
+
+        Returns:
+            list: Events received since the last call ([] on timeout)
+        """
+        if not self._events:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+
+class RequestFeed:
+    """
+    Publish/subscribe hub for new blood requests, keyed by donor blood group.
+
+    Args:
+        compatible_donors (callable): Donor groups that can give to a blood
+            group (default: the AI engine's get_compatible_donors; the app
+            passes its counted wrapper)
+
+    Example:
+        feed = RequestFeed()
+        subscription = feed.subscribe('O-')
+        feed.publish({'id': 'REQ_1', 'blood_group': 'A+', 'units': 2})
+        subscription.wait(timeout=15)   # [{'id': 'REQ_1', ...}]
+        feed.unsubscribe(subscription)
+    """
+
+    def __init__(self, max_subscribers=5000, backlog=100, compatible_donors=get_compatible_donors):
+        self.max_subscribers = max_subscribers
+        self.backlog = backlog
+        self.compatible_donors = compatible_donors
+        self._by_group = {}     # donor blood group -> set of subscriptions
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, donor_blood_group):
+        """
+        Register a donor's connection.
+
+        Raises:
+            FeedFullError: If max_subscribers connections are already open
+        """
+        subscription = Subscription(donor_blood_group, self.backlog)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise FeedFullError("Too many open event streams")
+            self._by_group.setdefault(donor_blood_group, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a connection (safe to call twice)"""
+        with self._lock:
+            subscribers = self._by_group.get(subscription.blood_group)
+            if subscribers is not None and subscription in subscribers:
+                subscribers.remove(subscription)
+                self._count -= 1
+
+    def publish(self, blood_request):
+        """
+        Deliver a new request to every subscriber whose blood group can donate to it.
+
+        Returns:
+            int: Number of subscriptions the request was pushed to
+        """
+        event = {key: blood_request[key] for key in ('id', 'blood_group', 'units', 'timestamp')}
+        with self._lock:
+            # Snapshot the relevant sets; the pushes happen outside the lock
+            targets = [subscription
+                       for group in self.compatible_donors(blood_request['blood_group'])
+                       for subscription in tuple(self._by_group.get(group, ()))]
+            self.published += 1
+            self.delivered += len(targets)
+        for subscription in targets:
+            subscription.push(event)
+        return len(targets)
+
+    def subscriber_count(self, donor_blood_group=None):
+        """Open subscriptions, overall or for one donor blood group"""
+        with self._lock:
+            if donor_blood_group is None:
+                return self._count
+            return len(self._by_group.get(donor_blood_group, ()))
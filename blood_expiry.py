@@ -0,0 +1,149 @@
+"""
+Request Expiry Scheduler
+========================
+
+Moves blood requests that nobody answered in time from 'Requested' to
+'Expired', so the active indexes only hold open demand.
+
+HOW IT WORKS:
+- Requests may carry an 'expires_at' timestamp ('%Y-%m-%d %H:%M:%S')
+- schedule() pushes (expiry time, request id) onto a min-heap: O(log n)
+- A background thread sleeps until the earliest expiry, pops every due
+  entry (O(log n) each) and calls `expire(request_id)`; nothing ever scans
+  all requests. The thread starts with the first schedule(), so creating a
+  scheduler (e.g. importing the app) starts no thread
+- Requests confirmed before they expire are not removed from the heap.
+  Their entry is discarded when it comes due: expire() only changes
+  requests that are still 'Requested' (a conditional update), so a late or
+  repeated expiry is harmless
+
+The heap is per process; the app rebuilds it from the storage's pending
+expiries when the process serves its first request. With several worker processes sharing a SQLite database each
+worker expires the requests it created or loaded; the conditional update
+keeps concurrent expiries of one request safe.
+"""
+
+import atexit
+import heapq
+import threading
+import time
+from datetime import datetime
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def expiry_time(expires_at):
+    """Epoch seconds of an 'expires_at' timestamp string (local time)"""
+    return datetime.strptime(expires_at, TIMESTAMP_FORMAT).timestamp()
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of request expiry times with a dispatcher thread.
+
+    Args:
+        expire (callable): Called with a request id once it is due
+
+    Example:
+        scheduler = ExpiryScheduler(storage.expire_request)
+        scheduler.schedule('REQ_1', '2026-05-01 12:00:00')
+        scheduler.pending()   # 1
+    """
+
+    def __init__(self, expire):
+        self.expire = expire
+        self._heap = []                # (epoch seconds, request id)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self.scheduled = 0
+        self.expired = 0
+        self.failed = 0
+        self._thread = None            # started by the first schedule()
+
+    def _start(self):
+        # Caller holds _lock
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name='request-expiry', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def schedule(self, request_id, expires_at):
+        """
+        Expire a request at a time.
+
+        Args:
+            request_id (str): Request to expire
+            expires_at (str): Timestamp ('%Y-%m-%d %H:%M:%S'); None is ignored
+        """
+        if not expires_at:
+            return
+        due = expiry_time(expires_at)
+        with self._lock:
+            heapq.heappush(self._heap, (due, request_id))
+            self.scheduled += 1
+            self._start()
+            # Only a new earliest expiry changes how long the thread sleeps
+            if self._heap[0][1] == request_id:
+                self._wakeup.notify()
+
+    def run_due(self, now=None):
+        """
+        Expire every request due by `now` (default: current time).
+
+        Returns:
+            int: Requests that expire() reported as expired
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+        expired = failed = 0
+        for request_id in due:
+            try:
+                expired += bool(self.expire(request_id))
+            except Exception:
+                # A storage error must not stop the other expiries (or the thread)
+                failed += 1
+        with self._lock:
+            self.expired += expired
+            self.failed += failed
+        return expired
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.time()):
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    self._wakeup.wait(timeout)
+                if self._closed:
+                    return
+            self.run_due()
+
+    def pending(self):
+        """Scheduled expiries not yet due (including already-confirmed requests)"""
+        with self._lock:
+            return len(self._heap)
+
+    def stats(self):
+        """Heap size, next expiry and counters"""
+        with self._lock:
+            return {
+                'pending': len(self._heap),
+                'next_expiry': (datetime.fromtimestamp(self._heap[0][0]).strftime(TIMESTAMP_FORMAT)
+                                if self._heap else None),
+                'scheduled': self.scheduled,
+                'expired': self.expired,
+                'failed': self.failed,
+            }
+
+    def close(self, timeout=5.0):
+        """Stop the dispatcher thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
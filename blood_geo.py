@@ -0,0 +1,191 @@
+"""
+Donor Location Index
+====================
+
+Finds the nearest compatible donors to a request with coordinates.
+
+HOW IT WORKS:
+- Locations are (latitude, longitude) in degrees; distances are great-circle
+  kilometres (haversine)
+- GeoGrid buckets points into cells of about `cell_km` x `cell_km`, one
+  set of cells per blood group, so a query only looks at the compatible
+  groups' buckets
+- nearest() visits the non-empty cells around the query point in order of
+  their distance lower bound and stops as soon as the next cell cannot
+  hold anything closer than the current k-th match (or lies beyond the
+  radius). Cost depends on the donors near the point, not on the total
+  number of donors.
+
+Example:
+    grid = GeoGrid()
+    grid.add('O-', 51.50, -0.12, donor)
+    grid.nearest(51.52, -0.10, ['O-', 'O+'], k=5, radius_km=25)
+    # [(2.6, donor)]
+"""
+
+import heapq
+import math
+import threading
+from itertools import count
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinates(latitude, longitude):
+    """
+    Validate optional coordinates from a form or JSON body.
+
+    Args:
+        latitude: Latitude in degrees (str/float) or empty/None
+        longitude: Longitude in degrees (str/float) or empty/None
+
+    Returns:
+        tuple: (latitude, longitude) as floats, or (None, None) if both are empty
+
+    Raises:
+        ValueError: If only one is given, either is not a number, or out of range
+    """
+    if latitude in (None, '') and longitude in (None, ''):
+        return None, None
+    if latitude in (None, '') or longitude in (None, ''):
+        raise ValueError("Both latitude and longitude are required")
+    latitude, longitude = float(latitude), float(longitude)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+    return latitude, longitude
+
+
+def latitude_band(latitude, radius_km):
+    """(min, max) latitude of all points within radius_km of a latitude"""
+    delta = radius_km / KM_PER_DEGREE
+    return max(-90.0, latitude - delta), min(90.0, latitude + delta)
+
+
+
+def longitude_reach(latitude, radius_km):
+    """
+    How many degrees of longitude, either side, points within radius_km of
+    a point at this latitude can differ by; None if the radius reaches a
+    pole and every longitude qualifies.
+    """
+    min_lat, max_lat = latitude_band(latitude, radius_km)
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 89.9:
+        return None
+    reach = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+    return reach if reach < 180 else None
+
+
+class GeoGrid:
+    """
+    Grid index of points, partitioned by key (blood group).
+
+    Thread-safe for concurrent add() and nearest().
+    """
+
+    def __init__(self, cell_km=10.0):
+        self.columns = max(1, round(360 / (cell_km / KM_PER_DEGREE)))
+        self.cell_deg = 360 / self.columns
+        self.rows = math.ceil(180 / self.cell_deg)
+        self._cells = {}        # key -> {(row, col): [(lat, lon, item), ...]}
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, lat, lon):
+        row = min(self.rows - 1, int((lat + 90) / self.cell_deg))
+        col = int((lon + 180) / self.cell_deg) % self.columns
+        return row, col
+
+    def add(self, key, lat, lon, item):
+        """Index a point under a key"""
+        with self._lock:
+            self._cells.setdefault(key, {}).setdefault(self._cell(lat, lon), []).append(
+                (lat, lon, item))
+            self._size += 1
+
+    def _lower_bound_km(self, lat, lon, row, col):
+        # Exact distance to the closest point of the cell. Outside the cell's
+        # longitudes that point lies on the nearer edge meridian, at the foot
+        # of the perpendicular great circle (clamped to the cell's latitudes)
+        lat0 = row * self.cell_deg - 90
+        lon0 = col * self.cell_deg - 180
+        offset = (lon - lon0) % 360
+        if offset <= self.cell_deg:
+            return haversine_km(lat, lon, min(max(lat, lat0), lat0 + self.cell_deg), lon)
+        if offset - self.cell_deg < 360 - offset:
+            edge, gap = lon0 + self.cell_deg, offset - self.cell_deg
+        else:
+            edge, gap = lon0, 360 - offset
+        if gap < 90:
+            foot = math.degrees(math.atan(math.tan(math.radians(lat)) / math.cos(math.radians(gap))))
+        else:
+            foot = math.copysign(90.0, lat)
+        near_lat = min(max(foot, lat0), lat0 + self.cell_deg)
+        # Tiny slack for floating-point rounding
+        return haversine_km(lat, lon, near_lat, edge) * (1 - 1e-9)
+
+    def _candidate_cells(self, lat, lon, groups, radius_km):
+        # Cells of the radius' bounding box, or every populated cell when
+        # that is fewer (very large radius or sparse data)
+        populated = sum(len(cells) for cells in groups)
+        min_lat, max_lat = latitude_band(lat, radius_km)
+        row0, row1 = self._cell(min_lat, 0)[0], self._cell(max_lat, 0)[0]
+        reach = longitude_reach(lat, radius_km)
+        span = self.columns if reach is None else math.ceil(reach / self.cell_deg) + 1
+        center = self._cell(lat, lon)[1]
+        if (row1 - row0 + 1) * min(self.columns, 2 * span + 1) > populated:
+            return {cell for cells in groups for cell in cells}
+        if 2 * span + 1 >= self.columns:
+            cols = range(self.columns)
+        else:
+            cols = [(center + offset) % self.columns for offset in range(-span, span + 1)]
+        return {(row, col) for row in range(row0, row1 + 1) for col in cols
+                if any((row, col) in cells for cells in groups)}
+
+    def nearest(self, lat, lon, keys, k=10, radius_km=50.0, accept=None):
+        """
+        The k nearest points within radius_km, over the given keys.
+
+        Args:
+            accept (callable): Optional filter; points whose item it rejects
+                               are skipped (e.g. donors still cooling down)
+
+        Returns:
+            list: (distance_km, item) pairs, nearest first
+        """
+        if k <= 0:
+            return []
+        with self._lock:
+            groups = [self._cells[key] for key in keys if key in self._cells]
+            if not groups:
+                return []
+            cells = sorted((self._lower_bound_km(lat, lon, row, col), (row, col))
+                           for row, col in self._candidate_cells(lat, lon, groups, radius_km))
+            best = []           # max-heap of the k best: (-distance, tie, item)
+            tie = count()
+            for bound, cell in cells:
+                if bound > radius_km or (len(best) == k and bound > -best[0][0]):
+                    break
+                for bucket in groups:
+                    for point_lat, point_lon, item in bucket.get(cell, ()):
+                        distance = haversine_km(lat, lon, point_lat, point_lon)
+                        if distance > radius_km or (accept is not None and not accept(item)):
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, next(tie), item))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, next(tie), item))
+        return [(-negative, item) for negative, _, item in sorted(best, reverse=True)]
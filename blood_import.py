@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+"""
+Bulk Donor Import
+=================
+
+Registers the donors of a partner blood bank from a CSV export, without
+going through the /register form one donor at a time.
+
+Usage:
+    python blood_import.py donors.csv --backend sqlite --sqlite-path blood_bank.db
+
+CSV COLUMNS (header row required):
+- name, email, blood_group: required
+- password: plaintext password, hashed here with the configured method
+  (or password_hash: an existing Werkzeug hash, stored as is)
+- latitude, longitude: optional location
+- last_donation: optional date (YYYY-MM-DD, not in the future); recorded
+  in donation_history, so the donation cooldown applies
+
+HOW IT WORKS:
+- The file is read as a stream and validated in chunks of `chunk_size`
+  rows; invalid rows are reported with their line number and skipped
+- Password hashing is CPU-bound, so each chunk's passwords are hashed in a
+  process pool (one process per CPU by default), split across the workers
+- While one chunk is being hashed the next one is read and validated; at
+  most two chunks are in flight, so memory stays bounded however large
+  the file is
+- Each hashed chunk is stored with storage.add_users() and
+  storage.add_donations(), one transaction each (SQLite) or one journal
+  entry each (journal backend); emails already registered are skipped
+
+Run the import against the backend the app uses (journal or sqlite). With
+the memory backend the donors only live as long as this process. SQLite
+can be imported into while the app runs. A journal can only be open in
+one process, so stop the app before importing into the journal backend
+(the import refuses to start while the app holds the journal's lock).
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from werkzeug.security import generate_password_hash
+
+from blood_ai_engine import get_all_blood_groups
+from blood_geo import parse_coordinates
+from blood_storage import JournalLockedError, create_storage
+
+BLOOD_GROUPS = frozenset(get_all_blood_groups())
+REQUIRED_COLUMNS = ('name', 'email', 'blood_group')
+
+
+def hash_passwords(method, passwords):
+    """Hash a list of passwords (runs in a pool process)"""
+    return [generate_password_hash(password, method=method) for password in passwords]
+
+
+def parse_donor(row):
+    """
+    Validate one CSV row.
+
+    Returns:
+        tuple: (donor dict without 'password', plaintext password or None,
+                last donation date or None)
+
+    Raises:
+        ValueError: With the reason the row is rejected
+    """
+    name = (row.get('name') or '').strip()
+    email = (row.get('email') or '').strip()
+    blood_group = (row.get('blood_group') or '').strip()
+    if not name or not email or not blood_group:
+        raise ValueError('name, email and blood_group are required')
+    if '@' not in email:
+        raise ValueError(f'invalid email: {email}')
+    if blood_group not in BLOOD_GROUPS:
+        raise ValueError(f'unknown blood group: {blood_group}')
+    try:
+        latitude, longitude = parse_coordinates((row.get('latitude') or '').strip(),
+                                                (row.get('longitude') or '').strip())
+    except ValueError:
+        raise ValueError('invalid latitude/longitude') from None
+    last_donation = (row.get('last_donation') or '').strip() or None
+    if last_donation:
+        try:
+            donated_on = datetime.strptime(last_donation, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f'invalid last_donation date: {last_donation}') from None
+        if donated_on > date.today():
+            raise ValueError(f'last_donation is in the future: {last_donation}')
+
+    donor = {
+        'id': f"DONOR_{uuid.uuid4().hex[:8].upper()}",
+        'name': name,
+        'email': email,
+        'blood_group': blood_group,
+        'role': 'donor',
+        'latitude': latitude,
+        'longitude': longitude,
+    }
+    pwhash = (row.get('password_hash') or '').strip()
+    if pwhash:
+        if pwhash.count('$') != 2:
+            raise ValueError('password_hash is not a Werkzeug password hash')
+        donor['password'] = pwhash
+        return donor, None, last_donation
+    password = row.get('password') or ''
+    if not password:
+        raise ValueError('password or password_hash is required')
+    return donor, password, last_donation
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unavailable (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def peak_memory_note():
+    """'; peak memory N MB' for reports, or '' where it cannot be measured"""
+    peak = peak_rss_mb()
+    return '' if peak is None else f'; peak memory {peak:.0f} MB'
+
+
+class DonorImporter:
+    """
+    Streams donors from CSV rows into a storage backend.
+
+    Example:
+        importer = DonorImporter(storage, 'pbkdf2:sha256:600000')
+        with open('donors.csv', newline='') as handle:
+            stats = importer.run(handle)
+        stats['imported'], stats['rows_per_sec']
+    """
+
+    def __init__(self, storage, hash_method='pbkdf2:sha256:600000', chunk_size=1000,
+                 workers=None, source='', on_error=None, on_progress=None):
+        self.storage = storage
+        self.hash_method = hash_method
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.source = source
+        self.on_error = on_error or (lambda line, message: None)
+        self.on_progress = on_progress or (lambda stats: None)
+        self.stats = {'rows': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0,
+                      'donations': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+
+    def run(self, lines):
+        """
+        Import every donor from an iterable of CSV lines (e.g. an open file).
+
+        Returns:
+            dict: rows, imported, duplicates, invalid, donations, seconds, rows_per_sec
+
+        Raises:
+            ValueError: If the header lacks a required column
+        """
+        reader = csv.DictReader(lines)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+
+        started = time.perf_counter()
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for chunk in self._chunks(reader):
+                in_flight.append(self._hash_chunk(pool, chunk))
+                # One chunk hashing while the next is read; store the older one
+                if len(in_flight) > 1:
+                    self._store(*in_flight.popleft())
+                    self._update_rate(started)
+            while in_flight:
+                self._store(*in_flight.popleft())
+        self._update_rate(started)
+        return self.stats
+
+    def _chunks(self, reader):
+        chunk = []
+        for row in reader:
+            self.stats['rows'] += 1
+            try:
+                chunk.append(parse_donor(row))
+            except ValueError as e:
+                self.stats['invalid'] += 1
+                self.on_error(reader.line_num, str(e))
+                continue
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _hash_chunk(self, pool, chunk):
+        # Split the chunk's plaintext passwords across the pool processes
+        plaintext = [n for n, (_, password, _) in enumerate(chunk) if password is not None]
+        per_worker = max(1, -(-len(plaintext) // self.workers))
+        slices = [plaintext[start:start + per_worker]
+                  for start in range(0, len(plaintext), per_worker)]
+        futures = [pool.submit(hash_passwords, self.hash_method,
+                               [chunk[n][1] for n in positions]) for positions in slices]
+        return chunk, slices, futures
+
+    def _store(self, chunk, slices, futures):
+        for positions, future in zip(slices, futures):
+            for n, pwhash in zip(positions, future.result()):
+                chunk[n][0]['password'] = pwhash
+        donors = [donor for donor, _, _ in chunk]
+        # Keyed by the donor's generated id, not the email: when an email
+        # repeats within a chunk only the row actually inserted gets a donation
+        added = {donor['id'] for donor in self.storage.add_users(donors)}
+        donations = [(donor['email'], {'request_id': 'IMPORTED',
+                                       'blood_group': donor['blood_group'],
+                                       'requestor_email': self.source,
+                                       'date_time': f'{last_donation} 00:00:00'})
+                     for donor, _, last_donation in chunk
+                     if last_donation and donor['id'] in added]
+        if donations:
+            self.storage.add_donations(donations)
+        self.stats['imported'] += len(added)
+        self.stats['duplicates'] += len(donors) - len(added)
+        self.stats['donations'] += len(donations)
+        self.on_progress(self.stats)
+
+    def _update_rate(self, started):
+        elapsed = time.perf_counter() - started
+        self.stats['seconds'] = elapsed
+        self.stats['rows_per_sec'] = self.stats['rows'] / elapsed if elapsed else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import donors from a CSV file.')
+    parser.add_argument('csv_path', help="CSV file ('-' for standard input)")
+    parser.add_argument('--backend', choices=['memory', 'journal', 'sqlite'],
+                        default=os.environ.get('BLOOD_STORAGE_BACKEND', 'sqlite'))
+    parser.add_argument('--sqlite-path', default=os.environ.get('BLOOD_SQLITE_PATH', 'blood_bank.db'))
+    parser.add_argument('--journal-dir', default=os.environ.get('BLOOD_JOURNAL_DIR', 'blood_journal'))
+    parser.add_argument('--hash-method',
+                        default=os.environ.get('BLOOD_PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'))
+    parser.add_argument('--workers', type=int, default=None, help='hashing processes (default: CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='rows per batch insert')
+    parser.add_argument('--source', default='', help='partner name stored with imported donations')
+    parser.add_argument('--max-errors-shown', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    try:
+        storage = create_storage(args.backend, sqlite_path=args.sqlite_path,
+                                 journal_dir=args.journal_dir)
+    except JournalLockedError as e:
+        print(f"{e}; stop the app before importing into the journal backend", file=sys.stderr)
+        return 2
+    shown = [0]
+
+    def report_error(line, message):
+        if shown[0] < args.max_errors_shown:
+            print(f"  line {line}: {message}", file=sys.stderr)
+        shown[0] += 1
+
+    last_report = [time.perf_counter()]
+
+    def report_progress(stats):
+        if time.perf_counter() - last_report[0] >= 5:
+            last_report[0] = time.perf_counter()
+            print(f"  {stats['rows']:,} rows read, {stats['imported']:,} imported", flush=True)
+
+    importer = DonorImporter(storage, args.hash_method, chunk_size=args.chunk_size,
+                             workers=args.workers, source=args.source,
+                             on_error=report_error, on_progress=report_progress)
+    try:
+        if args.csv_path == '-':
+            stats = importer.run(sys.stdin)
+        else:
+            with open(args.csv_path, newline='', encoding='utf-8') as handle:
+                stats = importer.run(handle)
+    finally:
+        storage.close()
+
+    print(f"Imported {stats['imported']:,} of {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/s): {stats['duplicates']:,} already registered, "
+          f"{stats['invalid']:,} invalid, {stats['donations']:,} donations recorded"
+          f"{peak_memory_note()}")
+    return 0 if stats['invalid'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
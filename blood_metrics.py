@@ -0,0 +1,141 @@
+"""
+Request Metrics
+===============
+
+In-process instrumentation exported in the Prometheus text format on the
+/metrics route.
+
+WHAT IS RECORDED:
+- Latency of every request, per (endpoint, method), in a histogram with
+  fixed buckets (Prometheus `histogram`: cumulative buckets, sum, count)
+- Requests per (endpoint, method, status) (a counter)
+- Named call counters, e.g. the Blood Compatibility AI Engine functions
+  (wrap a function with counted())
+- Gauges read when /metrics is scraped (queue depths, cache sizes, ...)
+
+COST:
+Recording a request is a bisect over the bucket bounds and a few integer
+increments under one lock (about a microsecond), so it can stay on in
+production. Nothing is formatted until /metrics is scraped.
+
+The numbers are per process; with several workers, scrape each worker (or
+sum them in Prometheus).
+"""
+
+import threading
+from bisect import bisect_left
+from functools import wraps
+
+# Seconds; the +Inf bucket is implicit
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Registry of request latency histograms, counters and gauges.
+
+    Example:
+        metrics = Metrics(prefix='blood')
+        metrics.observe_request('dashboard', 'GET', 200, 0.012)
+        lookup = metrics.counted('get_compatible_donors', get_compatible_donors)
+        metrics.gauge('queue_depth', 'Queued notifications', outbox.queue_depth)
+        print(metrics.render())
+    """
+
+    def __init__(self, prefix='blood', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._latency = {}      # (endpoint, method) -> [bucket counts..., +Inf count, sum]
+        self._requests = {}     # (endpoint, method, status) -> count
+        self._calls = {}        # function name -> count
+        self._gauges = []       # (name, help, callable)
+
+    def observe_request(self, endpoint, method, status, seconds):
+        """Record one request's latency and status"""
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._latency.get((endpoint, method))
+            if histogram is None:
+                histogram = self._latency[(endpoint, method)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[slot] += 1
+            histogram[-1] += seconds
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def count(self, name):
+        """Add one to a named call counter"""
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    def counted(self, name, func):
+        """
+        Wrap a function so each call adds one to the counter `name`. The
+        counter is exported (at 0) from the moment it is wrapped.
+        """
+        with self._lock:
+            self._calls.setdefault(name, 0)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            self.count(name)
+            return func(*args, **kwargs)
+        return wrapper
+
+    def calls(self, name):
+        """Current value of a call counter"""
+        with self._lock:
+            return self._calls.get(name, 0)
+
+    def gauge(self, name, help_text, read):
+        """Export read() as a gauge, evaluated on each render()"""
+        self._gauges.append((name, help_text, read))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            latency = {key: list(values) for key, values in self._latency.items()}
+            requests = dict(self._requests)
+            calls = dict(self._calls)
+
+        prefix = self.prefix
+        lines = [f'# HELP {prefix}_http_request_duration_seconds Request latency by endpoint',
+                 f'# TYPE {prefix}_http_request_duration_seconds histogram']
+        bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+        for (endpoint, method), values in sorted(latency.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, values[:-1]):
+                cumulative += bucket_count
+                lines.append(f'{prefix}_http_request_duration_seconds_bucket'
+                             f'{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f'{prefix}_http_request_duration_seconds_sum{labels} {_number(values[-1])}')
+            lines.append(f'{prefix}_http_request_duration_seconds_count{labels} {cumulative}')
+
+        lines += [f'# HELP {prefix}_http_requests_total Requests by endpoint and status',
+                  f'# TYPE {prefix}_http_requests_total counter']
+        for (endpoint, method, status), value in sorted(requests.items()):
+            lines.append(f'{prefix}_http_requests_total'
+                         f'{_labels(endpoint=endpoint, method=method, status=status)} {value}')
+
+        lines += [f'# HELP {prefix}_ai_engine_calls_total Blood Compatibility AI Engine calls',
+                  f'# TYPE {prefix}_ai_engine_calls_total counter']
+        for name, value in sorted(calls.items()):
+            lines.append(f'{prefix}_ai_engine_calls_total{_labels(function=name)} {value}')
+
+        for name, help_text, read in self._gauges:
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} gauge',
+                      f'{prefix}_{name} {_number(read())}']
+        return '\n'.join(lines) + '\n'
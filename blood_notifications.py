@@ -0,0 +1,323 @@
+"""
+Notification Outbox
+===================
+
+Sends notifications for request creation and confirmation without making
+the routes wait for the delivery channel.
+
+HOW IT WORKS:
+- Routes call outbox.enqueue(); it appends to an in-memory queue and
+  returns at once, however slow or broken the transport is
+- A background dispatcher thread takes up to `batch_size` queued
+  notifications at a time and hands them to the transport as one batch.
+  It starts with the first enqueue(), so an unused outbox (e.g. the app's
+  when merely imported) runs no thread
+- A failed notification is retried with exponential backoff
+  (base_backoff, 2x, 4x, ...) until max_attempts, then counted as dead
+- stats() reports queue depth, delivery/failure counters and delivery
+  latency (enqueue to successful send)
+
+TRANSPORTS (pluggable; anything with send(batch) -> failed notifications):
+- LogTransport: appends JSON lines to a local file (default)
+- StubTransport: keeps sent notifications in memory, for tests and load
+  tests (can add delay and fail on purpose)
+- SNSTransport: publishes to an Amazon SNS topic with PublishBatch
+  (needs boto3, imported only when this transport is created)
+
+The queue lives in process memory: notifications still queued when the
+process is killed are lost. close() (also run at exit) waits a bounded
+time for the queue to drain.
+"""
+
+import atexit
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+# ============================
+# TRANSPORTS
+# ============================
+
+class LogTransport:
+    """Append notifications to a JSON Lines file"""
+
+    def __init__(self, path='blood_notifications.log'):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, batch):
+        lines = ''.join(json.dumps(notification) + '\n' for notification in batch)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as log:
+            log.write(lines)
+        return []
+
+
+class StubTransport:
+    """
+    Keep notifications in memory instead of sending them.
+
+    Args:
+        delay (float): Seconds each batch takes, to simulate a slow channel
+        fail_times (int): Fail this many batches before succeeding
+    """
+
+    def __init__(self, delay=0.0, fail_times=0):
+        self.delay = delay
+        self.fail_times = fail_times
+        self.sent = []
+        self.batches = 0
+
+    def send(self, batch):
+        if self.delay:
+            time.sleep(self.delay)
+        self.batches += 1
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("Stub transport failure")
+        self.sent.extend(batch)
+        return []
+
+
+class SNSTransport:
+    """
+    Publish notifications to an SNS topic, up to 10 per PublishBatch call.
+
+    Entries SNS rejects are returned as failed, so only they are retried.
+    A call that raises fails only its own chunk of 10; chunks already
+    published are not sent again.
+
+    topic_arn and client may also be zero-argument callables, resolved on
+    every send(), for apps that configure (or tests that replace) them
+    after the transport is created.
+    """
+
+    BATCH_LIMIT = 10
+
+    def __init__(self, topic_arn, region_name='us-east-1', client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('sns', region_name=region_name)
+        self.topic_arn = topic_arn
+        self.client = client
+
+    def send(self, batch):
+        topic_arn = self.topic_arn() if callable(self.topic_arn) else self.topic_arn
+        client = self.client() if callable(self.client) else self.client
+        failed = []
+        for start in range(0, len(batch), self.BATCH_LIMIT):
+            chunk = batch[start:start + self.BATCH_LIMIT]
+            try:
+                response = client.publish_batch(
+                    TopicArn=topic_arn,
+                    PublishBatchRequestEntries=[
+                        {'Id': str(n), 'Subject': notification['subject'][:100],
+                         'Message': notification['message']}
+                        for n, notification in enumerate(chunk)
+                    ])
+            except Exception:
+                logger.exception("SNS PublishBatch failed for %d notifications", len(chunk))
+                failed.extend(chunk)
+                continue
+            failed.extend(chunk[int(entry['Id'])] for entry in response.get('Failed', ()))
+        return failed
+
+
+# ============================
+# OUTBOX
+# ============================
+
+def _percentile_ms(sorted_seconds, fraction):
+    if not sorted_seconds:
+        return 0.0
+    return sorted_seconds[min(len(sorted_seconds) - 1, int(fraction * len(sorted_seconds)))] * 1000
+
+
+class NotificationOutbox:
+    """
+    Queue of outgoing notifications with a batching, retrying dispatcher.
+
+    Example:
+        outbox = NotificationOutbox(LogTransport('notifications.log'))
+        outbox.enqueue('request_created', 'New blood request', 'A+ needed')
+        outbox.stats()['queue_depth']
+    """
+
+    def __init__(self, transport, batch_size=50, max_attempts=5, base_backoff=0.5,
+                 max_queue=10_000):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._ready = deque()          # (enqueued at, attempt, notification), oldest first
+        self._retry = []               # heap of (due time, tie-breaker, queued entry)
+        self._tiebreak = itertools.count()
+        self._sending = 0              # size of the batch being sent
+        self._closed = False
+        self._latencies = deque(maxlen=1000)
+        self.enqueued = 0
+        self.delivered = 0
+        self.retries = 0
+        self.dead = 0
+        self.dropped = 0
+        self._dispatcher = None        # started by the first enqueue()
+
+    def enqueue(self, kind, subject, message, **fields):
+        """
+        Queue a notification and return immediately.
+
+        Args:
+            kind (str): Event type, e.g. 'request_created'
+            subject (str): Short subject line
+            message (str): Notification text
+            **fields: Extra JSON-serializable data (request id, recipient, ...)
+
+        Returns:
+            bool: False if the queue was full and the notification was dropped
+        """
+        notification = dict(fields, kind=kind, subject=subject, message=message,
+                            created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        with self._lock:
+            if self._closed or len(self._ready) + len(self._retry) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._ready.append((time.monotonic(), 1, notification))
+            self.enqueued += 1
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                                    name='notify-dispatcher', daemon=True)
+                self._dispatcher.start()
+                atexit.register(self.close)
+            # notify_all: flush() may be waiting on the same condition
+            self._wakeup.notify_all()
+        return True
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                batch = self._next_batch()
+                while not batch:
+                    if self._closed:
+                        return
+                    timeout = self._retry[0][0] - time.monotonic() if self._retry else None
+                    self._wakeup.wait(timeout)
+                    batch = self._next_batch()
+                self._sending = len(batch)
+            self._send(batch)
+
+    def _next_batch(self):
+        # Caller holds _lock: move due retries back in line, then take a batch
+        now = time.monotonic()
+        while self._retry and self._retry[0][0] <= now:
+            self._ready.append(heapq.heappop(self._retry)[2])
+        batch = []
+        while self._ready and len(batch) < self.batch_size:
+            batch.append(self._ready.popleft())
+        return batch
+
+    def _send(self, batch):
+        try:
+            failed_ids = {id(n) for n in self.transport.send([n for _, _, n in batch])}
+        except Exception:
+            logger.exception("Notification transport failed; %d notifications will be retried",
+                             len(batch))
+            failed_ids = {id(n) for _, _, n in batch}
+        now = time.monotonic()
+        with self._lock:
+            self._sending = 0
+            for enqueued_at, attempt, notification in batch:
+                if id(notification) not in failed_ids:
+                    self.delivered += 1
+                    self._latencies.append(now - enqueued_at)
+                elif attempt >= self.max_attempts:
+                    self.dead += 1
+                else:
+                    self.retries += 1
+                    due = now + self.base_backoff * 2 ** (attempt - 1)
+                    heapq.heappush(self._retry, (due, next(self._tiebreak),
+                                                 (enqueued_at, attempt + 1, notification)))
+            self._wakeup.notify_all()
+
+    def queue_depth(self):
+        """Notifications waiting to be sent, being sent or waiting to retry"""
+        with self._lock:
+            return len(self._ready) + len(self._retry) + self._sending
+
+    def stats(self):
+        """Queue depth, counters and delivery latency (ms) of recent notifications"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            depth = len(self._ready) + len(self._retry) + self._sending
+            counters = {
+                'queue_depth': depth,
+                'retry_queue': len(self._retry),
+                'enqueued': self.enqueued,
+                'delivered': self.delivered,
+                'retries': self.retries,
+                'dead': self.dead,
+                'dropped': self.dropped,
+            }
+        counters.update(latency_p50_ms=_percentile_ms(latencies, 0.5),
+                        latency_p95_ms=_percentile_ms(latencies, 0.95),
+                        latency_max_ms=_percentile_ms(latencies, 1.0))
+        return counters
+
+    def flush(self, timeout=5.0):
+        """
+        Wait until every queued notification is delivered or dead.
+
+        Returns:
+            bool: True if the queue drained before the timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._ready or self._retry or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._wakeup.wait(remaining)
+            return True
+
+    def close(self, timeout=5.0):
+        """Drain the queue (up to timeout) and stop the dispatcher"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+
+
+def create_transport(name='log', log_path='blood_notifications.log', sns_topic_arn=None,
+                     region_name='us-east-1'):
+    """
+    Create a notification transport by name.
+
+    Args:
+        name (str): 'log', 'stub' or 'sns'
+        log_path (str): File used by the log transport
+        sns_topic_arn (str): Topic used by the SNS transport
+        region_name (str): AWS region of the SNS topic
+    """
+    if name == 'log':
+        return LogTransport(log_path)
+    if name == 'stub':
+        return StubTransport()
+    if name == 'sns':
+        if not sns_topic_arn:
+            raise ValueError("The SNS transport needs a topic ARN")
+        return SNSTransport(sns_topic_arn, region_name=region_name)
+    raise ValueError(f"Unknown notification transport: {name}")
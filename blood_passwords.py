@@ -0,0 +1,82 @@
+"""
+Password Hashing Service
+========================
+
+Runs Werkzeug password hashing and verification in a bounded worker pool.
+
+WHY A POOL:
+- Password hashes are deliberately CPU-expensive. Run on the request thread,
+  a burst of logins (e.g. a hospital shift change) keeps every server thread
+  busy hashing, and all other routes wait behind them.
+- hashlib's PBKDF2 and scrypt release the GIL, so a small thread pool hashes
+  in parallel while capping how many CPUs hashing can use at once.
+- At most `max_pending` hashes may be queued or running. Beyond that,
+  callers get HasherBusyError right away instead of queuing forever.
+
+COST UPGRADES:
+The hash method and cost come from configuration (e.g. 'pbkdf2:sha256:600000'
+or 'scrypt:32768:8:1'). needs_rehash() reports hashes made with any other
+setting, so the login route can upgrade them transparently after a
+successful login. The canonical method prefix it compares against is learnt
+from one hash at the configured cost, made on first use rather than when
+the hasher is created (the app creates one at import).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusyError(Exception):
+    """Raised when too many password hashes are already queued"""
+
+
+class PasswordHasher:
+    """
+    Configurable password hasher backed by a bounded thread pool.
+    
+    Example:
+        hasher = PasswordHasher('pbkdf2:sha256:600000', workers=4)
+        pwhash = hasher.hash('secret')
+        hasher.verify(pwhash, 'secret')   # True
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=4, max_pending=64):
+        self.method = method
+        self._prefix = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    @property
+    def prefix(self):
+        """Method prefix of new hashes, e.g. 'pbkdf2:sha256:600000'"""
+        if self._prefix is None:
+            # Werkzeug fills in default costs (e.g. 'pbkdf2:sha256' becomes
+            # 'pbkdf2:sha256:600000'); hash once to learn the canonical prefix
+            self._prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+        return self._prefix
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError("Too many password hashes in progress")
+        try:
+            return self._pool.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured method (in the pool)"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash (in the pool)"""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if pwhash was made with a different method or cost"""
+        return pwhash.split('$', 1)[0] != self.prefix
+
+    def close(self):
+        """Stop the worker pool"""
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,165 @@
+"""
+Request Profiler
+================
+
+Opt-in cProfile hook for finding where slow requests spend their time.
+Off by default; turn it on with BLOOD_PROFILE_SAMPLE_RATE and/or
+BLOOD_PROFILE_SLOW_MS.
+
+WHAT IS KEPT:
+- A sampled fraction of requests (sample_rate, 0.0 - 1.0)
+- Every request slower than slow_ms milliseconds
+- Profiles are aggregated per endpoint into <directory>/<endpoint>.prof
+  (pstats format). Read one with `python -m pstats dashboard.prof` or any
+  pstats viewer
+- A file is rotated to <endpoint>.prof.1 (.2, ... up to `backups`) once it
+  reaches max_bytes, and a fresh aggregate is started
+
+COST:
+- Disabled: the app does not create a profiler, and its request hooks
+  return after one `is None` check
+- A request's latency is only known when it ends, so with slow_ms set every
+  request runs under cProfile (typically 1.5-2x slower in Python-heavy
+  code) and only the slow ones are kept. Use it while diagnosing, not
+  permanently. With sample_rate alone only the sampled requests pay
+- cProfile hooks the interpreter, so one request is profiled at a time;
+  requests that start while another is being profiled are not profiled
+- Writing an aggregate takes a lock and rewrites one file, on kept
+  requests only
+"""
+
+import cProfile
+import os
+import pstats
+import random
+import re
+import threading
+
+
+def _file_name(endpoint):
+    """Endpoint name made safe for a file name"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint) + '.prof'
+
+
+class RequestProfiler:
+    """
+    Samples requests with cProfile and aggregates the stats per endpoint.
+
+    Example:
+        profiler = RequestProfiler('blood_profiles', sample_rate=0.01, slow_ms=500)
+        token = profiler.start()              # before the request
+        ...
+        profiler.finish(token, 'dashboard', elapsed_seconds)
+    """
+
+    def __init__(self, directory, sample_rate=0.0, slow_ms=0, max_bytes=5_000_000, backups=3,
+                 rng=random.random):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.rng = rng
+        self._active = threading.Lock()   # held while a request is profiled
+        self._lock = threading.Lock()     # guards the aggregates and counters
+        self._aggregates = {}             # endpoint -> pstats.Stats
+        self.profiled = 0
+        self.kept = 0
+        self.busy = 0
+        self.rotations = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        """
+        Start profiling the current request if it is sampled (or slow_ms is set).
+
+        Returns:
+            tuple or None: Token for finish(), or None if not profiled
+        """
+        sampled = self.sample_rate > 0 and self.rng() < self.sample_rate
+        if not sampled and not self.slow_ms:
+            return None
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self.busy += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) already owns the interpreter hook
+            self._active.release()
+            return None
+        return profile, sampled
+
+    def finish(self, token, endpoint, seconds):
+        """
+        Stop profiling and keep the profile if sampled or slower than slow_ms.
+
+        Args:
+            token: Value returned by start() (None is ignored)
+            endpoint (str): Aggregate to add the profile to
+            seconds (float): Request latency
+
+        Returns:
+            bool: True if the profile was kept
+        """
+        if token is None:
+            return False
+        profile, sampled = token
+        profile.disable()
+        self._active.release()
+        keep = sampled or (self.slow_ms and seconds * 1000 >= self.slow_ms)
+        with self._lock:
+            self.profiled += 1
+            if not keep:
+                return False
+            self.kept += 1
+            self._add(endpoint, profile)
+        return True
+
+    def _add(self, endpoint, profile):
+        path = os.path.join(self.directory, _file_name(endpoint))
+        stats = self._aggregates.get(endpoint)
+        if stats is None:
+            stats = pstats.Stats(profile)
+            # Continue an aggregate left by an earlier run
+            if os.path.exists(path):
+                try:
+                    stats.add(path)
+                except (OSError, TypeError, ValueError, EOFError):
+                    pass
+            self._aggregates[endpoint] = stats
+        else:
+            stats.add(profile)
+
+        temp_path = path + '.tmp'
+        stats.dump_stats(temp_path)
+        os.replace(temp_path, path)
+        if os.path.getsize(path) >= self.max_bytes:
+            self._rotate(path)
+            del self._aggregates[endpoint]
+
+    def _rotate(self, path):
+        self.rotations += 1
+        if self.backups < 1:
+            os.remove(path)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{path}.{n}'):
+                os.replace(f'{path}.{n}', f'{path}.{n + 1}')
+        os.replace(path, f'{path}.1')
+
+    def stats(self):
+        """Settings and counters"""
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'sample_rate': self.sample_rate,
+                'slow_ms': self.slow_ms,
+                'profiled': self.profiled,
+                'kept': self.kept,
+                'busy': self.busy,
+                'rotations': self.rotations,
+                'endpoints': sorted(self._aggregates),
+            }
@@ -0,0 +1,1506 @@
+"""
+Blood Bank Storage Backends
+===========================
+
+Pluggable storage for users, blood requests and donation history.
+
+BACKENDS:
+- MemoryStorage: In-process dictionaries with secondary indexes (default,
+  used by the tests)
+- JournaledMemoryStorage: MemoryStorage plus an append-only JSON Lines
+  journal and periodic snapshots, rebuilt on startup
+- SQLiteStorage: Persistent SQLite database in WAL mode with indexes that
+  match the route access patterns
+
+All backends expose the same methods, so app.py only talks to a `storage`
+object created by create_storage() from the app configuration.
+
+SHARING STATE BETWEEN WORKER PROCESSES:
+MemoryStorage and JournaledMemoryStorage are process-local: every worker
+would see its own users and requests. To run several workers (e.g.
+`gunicorn -w 4 app:app`) on one host, use the SQLite backend with a shared
+database file. Its consistency model:
+- Every write is its own transaction and commits before the route returns;
+  writers are serialized by SQLite's database lock
+- Each read statement sees a consistent snapshot that includes every
+  committed write, from any process (read-your-writes across workers)
+- claim_request() and expire_request() are conditional UPDATEs, so
+  concurrent accepts (or an accept racing an expiry) in different
+  processes still have exactly one winner
+- Login sessions are signed cookies, so any worker can serve any user
+
+DONOR LOCATIONS:
+Donors and requests may carry optional 'latitude'/'longitude' (degrees).
+nearest_donors() answers "k nearest donors of these blood groups within R
+km": MemoryStorage from a per-blood-group grid (blood_geo.GeoGrid),
+SQLiteStorage from a (role, blood_group, latitude, longitude) index read
+over a bounding box that widens until k donors are found.
+
+DONATION COOLDOWN:
+A donor who has just given blood must wait `donation_cooldown_days`
+(default 56) before donating again. add_donation() records the donor's
+next eligible date, and the donor lookups (donors_for_groups,
+count_donors, nearest_donors) take an `eligible_on` date that leaves out
+donors still cooling down: MemoryStorage keeps cooling donors in separate
+buckets released by day (DonorIndex), SQLiteStorage filters on an indexed
+users.next_eligible column.
+
+REQUEST EXPIRY:
+Requests may carry an optional 'expires_at' timestamp. expire_request()
+moves a request that is still 'Requested' to 'Expired' (out of the active
+indexes); blood_expiry.ExpiryScheduler calls it when the time comes, and
+pending_expiries() lists what it must schedule when the app starts serving.
+
+REQUEST ACCESS PATTERNS (served from indexes in both backends):
+- by id                           -> donate_blood
+- by requestor_email              -> requestor dashboard
+- by donor_email                  -> donor dashboard
+- by (status, blood_group)        -> /donors, donor dashboard counts
+
+CHANGE TAGS:
+Every backend keeps a change counter per blood group, bumped after each
+write that touches the group (a request created or changing status, a
+donation recorded, a donor registered). change_tag(groups) combines the
+counters of some groups into a short string, so routes can build an ETag
+without reading any requests. The tag also carries a random storage epoch,
+so counters restarting from zero (in-memory backends) never repeat a tag.
+"""
+
+import atexit
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import count, islice
+
+from blood_geo import GeoGrid, haversine_km, latitude_band, longitude_reach
+
+
+DONATION_COOLDOWN_DAYS = 56
+
+
+def _next_eligible(date_time, cooldown_days):
+    # ISO date a donor may donate again after a donation at date_time
+    donated = datetime.strptime(date_time[:10], '%Y-%m-%d')
+    return (donated + timedelta(days=cooldown_days)).strftime('%Y-%m-%d')
+
+
+def _day(value):
+    # Date ordinal of a date or ISO date string (None passes through)
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').toordinal()
+    return value.toordinal()
+
+
+# ============================
+# IN-MEMORY BACKEND
+# ============================
+
+class RequestStore:
+    """
+    In-memory store for blood requests with secondary indexes.
+    
+    Every lookup used by the routes is served from an index, so it costs
+    O(result size) instead of O(all requests ever created):
+    - by id
+    - by requestor_email
+    - by donor_email
+    - by (status, blood_group)
+    
+    The requestor and (status, blood_group) indexes are ordered lists of
+    creation sequence numbers, so a keyset page ("the next N requests after
+    cursor") is a binary search plus O(page size) work per index list.
+    
+    Indexes are maintained by add(), update_status() and claim(); request
+    dictionaries must not have their 'status' or 'donor_email' changed
+    directly. Status changes are serialized per request by a striped set
+    of locks keyed by request id: a claim's status check and update hold
+    only the request's stripe, so claims on requests in other stripes run
+    in parallel. The store lock is taken only for the index move itself
+    (and by readers), a few list operations long. Counts per status are
+    kept alongside the indexes under the store lock, so count() is
+    O(number of blood groups asked for) and stays exact under concurrent
+    updates.
+    
+    Moving a request between (status, blood_group) lists is a binary search
+    plus a list insert/delete, which shifts the entries behind it: O(n) in
+    the list's length (about 0.5 ms for a million entries, far less for
+    typical groups). Claims delete from the 'Requested' lists, which only
+    hold open demand (bounded by request expiry), and mostly insert near
+    the end of the 'Confirmed' lists, since recent requests are the ones
+    being confirmed.
+    """
+
+    def __init__(self, lock_stripes=64):
+        self._lock = threading.RLock()      # indexes and counters
+        self._stripes = [threading.Lock() for _ in range(lock_stripes)]
+        self.requests = []           # All requests, in creation order
+        self._by_id = {}
+        self._seq = {}               # request id -> creation sequence number (index in requests)
+        self._by_requestor = {}      # requestor_email -> [seq, ...] (sorted)
+        self._by_donor = {}          # donor_email -> {request id: request}
+        self._by_status_group = {}   # (status, blood_group) -> [seq, ...] (sorted)
+        self._status_totals = {}     # status -> number of requests
+
+    def __len__(self):
+        return len(self.requests)
+
+    def add(self, blood_request):
+        """Insert a new request and index it"""
+        with self._lock:
+            request_id = blood_request['id']
+            if request_id in self._by_id:
+                raise ValueError(f"Duplicate request id: {request_id}")
+            seq = len(self.requests)
+            self._seq[request_id] = seq
+            self.requests.append(blood_request)
+            self._by_id[request_id] = blood_request
+            self._by_requestor.setdefault(blood_request['requestor_email'], []).append(seq)
+            self._index_status(blood_request)
+        return blood_request
+
+    def add_many(self, blood_requests):
+        """Insert several new requests atomically (all or nothing)"""
+        with self._lock:
+            ids = [r['id'] for r in blood_requests]
+            if len(set(ids)) != len(ids) or any(i in self._by_id for i in ids):
+                raise ValueError("Duplicate request id in batch")
+            for blood_request in blood_requests:
+                self.add(blood_request)
+        return blood_requests
+
+    def get(self, request_id):
+        """Get a request by id, or None"""
+        return self._by_id.get(request_id)
+
+    def by_requestor(self, requestor_email):
+        """All requests created by a requestor, in creation order"""
+        with self._lock:
+            requests = self.requests
+            return [requests[seq] for seq in self._by_requestor.get(requestor_email, ())]
+
+    def page_by_requestor(self, requestor_email, after=None, limit=20):
+        """
+        One keyset page of a requestor's requests, in creation order.
+        
+        Args:
+            requestor_email (str): Requestor whose requests to list
+            after (int): Cursor returned by the previous page (None = first)
+            limit (int): Page size
+        
+        Returns:
+            tuple: (list of requests, cursor of the next page or None)
+        """
+        with self._lock:
+            seqs = self._by_requestor.get(requestor_email, [])
+            start = 0 if after is None else bisect_right(seqs, after)
+            return self._page(seqs[start:start + limit + 1], limit)
+
+    def by_donor(self, donor_email, status=None):
+        """Requests taken by a donor, optionally limited to one status"""
+        with self._lock:
+            matches = [r for r in self._by_donor.get(donor_email, {}).values()
+                       if status is None or r['status'] == status]
+        return self._in_creation_order(matches)
+
+    def with_status(self, status, blood_groups=None):
+        """
+        Requests with a given status, optionally limited to some blood groups.
+        
+        Args:
+            status (str): Request status, e.g. 'Requested'
+            blood_groups (iterable): Requested blood groups to include
+                                     (default: all)
+        
+        Returns:
+            list: Matching requests in creation order
+        """
+        with self._lock:
+            requests = self.requests
+            return [requests[seq] for seq in heapq.merge(*self._status_buckets(status, blood_groups))]
+
+    def page_with_status(self, status, blood_groups=None, after=None, limit=20):
+        """
+        One keyset page of requests with a status, in creation order.
+        
+        Each (status, blood_group) index list is binary-searched for the
+        cursor and contributes at most limit + 1 entries, which are merged.
+        
+        Args:
+            status (str): Request status, e.g. 'Requested'
+            blood_groups (iterable): Requested blood groups to include
+                                     (default: all)
+            after (int): Cursor returned by the previous page (None = first)
+            limit (int): Page size
+        
+        Returns:
+            tuple: (list of requests, cursor of the next page or None)
+        """
+        with self._lock:
+            slices = []
+            for seqs in self._status_buckets(status, blood_groups):
+                start = 0 if after is None else bisect_right(seqs, after)
+                slices.append(seqs[start:start + limit + 1])
+            return self._page(list(islice(heapq.merge(*slices), limit + 1)), limit)
+
+    def _status_buckets(self, status, blood_groups):
+        # Caller holds _lock
+        if blood_groups is None:
+            return [seqs for (bucket_status, _), seqs in self._by_status_group.items()
+                    if bucket_status == status]
+        return [self._by_status_group[(status, group)] for group in blood_groups
+                if (status, group) in self._by_status_group]
+
+    def _page(self, seqs, limit):
+        # Caller holds _lock; seqs holds up to limit + 1 entries
+        requests = self.requests
+        page = [requests[seq] for seq in seqs[:limit]]
+        next_cursor = seqs[limit - 1] if len(seqs) > limit else None
+        return page, next_cursor
+
+    def count(self, status, blood_groups=None):
+        """
+        Number of requests with a given status, optionally for some blood groups.
+        
+        Args:
+            status (str): Request status, e.g. 'Requested'
+            blood_groups (iterable): Requested blood groups to include
+                                     (default: all)
+        
+        Returns:
+            int: Live count read from the indexes
+        """
+        with self._lock:
+            if blood_groups is None:
+                return self._status_totals.get(status, 0)
+            return sum(len(self._by_status_group.get((status, group), ()))
+                       for group in blood_groups)
+
+    def update_status(self, request_id, status, donor_email=None):
+        """
+        Change a request's status (and donor) and move it between indexes.
+        
+        Returns:
+            dict: The updated request
+        """
+        with self._stripe_lock(request_id):
+            return self._set_status(request_id, status, donor_email)
+
+    def claim(self, request_id, donor_email, from_status='Requested', to_status='Confirmed'):
+        """
+        Atomically claim a request for a donor.
+        
+        The status check and the update happen under the request's stripe
+        lock, so when several donors accept the same request concurrently
+        exactly one of them wins, while claims on other requests proceed.
+        
+        Args:
+            request_id (str): Request to claim
+            donor_email (str): Donor taking the request
+            from_status (str): Status the request must currently have
+            to_status (str): Status to move it to
+        
+        Returns:
+            dict: The claimed request, or None if it does not exist or is no
+                  longer in from_status
+        """
+        with self._stripe_lock(request_id):
+            blood_request = self._by_id.get(request_id)
+            if blood_request is None or blood_request['status'] != from_status:
+                return None
+            return self._set_status(request_id, to_status, donor_email)
+
+    def _stripe_lock(self, request_id):
+        return self._stripes[hash(request_id) % len(self._stripes)]
+
+    def _set_status(self, request_id, status, donor_email):
+        # Caller holds the request's stripe lock; the store lock covers only
+        # the index move, so readers never see a half-moved request
+        blood_request = self._by_id[request_id]
+        with self._lock:
+            self._unindex_status(blood_request)
+            blood_request['status'] = status
+            if donor_email is not None:
+                blood_request['donor_email'] = donor_email
+            self._index_status(blood_request)
+        return blood_request
+
+    def _index_status(self, blood_request):
+        key = (blood_request['status'], blood_request['blood_group'])
+        seq = self._seq[blood_request['id']]
+        seqs = self._by_status_group.setdefault(key, [])
+        if not seqs or seqs[-1] < seq:
+            seqs.append(seq)
+        else:
+            seqs.insert(bisect_left(seqs, seq), seq)
+        self._status_totals[key[0]] = self._status_totals.get(key[0], 0) + 1
+        if blood_request['donor_email']:
+            self._by_donor.setdefault(blood_request['donor_email'], {})[blood_request['id']] = blood_request
+
+    def _unindex_status(self, blood_request):
+        key = (blood_request['status'], blood_request['blood_group'])
+        seqs = self._by_status_group.get(key)
+        if seqs is not None:
+            seq = self._seq[blood_request['id']]
+            position = bisect_left(seqs, seq)
+            if position < len(seqs) and seqs[position] == seq:
+                del seqs[position]
+                self._status_totals[key[0]] -= 1
+                if not seqs:
+                    del self._by_status_group[key]
+        if blood_request['donor_email']:
+            self._by_donor.get(blood_request['donor_email'], {}).pop(blood_request['id'], None)
+
+    def _in_creation_order(self, matches):
+        seq = self._seq
+        return sorted(matches, key=lambda r: seq[r['id']])
+
+
+class DonorIndex:
+    """
+    Registered donors bucketed by blood group and donation eligibility.
+    
+    Each blood group has an eligible bucket and a cooling-down bucket.
+    Recording a donation moves the donor to the cooling bucket and files
+    them under their next-eligible day; when a lookup is made for a later
+    day, the due day buckets are released back to the eligible buckets
+    (each donor is moved once per donation). So:
+    - compatible donors eligible today: O(eligible results)
+    - counts per group (all, or eligible only): O(number of groups)
+    
+    Days are date ordinals (date.toordinal()). Lookups are expected with
+    non-decreasing days (i.e. today).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_group = {}          # blood_group -> {email: donor}, eligible now
+        self._cooling = {}           # blood_group -> {email: donor}, cooling down
+        self._next_eligible = {}     # email -> day the donor may donate again
+        self._release = {}           # day -> [(blood_group, email), ...]
+        self._release_days = []      # heap of days in _release
+
+    def add(self, donor):
+        """Index a newly registered donor"""
+        with self._lock:
+            self._by_group.setdefault(donor['blood_group'], {})[donor['email']] = donor
+
+    def cool_down(self, donor, next_eligible_day):
+        """Mark a donor ineligible until next_eligible_day (a date ordinal)"""
+        email, group = donor['email'], donor['blood_group']
+        with self._lock:
+            if self._next_eligible.get(email, 0) >= next_eligible_day:
+                return
+            self._next_eligible[email] = next_eligible_day
+            donor = self._by_group.get(group, {}).pop(email, donor)
+            self._cooling.setdefault(group, {})[email] = donor
+            if next_eligible_day not in self._release:
+                self._release[next_eligible_day] = []
+                heapq.heappush(self._release_days, next_eligible_day)
+            self._release[next_eligible_day].append((group, email))
+
+    def _release_due(self, day):
+        # Caller holds _lock: move donors whose cooldown ended by `day` back
+        while self._release_days and self._release_days[0] <= day:
+            due = heapq.heappop(self._release_days)
+            for group, email in self._release.pop(due):
+                # Skip donors whose cooldown was extended by a later donation
+                if self._next_eligible.get(email) == due:
+                    del self._next_eligible[email]
+                    donor = self._cooling[group].pop(email)
+                    self._by_group.setdefault(group, {})[email] = donor
+
+    def _buckets(self, blood_groups, eligible_on):
+        # Caller holds _lock
+        if eligible_on is None:
+            return [bucket for group in blood_groups
+                    for bucket in (self._by_group.get(group, {}), self._cooling.get(group, {}))]
+        self._release_due(eligible_on)
+        return [self._by_group.get(group, {}) for group in blood_groups]
+
+    def all(self):
+        """All donors (concatenation of every bucket)"""
+        with self._lock:
+            return [donor for buckets in (self._by_group, self._cooling)
+                    for bucket in buckets.values() for donor in bucket.values()]
+
+    def for_groups(self, blood_groups, eligible_on=None):
+        """Donors whose blood group is in blood_groups (eligible on a day, if given)"""
+        with self._lock:
+            return [donor for bucket in self._buckets(blood_groups, eligible_on)
+                    for donor in bucket.values()]
+
+    def count(self, blood_groups, eligible_on=None):
+        """Number of donors whose blood group is in blood_groups (eligible on a day, if given)"""
+        with self._lock:
+            return sum(len(bucket) for bucket in self._buckets(blood_groups, eligible_on))
+
+    def is_eligible(self, email, day):
+        """True unless the donor is cooling down on `day`"""
+        with self._lock:
+            return self._next_eligible.get(email, 0) <= day
+
+
+class MemoryStorage:
+    """
+    In-memory storage backend.
+    
+    Data lives in in-process dictionaries and is lost on restart. Plain
+    dict get/set/setdefault calls are atomic under the GIL, and the one
+    check-then-insert (registration) is guarded by a lock, so the backend is
+    safe under a threaded WSGI server.
+    """
+
+    def __init__(self, donation_cooldown_days=DONATION_COOLDOWN_DAYS):
+        self.donation_cooldown_days = donation_cooldown_days
+        self.users = {}
+        self._users_lock = threading.Lock()
+        self.requests = RequestStore()
+        self.donors = DonorIndex()
+        self.donor_locations = GeoGrid()
+        self.donation_history = {}
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions = {}          # blood_group -> change counter value
+        self._clock = count(1)       # next() is atomic under the GIL
+
+    def _touch(self, *blood_groups):
+        # Each bump takes a fresh clock value, so a version is never reused
+        # even when two threads bump the same group at once
+        for blood_group in blood_groups:
+            self._versions[blood_group] = next(self._clock)
+
+    def change_tag(self, blood_groups=None):
+        """
+        Short string that changes whenever data of the given blood groups changes.
+        
+        Args:
+            blood_groups (iterable): Groups to cover (default: all)
+        """
+        versions = self._versions
+        if blood_groups is None:
+            blood_groups = sorted(versions)
+        return f"{self.epoch}-" + '.'.join(str(versions.get(g, 0)) for g in blood_groups)
+
+    # ---- Users ----
+
+    def get_user(self, email):
+        """Get a user by email, or None"""
+        return self.users.get(email)
+
+    def add_user(self, user):
+        """
+        Register a user.
+        
+        Returns:
+            bool: False if the email is already registered
+        """
+        with self._users_lock:
+            if user['email'] in self.users:
+                return False
+            self.users[user['email']] = user
+        if user['role'] == 'donor':
+            self.donation_history.setdefault(user['email'], [])
+            self.donors.add(user)
+            if user.get('latitude') is not None:
+                self.donor_locations.add(user['blood_group'], user['latitude'],
+                                         user['longitude'], user)
+            self._touch(user['blood_group'])
+        return True
+
+    def add_users(self, users):
+        """
+        Register several users (bulk import).
+        
+        Returns:
+            list: The users actually added (already registered emails are skipped)
+        """
+        return [user for user in users if MemoryStorage.add_user(self, user)]
+
+    def update_user_password(self, email, pwhash):
+        """Replace a user's stored password hash"""
+        user = self.users.get(email)
+        if user is not None:
+            user['password'] = pwhash
+
+    def all_donors(self):
+        """All registered donors"""
+        return self.donors.all()
+
+    def donors_for_groups(self, blood_groups, eligible_on=None):
+        """Donors whose blood group is in blood_groups (eligible to donate on a date, if given)"""
+        return self.donors.for_groups(blood_groups, _day(eligible_on))
+
+    def count_donors(self, blood_groups, eligible_on=None):
+        """Number of donors whose blood group is in blood_groups (eligible on a date, if given)"""
+        return self.donors.count(blood_groups, _day(eligible_on))
+
+    def nearest_donors(self, latitude, longitude, blood_groups, k=10, radius_km=50.0,
+                       eligible_on=None):
+        """
+        The k donors of the given blood groups nearest to a point, within radius_km.
+        
+        Args:
+            eligible_on (date): Leave out donors still cooling down on this date
+        
+        Returns:
+            list: Donor dictionaries with an added 'distance_km', nearest first
+        """
+        accept = None
+        if eligible_on is not None:
+            day = eligible_on.toordinal()
+            accept = lambda donor: self.donors.is_eligible(donor['email'], day)
+        return [dict(donor, distance_km=distance) for distance, donor in
+                self.donor_locations.nearest(latitude, longitude, blood_groups, k, radius_km,
+                                             accept=accept)]
+
+    # ---- Requests ----
+
+    def add_request(self, blood_request):
+        """Insert a new request"""
+        return self.add_requests([blood_request])[0]
+
+    def add_requests(self, blood_requests):
+        """Insert several new requests in one transaction"""
+        self.requests.add_many(blood_requests)
+        self._touch(*{r['blood_group'] for r in blood_requests})
+        return blood_requests
+
+    def get_request(self, request_id):
+        """Get a request by id, or None"""
+        return self.requests.get(request_id)
+
+    def requests_by_requestor(self, requestor_email):
+        """Requests created by a requestor, in creation order"""
+        return self.requests.by_requestor(requestor_email)
+
+    def requests_by_donor(self, donor_email, status=None):
+        """Requests taken by a donor, optionally limited to one status"""
+        return self.requests.by_donor(donor_email, status)
+
+    def requests_with_status(self, status, blood_groups=None):
+        """Requests with a status, optionally limited to some blood groups"""
+        return self.requests.with_status(status, blood_groups)
+
+    def count_requests(self, status, blood_groups=None):
+        """Number of requests with a status, optionally for some blood groups"""
+        return self.requests.count(status, blood_groups)
+
+    def page_requests_by_requestor(self, requestor_email, after=None, limit=20):
+        """Keyset page of a requestor's requests: (requests, next cursor)"""
+        return self.requests.page_by_requestor(requestor_email, after, limit)
+
+    def page_requests_with_status(self, status, blood_groups=None, after=None, limit=20):
+        """Keyset page of requests with a status: (requests, next cursor)"""
+        return self.requests.page_with_status(status, blood_groups, after, limit)
+
+    def update_request_status(self, request_id, status, donor_email=None):
+        """Change a request's status (and donor)"""
+        blood_request = self.requests.update_status(request_id, status, donor_email)
+        self._touch(blood_request['blood_group'])
+        return blood_request
+
+    def claim_request(self, request_id, donor_email):
+        """Atomically confirm a 'Requested' request; None if already taken"""
+        blood_request = self.requests.claim(request_id, donor_email)
+        if blood_request is not None:
+            self._touch(blood_request['blood_group'])
+        return blood_request
+
+    def expire_request(self, request_id):
+        """Atomically move a 'Requested' request to 'Expired'; None if it is no longer open"""
+        blood_request = self.requests.claim(request_id, None, to_status='Expired')
+        if blood_request is not None:
+            self._touch(blood_request['blood_group'])
+        return blood_request
+
+    def pending_expiries(self):
+        """(request id, expires_at) of open requests that have an expiry"""
+        return [(r['id'], r['expires_at']) for r in self.requests.with_status('Requested')
+                if r.get('expires_at')]
+
+    # ---- Donation history ----
+
+    def get_donation_history(self, donor_email):
+        """Donation history entries of a donor, oldest first"""
+        return list(self.donation_history.get(donor_email, ()))
+
+    def add_donation(self, donor_email, entry):
+        """Append a donation history entry and start the donor's cooldown"""
+        self.donation_history.setdefault(donor_email, []).append(entry)
+        donor = self._cool_down(donor_email, entry)
+        self._touch(entry['blood_group'], *([donor['blood_group']] if donor else []))
+
+    def add_donations(self, donations):
+        """Append several (donor_email, entry) donation history entries"""
+        for donor_email, entry in donations:
+            MemoryStorage.add_donation(self, donor_email, entry)
+
+    def _cool_down(self, donor_email, entry):
+        # Move the donor out of the eligible buckets until the cooldown ends
+        donor = self.users.get(donor_email)
+        if donor is None or donor['role'] != 'donor':
+            return None
+        next_eligible = _next_eligible(entry['date_time'], self.donation_cooldown_days)
+        if next_eligible > donor.get('next_eligible', ''):
+            donor['next_eligible'] = next_eligible
+        self.donors.cool_down(donor, _day(next_eligible))
+        return donor
+
+    def close(self):
+        """Release resources (nothing to do in memory)"""
+
+
+# ============================
+# JOURNALED IN-MEMORY BACKEND
+# ============================
+
+class JournalLockedError(Exception):
+    """Raised when another process already has the journal directory open"""
+
+
+def _lock_file(path):
+    """
+    Open `path` and take an exclusive, non-blocking lock on it. The lock is
+    released when the file is closed or the process exits.
+    
+    Raises:
+        JournalLockedError: If another open file holds the lock
+    """
+    handle = open(path, 'a+b')
+    try:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise JournalLockedError(f"{path} is locked: another process (the app or an import) "
+                                 f"has this journal open") from None
+    return handle
+
+
+class JournaledMemoryStorage(MemoryStorage):
+    """
+    In-memory backend that survives restarts.
+    
+    Every mutation (registration, request creation, status change/claim and
+    donation) is appended to a JSON Lines journal. A background thread
+    group-commits the journal: buffered entries are written and fsync'ed
+    together every `sync_interval` seconds, so requests never wait on an
+    fsync. The trade-off is that a crash can lose up to `sync_interval`
+    seconds of mutations.
+    
+    After `snapshot_every` journal entries the whole state is written to a
+    compacted snapshot and a new journal segment is started. On startup the
+    newest snapshot is loaded and only the journal tail after it is
+    replayed, so startup time depends on the tail length, not the history.
+    
+    Directory layout (N = journal entries written before the file started):
+        snapshot-<N>.json     full state after N entries
+        journal-<N>.jsonl     entries N, N+1, ...
+        LOCK                  locked while a process has the journal open
+    
+    Only one process may have a journal open: a second one (another worker,
+    or blood_import.py while the app runs) would interleave its entries
+    and snapshots with the first's. Opening a locked journal raises
+    JournalLockedError.
+    """
+
+    def __init__(self, directory, sync_interval=0.05, snapshot_every=10_000,
+                 donation_cooldown_days=DONATION_COOLDOWN_DAYS):
+        super().__init__(donation_cooldown_days)
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._lock_handle = _lock_file(os.path.join(directory, 'LOCK'))
+
+        # Serializes journal order with the mutations it records
+        self._journal_lock = threading.Lock()
+        self._pending = []
+        self._wakeup = threading.Condition(self._journal_lock)
+        self._closed = False
+
+        self._entries = self._recover()
+        self._segment_start = self._entries
+        self._snapshot_start = self._entries
+        self._journal = open(self._path('journal', self._segment_start), 'a', encoding='utf-8')
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='journal-flusher',
+                                         daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # ---- Journaled mutations ----
+
+    def add_user(self, user):
+        with self._journal_lock:
+            added = super().add_user(user)
+            if added:
+                self._log('add_user', user=user)
+        return added
+
+    def add_users(self, users):
+        with self._journal_lock:
+            added = super().add_users(users)
+            if added:
+                self._log('add_users', users=added)
+        return added
+
+    def add_request(self, blood_request):
+        return self.add_requests([blood_request])[0]
+
+    def add_requests(self, blood_requests):
+        with self._journal_lock:
+            super().add_requests(blood_requests)
+            self._log('add_requests', requests=blood_requests)
+        return blood_requests
+
+    def update_user_password(self, email, pwhash):
+        with self._journal_lock:
+            super().update_user_password(email, pwhash)
+            self._log('update_password', email=email, password=pwhash)
+
+    def update_request_status(self, request_id, status, donor_email=None):
+        # Status changes replay idempotently, so they are applied under the
+        # striped request locks only and logged afterwards
+        blood_request = super().update_request_status(request_id, status, donor_email)
+        with self._journal_lock:
+            self._log('update_status', id=request_id, status=status, donor_email=donor_email)
+        return blood_request
+
+    def claim_request(self, request_id, donor_email):
+        blood_request = super().claim_request(request_id, donor_email)
+        if blood_request is not None:
+            with self._journal_lock:
+                self._log('update_status', id=request_id, status=blood_request['status'],
+                          donor_email=donor_email)
+        return blood_request
+
+    def expire_request(self, request_id):
+        blood_request = super().expire_request(request_id)
+        if blood_request is not None:
+            with self._journal_lock:
+                self._log('update_status', id=request_id, status='Expired', donor_email=None)
+        return blood_request
+
+    def add_donation(self, donor_email, entry):
+        with self._journal_lock:
+            super().add_donation(donor_email, entry)
+            self._log('add_donation', donor_email=donor_email, entry=entry)
+
+    def add_donations(self, donations):
+        donations = list(donations)
+        with self._journal_lock:
+            super().add_donations(donations)
+            self._log('add_donations', donations=donations)
+
+    def _log(self, op, **data):
+        # Caller holds _journal_lock
+        if self._closed:
+            raise RuntimeError("Journal is closed")
+        data['op'] = op
+        self._pending.append(json.dumps(data))
+        self._entries += 1
+        if len(self._pending) == 1:
+            self._wakeup.notify()
+
+    def _apply(self, event):
+        op = event['op']
+        if op == 'add_user':
+            MemoryStorage.add_user(self, event['user'])
+        elif op == 'add_users':
+            MemoryStorage.add_users(self, event['users'])
+        elif op == 'update_password':
+            MemoryStorage.update_user_password(self, event['email'], event['password'])
+        elif op == 'add_requests':
+            MemoryStorage.add_requests(self, event['requests'])
+        elif op == 'update_status':
+            if self.requests.get(event['id']) is not None:
+                MemoryStorage.update_request_status(self, event['id'], event['status'],
+                                                    event['donor_email'])
+        elif op == 'add_donation':
+            MemoryStorage.add_donation(self, event['donor_email'], event['entry'])
+        elif op == 'add_donations':
+            MemoryStorage.add_donations(self, event['donations'])
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    # ---- Group commit and snapshots ----
+
+    def _flush_loop(self):
+        while True:
+            with self._journal_lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+            # Let more entries accumulate, then commit them as one group
+            time.sleep(self.sync_interval)
+            with self._journal_lock:
+                if self._closed:
+                    return
+                self._write_pending()
+                due = self._entries - self._snapshot_start >= self.snapshot_every
+            if due:
+                self.snapshot()
+
+    def _write_pending(self):
+        # Caller holds _journal_lock
+        if self._pending:
+            self._journal.write('\n'.join(self._pending) + '\n')
+            self._pending = []
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def sync(self):
+        """Write and fsync every buffered journal entry now"""
+        with self._journal_lock:
+            if not self._closed:
+                self._write_pending()
+
+    def snapshot(self):
+        """
+        Write a compacted snapshot of the current state and start a new
+        journal segment; older snapshots and segments are removed.
+        """
+        with self._journal_lock:
+            if self._closed:
+                return
+            self._write_pending()
+            position = self._entries
+            state = {
+                'entries': position,
+                'users': list(self.users.values()),
+                'requests': [dict(r) for r in self.requests.requests],
+                'donation_history': {email: list(history)
+                                     for email, history in self.donation_history.items()}
+            }
+            self._journal.close()
+            self._segment_start = self._snapshot_start = position
+            self._journal = open(self._path('journal', position), 'a', encoding='utf-8')
+
+        final_path = self._path('snapshot', position)
+        tmp_path = final_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(state, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, final_path)
+
+        for kind, start in self._files():
+            if start < position:
+                os.remove(self._path(kind, start))
+
+    def _recover(self):
+        """Load the newest snapshot and replay the journal tail after it"""
+        files = self._files()
+        snapshots = sorted(start for kind, start in files if kind == 'snapshot')
+        position = 0
+        if snapshots:
+            position = snapshots[-1]
+            with open(self._path('snapshot', position), 'r', encoding='utf-8') as handle:
+                state = json.load(handle)
+            for user in state['users']:
+                MemoryStorage.add_user(self, user)
+            MemoryStorage.add_requests(self, state['requests'])
+            for email, history in state['donation_history'].items():
+                self.donation_history[email] = history
+                for entry in history:
+                    self._cool_down(email, entry)
+
+        segments = sorted(start for kind, start in files
+                          if kind == 'journal' and start >= position)
+        for start in segments:
+            with open(self._path('journal', start), 'r', encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash: the rest of the tail is lost
+                        break
+                    self._apply(event)
+                    position += 1
+        return position
+
+    def _files(self):
+        found = []
+        for name in os.listdir(self.directory):
+            stem, _, ext = name.rpartition('.')
+            kind, _, start = stem.partition('-')
+            if (kind, ext) in (('snapshot', 'json'), ('journal', 'jsonl')) and start.isdigit():
+                found.append((kind, int(start)))
+        return found
+
+    def _path(self, kind, start):
+        ext = 'json' if kind == 'snapshot' else 'jsonl'
+        return os.path.join(self.directory, f'{kind}-{start:012d}.{ext}')
+
+    def close(self):
+        """Flush the journal and stop the background flusher"""
+        with self._journal_lock:
+            if self._closed:
+                return
+            self._write_pending()
+            self._journal.close()
+            self._closed = True
+            self._wakeup.notify_all()
+        self._flusher.join()
+        self._lock_handle.close()
+
+
+# ============================
+# SQLITE BACKEND
+# ============================
+
+_REQUEST_COLUMNS = ('id', 'blood_group', 'units', 'requestor_email', 'donor_email',
+                    'status', 'timestamp', 'latitude', 'longitude', 'expires_at')
+_USER_COLUMNS = ('id', 'name', 'email', 'password', 'blood_group', 'role',
+                 'latitude', 'longitude', 'next_eligible')
+# '' sorts before every ISO date: never donated means eligible on any date
+_USER_DEFAULTS = {'next_eligible': ''}
+_HISTORY_COLUMNS = ('request_id', 'blood_group', 'requestor_email', 'date_time')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email       TEXT PRIMARY KEY,
+    id          TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    password    TEXT NOT NULL,
+    blood_group TEXT NOT NULL,
+    role        TEXT NOT NULL,
+    latitude    REAL,
+    longitude   REAL,
+    next_eligible TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_users_role_group ON users (role, blood_group);
+
+CREATE TABLE IF NOT EXISTS requests (
+    seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+    id              TEXT NOT NULL UNIQUE,
+    blood_group     TEXT NOT NULL,
+    units           INTEGER NOT NULL,
+    requestor_email TEXT NOT NULL,
+    donor_email     TEXT,
+    status          TEXT NOT NULL,
+    timestamp       TEXT NOT NULL,
+    latitude        REAL,
+    longitude       REAL,
+    expires_at      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_requests_status_group ON requests (status, blood_group, seq);
+CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status, seq);
+CREATE INDEX IF NOT EXISTS idx_requests_requestor ON requests (requestor_email, seq);
+CREATE INDEX IF NOT EXISTS idx_requests_donor ON requests (donor_email, seq);
+
+CREATE TABLE IF NOT EXISTS donation_history (
+    seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+    donor_email     TEXT NOT NULL,
+    request_id      TEXT NOT NULL,
+    blood_group     TEXT NOT NULL,
+    requestor_email TEXT NOT NULL,
+    date_time       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_donor ON donation_history (donor_email, seq);
+
+CREATE TABLE IF NOT EXISTS change_versions (
+    blood_group TEXT PRIMARY KEY,
+    version     INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Columns added after the first release: (table, column, type). Databases
+# created earlier get them with ALTER TABLE on open.
+_ADDED_COLUMNS = (
+    ('users', 'latitude', 'REAL'),
+    ('users', 'longitude', 'REAL'),
+    ('requests', 'latitude', 'REAL'),
+    ('requests', 'longitude', 'REAL'),
+    ('users', 'next_eligible', "TEXT NOT NULL DEFAULT ''"),
+    ('requests', 'expires_at', 'TEXT'),
+)
+
+_POST_MIGRATION_INDEXES = """
+DROP INDEX IF EXISTS idx_users_location;
+CREATE INDEX IF NOT EXISTS idx_users_location_eligible
+    ON users (role, blood_group, latitude, longitude, next_eligible);
+CREATE INDEX IF NOT EXISTS idx_users_eligible ON users (role, blood_group, next_eligible);
+"""
+
+# Bumped inside the writing transaction, so a new version is visible
+# exactly when the change it stands for is
+_TOUCH_GROUP = ("INSERT INTO change_versions (blood_group, version) VALUES (?, 1) "
+                "ON CONFLICT (blood_group) DO UPDATE SET version = version + 1")
+_TOUCH_REQUEST_GROUP = ("INSERT INTO change_versions (blood_group, version) "
+                        "SELECT blood_group, 1 FROM requests WHERE id = ? "
+                        "ON CONFLICT (blood_group) DO UPDATE SET version = version + 1")
+
+_SELECT_REQUEST = f"SELECT {', '.join(_REQUEST_COLUMNS)} FROM requests"
+_SELECT_REQUEST_SEQ = f"SELECT {', '.join(_REQUEST_COLUMNS)}, seq FROM requests"
+_INSERT_REQUEST = (f"INSERT INTO requests ({', '.join(_REQUEST_COLUMNS)}) "
+                   f"VALUES ({', '.join('?' * len(_REQUEST_COLUMNS))})")
+
+
+def _placeholders(count):
+    return ', '.join('?' * count)
+
+
+class SQLiteStorage:
+    """
+    SQLite storage backend.
+    
+    - WAL journal mode, so readers never block the writer and several worker
+      processes can share one database file
+    - One connection per thread, reused across requests; sqlite3 keeps a
+      per-connection cache of prepared statements, and every query below is a
+      fixed parameterized SQL string, so statements are prepared once
+    - Indexes on (status, blood_group), requestor_email and donor_email match
+      the route access patterns; (role, blood_group, next_eligible) serves
+      the eligible-donor lookups
+    - claim_request() is a single conditional UPDATE, atomic across threads
+      and processes
+    - Fork-safe: a connection inherited from the parent process (e.g. app
+      preloaded before gunicorn forks its workers) is never reused; each
+      process opens its own
+    """
+
+    def __init__(self, path, donation_cooldown_days=DONATION_COOLDOWN_DAYS):
+        self.path = path
+        self.donation_cooldown_days = donation_cooldown_days
+        self._local = threading.local()
+        # Connections inherited across fork(); kept referenced so they are
+        # never closed (or otherwise touched) from the child process
+        self._inherited = []
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            for table, column, kind in _ADDED_COLUMNS:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            conn.executescript(_POST_MIGRATION_INDEXES)
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)",
+                         (uuid.uuid4().hex[:8],))
+        self.epoch = self._connection().execute(
+            "SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid != os.getpid():
+            self._inherited.append(conn)
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=256,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _request_row(row):
+        return dict(zip(_REQUEST_COLUMNS, row)) if row else None
+
+    def _query_requests(self, where, params):
+        rows = self._connection().execute(f"{_SELECT_REQUEST} WHERE {where}", params)
+        return [dict(zip(_REQUEST_COLUMNS, row)) for row in rows]
+
+    # ---- Users ----
+
+    def get_user(self, email):
+        """Get a user by email, or None"""
+        row = self._connection().execute(
+            f"SELECT {', '.join(_USER_COLUMNS)} FROM users WHERE email = ?", (email,)).fetchone()
+        return dict(zip(_USER_COLUMNS, row)) if row else None
+
+    def add_user(self, user):
+        """
+        Register a user.
+        
+        Returns:
+            bool: False if the email is already registered
+        """
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    f"INSERT INTO users ({', '.join(_USER_COLUMNS)}) "
+                    f"VALUES ({_placeholders(len(_USER_COLUMNS))})",
+                    tuple(user.get(column, _USER_DEFAULTS.get(column)) for column in _USER_COLUMNS))
+                if user['role'] == 'donor':
+                    conn.execute(_TOUCH_GROUP, (user['blood_group'],))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def add_users(self, users):
+        """
+        Register several users in one transaction (bulk import).
+        
+        Returns:
+            list: The users actually added (already registered emails are skipped)
+        """
+        with self._connection() as conn:
+            added = []
+            for user in users:
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO users ({', '.join(_USER_COLUMNS)}) "
+                    f"VALUES ({_placeholders(len(_USER_COLUMNS))})",
+                    tuple(user.get(column, _USER_DEFAULTS.get(column)) for column in _USER_COLUMNS))
+                if cursor.rowcount == 1:
+                    added.append(user)
+            conn.executemany(_TOUCH_GROUP, ((group,) for group in
+                                            {u['blood_group'] for u in added if u['role'] == 'donor'}))
+        return added
+
+    def update_user_password(self, email, pwhash):
+        """Replace a user's stored password hash"""
+        with self._connection() as conn:
+            conn.execute("UPDATE users SET password = ? WHERE email = ?", (pwhash, email))
+
+    def all_donors(self):
+        """All registered donors"""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_USER_COLUMNS)} FROM users WHERE role = 'donor'")
+        return [dict(zip(_USER_COLUMNS, row)) for row in rows]
+
+    @staticmethod
+    def _donor_filter(blood_groups, eligible_on):
+        # WHERE clause and parameters for donors of some groups, optionally
+        # eligible on a date (a range on the (role, blood_group, next_eligible) index)
+        where = f"role = 'donor' AND blood_group IN ({_placeholders(len(blood_groups))})"
+        if eligible_on is None:
+            return where, blood_groups
+        return where + " AND next_eligible <= ?", [*blood_groups, eligible_on.isoformat()]
+
+    def donors_for_groups(self, blood_groups, eligible_on=None):
+        """Donors whose blood group is in blood_groups (eligible to donate on a date, if given)"""
+        blood_groups = list(blood_groups)
+        if not blood_groups:
+            return []
+        where, params = self._donor_filter(blood_groups, eligible_on)
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_USER_COLUMNS)} FROM users WHERE {where}", params)
+        return [dict(zip(_USER_COLUMNS, row)) for row in rows]
+
+    def count_donors(self, blood_groups, eligible_on=None):
+        """Number of donors whose blood group is in blood_groups (eligible on a date, if given)"""
+        blood_groups = list(blood_groups)
+        if not blood_groups:
+            return 0
+        where, params = self._donor_filter(blood_groups, eligible_on)
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM users WHERE {where}", params).fetchone()[0]
+
+    def nearest_donors(self, latitude, longitude, blood_groups, k=10, radius_km=50.0,
+                       eligible_on=None):
+        """
+        The k donors of the given blood groups nearest to a point, within radius_km.
+        
+        Each group is read from the (role, blood_group, latitude, longitude,
+        next_eligible) index over the bounding box of a search radius; only coordinates
+        and rowids are read, so the index covers the scan. The search starts
+        at 1/16 of radius_km and widens 4x at a time until it has found k
+        donors or reached radius_km, so dense areas stay cheap. Full rows
+        are read for the k winners only.
+        
+        Args:
+            eligible_on (date): Leave out donors still cooling down on this date
+        
+        Returns:
+            list: Donor dictionaries with an added 'distance_km', nearest first
+        """
+        blood_groups = list(blood_groups)
+        conn = self._connection()
+        eligible = "" if eligible_on is None else " AND next_eligible <= ?"
+        eligible_params = () if eligible_on is None else (eligible_on.isoformat(),)
+        search_km = radius_km / 16 if k > 0 else radius_km
+        while True:
+            search_km = min(search_km, radius_km)
+            where, bounds = self._bounding_box(latitude, longitude, search_km)
+            found = []
+            for group in blood_groups:
+                for rowid, lat, lon in conn.execute(
+                        f"SELECT rowid, latitude, longitude FROM users "
+                        f"WHERE role = 'donor' AND blood_group = ? AND {where}{eligible}",
+                        (group, *bounds, *eligible_params)):
+                    distance = haversine_km(latitude, longitude, lat, lon)
+                    if distance <= search_km:
+                        found.append((distance, rowid))
+            # k donors within the search radius are the k nearest overall
+            if len(found) >= k or search_km >= radius_km:
+                break
+            search_km *= 4
+        nearest = heapq.nsmallest(k, found)
+        donors = []
+        for distance, rowid in nearest:
+            row = conn.execute(f"SELECT {', '.join(_USER_COLUMNS)} FROM users WHERE rowid = ?",
+                               (rowid,)).fetchone()
+            donors.append(dict(zip(_USER_COLUMNS, row), distance_km=distance))
+        return donors
+
+    @staticmethod
+    def _bounding_box(latitude, longitude, radius_km):
+        # SQL condition and parameters for the lat/lon box around a circle
+        min_lat, max_lat = latitude_band(latitude, radius_km)
+        where = "latitude BETWEEN ? AND ?"
+        bounds = [min_lat, max_lat]
+        reach = longitude_reach(latitude, radius_km)
+        if reach is not None:
+            west, east = longitude - reach, longitude + reach
+            if west < -180 or east > 180:
+                # The box crosses the antimeridian
+                where += " AND (longitude >= ? OR longitude <= ?)"
+                bounds += [(west + 540) % 360 - 180, (east + 540) % 360 - 180]
+            else:
+                where += " AND longitude BETWEEN ? AND ?"
+                bounds += [west, east]
+        return where, bounds
+
+    # ---- Requests ----
+
+    def add_request(self, blood_request):
+        """Insert a new request"""
+        return self.add_requests([blood_request])[0]
+
+    def add_requests(self, blood_requests):
+        """
+        Insert several new requests in one transaction.
+        
+        Raises:
+            ValueError: If any request id already exists (nothing is inserted)
+        """
+        try:
+            with self._connection() as conn:
+                conn.executemany(_INSERT_REQUEST, (
+                    tuple(r.get(column) for column in _REQUEST_COLUMNS) for r in blood_requests))
+                conn.executemany(_TOUCH_GROUP, ((g,) for g in {r['blood_group'] for r in blood_requests}))
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Duplicate request id in batch: {e}") from e
+        return blood_requests
+
+    def get_request(self, request_id):
+        """Get a request by id, or None"""
+        row = self._connection().execute(
+            f"{_SELECT_REQUEST} WHERE id = ?", (request_id,)).fetchone()
+        return self._request_row(row)
+
+    def requests_by_requestor(self, requestor_email):
+        """Requests created by a requestor, in creation order"""
+        return self._query_requests("requestor_email = ? ORDER BY seq", (requestor_email,))
+
+    def requests_by_donor(self, donor_email, status=None):
+        """Requests taken by a donor, optionally limited to one status"""
+        if status is None:
+            return self._query_requests("donor_email = ? ORDER BY seq", (donor_email,))
+        return self._query_requests("donor_email = ? AND status = ? ORDER BY seq",
+                                    (donor_email, status))
+
+    def requests_with_status(self, status, blood_groups=None):
+        """Requests with a status, optionally limited to some blood groups"""
+        if blood_groups is None:
+            return self._query_requests("status = ? ORDER BY seq", (status,))
+        blood_groups = list(blood_groups)
+        if not blood_groups:
+            return []
+        return self._query_requests(
+            f"status = ? AND blood_group IN ({_placeholders(len(blood_groups))}) ORDER BY seq",
+            [status, *blood_groups])
+
+    def count_requests(self, status, blood_groups=None):
+        """Number of requests with a status, optionally for some blood groups"""
+        conn = self._connection()
+        if blood_groups is None:
+            return conn.execute("SELECT COUNT(*) FROM requests WHERE status = ?",
+                                (status,)).fetchone()[0]
+        blood_groups = list(blood_groups)
+        if not blood_groups:
+            return 0
+        return conn.execute(
+            f"SELECT COUNT(*) FROM requests "
+            f"WHERE status = ? AND blood_group IN ({_placeholders(len(blood_groups))})",
+            [status, *blood_groups]).fetchone()[0]
+
+    def _page_query(self, where, params, after, limit):
+        # Keyset page: rows with seq > after, seq order, limit + 1 to detect more
+        rows = self._connection().execute(
+            f"{_SELECT_REQUEST_SEQ} WHERE {where} AND seq > ? ORDER BY seq LIMIT ?",
+            (*params, -1 if after is None else after, limit + 1)).fetchall()
+        return rows
+
+    @staticmethod
+    def _page(rows, limit):
+        page = [dict(zip(_REQUEST_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = rows[limit - 1][-1] if len(rows) > limit else None
+        return page, next_cursor
+
+    def page_requests_by_requestor(self, requestor_email, after=None, limit=20):
+        """Keyset page of a requestor's requests: (requests, next cursor)"""
+        return self._page(self._page_query("requestor_email = ?", (requestor_email,),
+                                           after, limit), limit)
+
+    def page_requests_with_status(self, status, blood_groups=None, after=None, limit=20):
+        """
+        Keyset page of requests with a status: (requests, next cursor).
+        
+        With blood groups, each group is read from the (status, blood_group,
+        seq) index with its own LIMIT and the results are merged, so the cost
+        is O(groups x page size) rather than O(matching rows).
+        """
+        if blood_groups is None:
+            return self._page(self._page_query("status = ?", (status,), after, limit), limit)
+        per_group = [self._page_query("status = ? AND blood_group = ?", (status, group),
+                                      after, limit)
+                     for group in blood_groups]
+        rows = list(islice(heapq.merge(*per_group, key=lambda row: row[-1]), limit + 1))
+        return self._page(rows, limit)
+
+    def update_request_status(self, request_id, status, donor_email=None):
+        """Change a request's status (and donor)"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE requests SET status = ?, donor_email = COALESCE(?, donor_email) "
+                "WHERE id = ?", (status, donor_email, request_id))
+            conn.execute(_TOUCH_REQUEST_GROUP, (request_id,))
+        return self.get_request(request_id)
+
+    def claim_request(self, request_id, donor_email):
+        """Atomically confirm a 'Requested' request; None if already taken"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE requests SET status = 'Confirmed', donor_email = ? "
+                "WHERE id = ? AND status = 'Requested'", (donor_email, request_id))
+            if cursor.rowcount == 1:
+                conn.execute(_TOUCH_REQUEST_GROUP, (request_id,))
+        if cursor.rowcount != 1:
+            return None
+        return self.get_request(request_id)
+
+    def expire_request(self, request_id):
+        """Atomically move a 'Requested' request to 'Expired'; None if it is no longer open"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE requests SET status = 'Expired' WHERE id = ? AND status = 'Requested'",
+                (request_id,))
+            if cursor.rowcount == 1:
+                conn.execute(_TOUCH_REQUEST_GROUP, (request_id,))
+        if cursor.rowcount != 1:
+            return None
+        return self.get_request(request_id)
+
+    def pending_expiries(self):
+        """(request id, expires_at) of open requests that have an expiry"""
+        return list(self._connection().execute(
+            "SELECT id, expires_at FROM requests "
+            "WHERE status = 'Requested' AND expires_at IS NOT NULL ORDER BY seq"))
+
+    def change_tag(self, blood_groups=None):
+        """
+        Short string that changes whenever data of the given blood groups changes.
+        
+        Args:
+            blood_groups (iterable): Groups to cover (default: all)
+        """
+        versions = dict(self._connection().execute(
+            "SELECT blood_group, version FROM change_versions"))
+        if blood_groups is None:
+            blood_groups = sorted(versions)
+        return f"{self.epoch}-" + '.'.join(str(versions.get(g, 0)) for g in blood_groups)
+
+    # ---- Donation history ----
+
+    def get_donation_history(self, donor_email):
+        """Donation history entries of a donor, oldest first"""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_HISTORY_COLUMNS)} FROM donation_history "
+            f"WHERE donor_email = ? ORDER BY seq", (donor_email,))
+        return [dict(zip(_HISTORY_COLUMNS, row)) for row in rows]
+
+    def add_donation(self, donor_email, entry):
+        """Append a donation history entry and start the donor's cooldown"""
+        next_eligible = _next_eligible(entry['date_time'], self.donation_cooldown_days)
+        with self._connection() as conn:
+            conn.execute(
+                f"INSERT INTO donation_history (donor_email, {', '.join(_HISTORY_COLUMNS)}) "
+                f"VALUES (?, {_placeholders(len(_HISTORY_COLUMNS))})",
+                (donor_email, *(entry[column] for column in _HISTORY_COLUMNS)))
+            conn.execute(_TOUCH_GROUP, (entry['blood_group'],))
+            cursor = conn.execute(
+                "UPDATE users SET next_eligible = max(next_eligible, ?) "
+                "WHERE email = ? AND role = 'donor'", (next_eligible, donor_email))
+            if cursor.rowcount:
+                conn.execute("INSERT INTO change_versions (blood_group, version) "
+                             "SELECT blood_group, 1 FROM users WHERE email = ? "
+                             "ON CONFLICT (blood_group) DO UPDATE SET version = version + 1",
+                             (donor_email,))
+
+    def add_donations(self, donations):
+        """Append several (donor_email, entry) donation history entries in one transaction"""
+        donations = list(donations)
+        cooldowns = {}
+        for donor_email, entry in donations:
+            next_eligible = _next_eligible(entry['date_time'], self.donation_cooldown_days)
+            cooldowns[donor_email] = max(next_eligible, cooldowns.get(donor_email, ''))
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT INTO donation_history (donor_email, {', '.join(_HISTORY_COLUMNS)}) "
+                f"VALUES (?, {_placeholders(len(_HISTORY_COLUMNS))})",
+                [(donor_email, *(entry[column] for column in _HISTORY_COLUMNS))
+                 for donor_email, entry in donations])
+            conn.executemany(
+                "UPDATE users SET next_eligible = max(next_eligible, ?) "
+                "WHERE email = ? AND role = 'donor'",
+                [(next_eligible, email) for email, next_eligible in cooldowns.items()])
+            groups = {entry['blood_group'] for _, entry in donations}
+            # CROSS JOIN keeps json_each as the outer loop: one primary key lookup per donor
+            groups.update(row[0] for row in conn.execute(
+                "SELECT DISTINCT users.blood_group FROM json_each(?) AS donor "
+                "CROSS JOIN users ON users.email = donor.value WHERE users.role = 'donor'",
+                (json.dumps(list(cooldowns)),)))
+            conn.executemany(_TOUCH_GROUP, ((group,) for group in groups))
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+
+def create_storage(backend='memory', sqlite_path='blood_bank.db', journal_dir='blood_journal',
+                   donation_cooldown_days=DONATION_COOLDOWN_DAYS):
+    """
+    Create a storage backend by name.
+    
+    Args:
+        backend (str): 'memory', 'journal' or 'sqlite'
+        sqlite_path (str): Database file used by the SQLite backend
+        journal_dir (str): Journal/snapshot directory used by the journal backend
+        donation_cooldown_days (int): Days a donor must wait between donations
+    
+    Returns:
+        MemoryStorage, JournaledMemoryStorage or SQLiteStorage
+    """
+    if backend == 'memory':
+        return MemoryStorage(donation_cooldown_days)
+    if backend == 'journal':
+        return JournaledMemoryStorage(journal_dir, donation_cooldown_days=donation_cooldown_days)
+    if backend == 'sqlite':
+        return SQLiteStorage(sqlite_path, donation_cooldown_days)
+    raise ValueError(f"Unknown storage backend: {backend}")
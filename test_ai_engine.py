@@ -4,12 +4,27 @@ Test Script for Blood Compatibility AI Engine
 Verifies all AI functions work correctly
 """
 
+import json
+import os
+import tempfile
+
 from blood_ai_engine import (
     get_compatible_donors,
     is_donor_compatible,
     filter_compatible_donors,
     get_all_blood_groups,
-    get_compatibility_explanation
+    get_compatibility_explanation,
+    BLOOD_COMPATIBILITY_MAP,
+    BLOOD_GROUPS,
+    COMPATIBILITY_MASKS,
+    UNKNOWN_BLOOD_GROUP_CODE,
+    encode_blood_group,
+    is_code_compatible,
+    DonorBatch,
+    filter_compatible_donors_batch,
+    assign_donors_to_requests,
+    read_jsonl_chunks,
+    stream_compatible_donors
 )
 
 def test_blood_compatibility():
@@ -119,9 +134,138 @@ def test_blood_compatibility():
     print("🎉 ALL TESTS PASSED! AI ENGINE IS WORKING CORRECTLY!")
     print("=" * 60)
 
+def test_bitmask_engine():
+    """Test the integer-coded bitmask engine against the lookup table"""
+    print("\n✓ TEST: Bitmask Engine Matches Compatibility Map")
+    
+    assert len(BLOOD_GROUPS) == 8, "Should intern 8 blood groups"
+    assert len(COMPATIBILITY_MASKS) == 8, "Should have one mask per receiver"
+    
+    # Every donor/receiver pair must agree with BLOOD_COMPATIBILITY_MAP
+    for receiver in BLOOD_GROUPS:
+        for donor in BLOOD_GROUPS:
+            expected = donor in BLOOD_COMPATIBILITY_MAP[receiver]
+            assert is_donor_compatible(donor, receiver) == expected
+            assert is_code_compatible(encode_blood_group(donor),
+                                      encode_blood_group(receiver)) == expected
+    print("  All 64 donor/receiver pairs agree: ✓ PASSED")
+    
+    # Unknown blood groups are never compatible
+    assert encode_blood_group('XX') == UNKNOWN_BLOOD_GROUP_CODE
+    assert is_donor_compatible('XX', 'AB+') == False
+    assert is_donor_compatible('O-', 'XX') == False
+    assert filter_compatible_donors([{'blood_group': 'O-'}], 'XX') == []
+    assert filter_compatible_donors([{'name': 'No Group'}], 'AB+') == []
+    print("  Unknown blood groups rejected: ✓ PASSED")
+
+def test_donor_batch_filtering():
+    """Test columnar bulk filtering against the list-based filter"""
+    print("\n✓ TEST: Bulk Donor Filtering (DonorBatch)")
+    
+    donors = [
+        {'email': 'donor1@test.com', 'name': 'Alice', 'blood_group': 'O-'},
+        {'email': 'donor2@test.com', 'name': 'Bob', 'blood_group': 'B+'},
+        {'email': 'donor3@test.com', 'name': 'Charlie', 'blood_group': 'A+'},
+        {'email': 'donor4@test.com', 'name': 'David', 'blood_group': 'A-'},
+        {'email': 'donor5@test.com', 'name': 'Eve'},
+    ]
+    batch = DonorBatch.from_donors(donors)
+    assert len(batch) == 5
+    
+    # Single group: row ids and mask
+    rows = filter_compatible_donors_batch(batch, 'A+')
+    assert list(rows) == [0, 2, 3]
+    assert batch.take(rows) == filter_compatible_donors(donors, 'A+')
+    mask = filter_compatible_donors_batch(batch, 'A+', as_mask=True)
+    assert list(mask) == [1, 0, 1, 1, 0]
+    print("  A+ receiver rows [0, 2, 3]: ✓ PASSED")
+    
+    # Many groups at once, straight from a list of dicts
+    results = filter_compatible_donors_batch(donors, get_all_blood_groups())
+    for group, group_rows in results.items():
+        assert batch.take(group_rows) == filter_compatible_donors(donors, group)
+    assert list(filter_compatible_donors_batch(batch, 'XX')) == []
+    print("  All groups agree with filter_compatible_donors: ✓ PASSED")
+    
+    # Row ids honour the shard offset
+    shard = DonorBatch.from_donors(donors[2:], start=2)
+    assert list(shard.compatible_rows('A+')) == [2, 3]
+    assert shard.take([3]) == [donors[3]]
+    assert shard.count_by_group()['A-'] == 1
+    print("  Shard offsets preserved: ✓ PASSED")
+
+def test_batch_assignment():
+    """Test many-to-many donor/request assignment"""
+    print("\n✓ TEST: Batch Donor Assignment")
+    
+    requests = [
+        {'id': 'R1', 'blood_group': 'A+', 'units': 2},
+        {'id': 'R2', 'blood_group': 'O-', 'units': 1},
+        {'id': 'R3', 'blood_group': 'AB+', 'units': 1},
+        {'id': 'R4', 'blood_group': 'XX', 'units': 1},
+    ]
+    donors = [
+        {'email': 'o-neg@test.com', 'blood_group': 'O-'},
+        {'email': 'a-pos@test.com', 'blood_group': 'A+'},
+        {'email': 'o-pos@test.com', 'blood_group': 'O+'},
+        {'email': 'b-pos@test.com', 'blood_group': 'B+'},
+    ]
+    result = assign_donors_to_requests(requests, donors)
+    assigned = {req_id: [d['email'] for d in group]
+                for req_id, group in result['assignments'].items()}
+    print(f"  Assignments: {assigned}")
+    
+    # O- donor is saved for the O- receiver
+    assert assigned['R2'] == ['o-neg@test.com']
+    assert sorted(assigned['R1']) == ['a-pos@test.com', 'o-pos@test.com']
+    assert assigned['R3'] == ['b-pos@test.com']
+    assert 'R4' not in assigned, "Invalid blood groups are skipped"
+    assert result['units_requested'] == 4
+    assert result['units_covered'] == 4
+    assert result['exact_matches'] == 2
+    assert result['unassigned_donors'] == []
+    print("  O- donor reserved for O- receiver: ✓ PASSED")
+    
+    # Not enough donors: cover as many units as possible
+    result = assign_donors_to_requests(requests, donors[:1] + donors[3:])
+    assert result['units_covered'] == 2
+    assert [d['email'] for d in result['assignments']['R2']] == ['o-neg@test.com']
+    print("  Partial coverage maximized: ✓ PASSED")
+
+def test_streaming_filter():
+    """Test streaming donor filtering over iterables and JSONL files"""
+    print("\n✓ TEST: Streaming Donor Filtering")
+    
+    groups = get_all_blood_groups()
+    donors = [{'email': f'donor{i}@test.com', 'blood_group': groups[i % 8]} for i in range(50)]
+    expected = filter_compatible_donors(donors, 'B+')
+    
+    # Any iterable, including a generator
+    streamed = list(stream_compatible_donors((d for d in donors), 'B+', chunk_size=7))
+    assert streamed == expected
+    print("  Generator input matches in-memory filter: ✓ PASSED")
+    
+    # JSON Lines file
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            for donor in donors:
+                handle.write(json.dumps(donor) + '\n')
+            handle.write('\n')
+        chunks = list(read_jsonl_chunks(path, chunk_size=20))
+        assert [len(chunk) for chunk in chunks] == [20, 20, 10]
+        assert list(stream_compatible_donors(path, 'B+', chunk_size=20)) == expected
+    finally:
+        os.remove(path)
+    print("  JSONL file input matches in-memory filter: ✓ PASSED")
+
 if __name__ == '__main__':
     try:
         test_blood_compatibility()
+        test_bitmask_engine()
+        test_donor_batch_filtering()
+        test_batch_assignment()
+        test_streaming_filter()
     except AssertionError as e:
         print(f"\n❌ TEST FAILED: {e}")
         exit(1)
@@ -0,0 +1,535 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import app as blood_app
+from blood_cache import PageCache
+from blood_events import RequestFeed
+from blood_expiry import ExpiryScheduler
+from blood_notifications import NotificationOutbox, StubTransport
+from blood_passwords import PasswordHasher
+from blood_storage import SQLiteStorage, create_storage
+
+# Templates live next to app.py in this checkout rather than in templates/
+blood_app.app.template_folder = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def swap(monkeypatch):
+    """
+    Replace a closeable app global for one test: every replacement is closed
+    afterwards (last first), then monkeypatch restores the original
+    """
+    replaced = []
+
+    def swap(name, value):
+        monkeypatch.setattr(blood_app, name, value)
+        replaced.append(value)
+        return value
+
+    yield swap
+    for value in reversed(replaced):
+        value.close()
+
+
+@pytest.fixture(scope="function", params=['memory', 'sqlite'])
+def client(request, tmp_path, swap, monkeypatch):
+    """
+    Fresh storage backend + Flask test client
+    """
+    monkeypatch.setitem(blood_app.app.config, 'TESTING', True)
+    swap('storage', create_storage(request.param, str(tmp_path / 'blood_bank.db')))
+    # Cheap hashes keep the suite fast; cost upgrades are tested separately
+    swap('password_hasher', PasswordHasher('pbkdf2:sha256:1000', workers=2))
+    swap('outbox', NotificationOutbox(StubTransport()))
+    swap('expiry_scheduler', ExpiryScheduler(blood_app.expire_request))
+    monkeypatch.setattr(blood_app, 'page_cache', PageCache(max_entries=100))
+    monkeypatch.setattr(blood_app, 'request_feed',
+                        RequestFeed(compatible_donors=blood_app.get_compatible_donors))
+
+    with blood_app.app.test_client() as test_client:
+        yield test_client
+
+
+def register(client, role, email, blood_group, name='Test User', password='secret'):
+    return client.post(f'/register/{role}', data={
+        'name': name,
+        'email': email,
+        'password': password,
+        'confirm_password': password,
+        'blood_group': blood_group
+    })
+
+
+def login(client, role, email, password='secret'):
+    return client.post(f'/login/{role}', data={'email': email, 'password': password})
+
+
+def make_request(request_id, blood_group, requestor='req@test.com'):
+    return {
+        'id': request_id,
+        'blood_group': blood_group,
+        'units': 1,
+        'requestor_email': requestor,
+        'donor_email': None,
+        'status': 'Requested',
+        'timestamp': '2026-01-01 00:00:00'
+    }
+
+
+# --------------------------------------------------
+# ROUTES
+# --------------------------------------------------
+
+def test_concurrent_donate_route_confirms_once(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    blood_app.storage.add_request(make_request('R1', 'A+'))
+    donor_clients = []
+    for n in range(8):
+        email = f'donor{n}@test.com'
+        register(client, 'donor', email, 'O-')
+        donor_client = blood_app.app.test_client()
+        login(donor_client, 'donor', email)
+        donor_clients.append(donor_client)
+
+    barrier = threading.Barrier(len(donor_clients))
+
+    def accept(donor_client):
+        barrier.wait()
+        donor_client.post('/donate-blood/R1')
+
+    threads = [threading.Thread(target=accept, args=(c,)) for c in donor_clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    histories = [blood_app.storage.get_donation_history(f'donor{n}@test.com') for n in range(8)]
+    assert sorted(len(h) for h in histories) == [0] * 7 + [1]
+    assert blood_app.storage.get_request('R1')['status'] == 'Confirmed'
+
+
+def test_donor_index_counts(client):
+    register(client, 'donor', 'oneg@test.com', 'O-')
+    register(client, 'donor', 'apos@test.com', 'A+')
+    register(client, 'donor', 'bpos@test.com', 'B+')
+    register(client, 'requestor', 'req@test.com', 'A+')
+
+    assert len(blood_app.get_all_donors()) == 3
+    assert blood_app.count_compatible_donors_for_request('A+') == 2
+    assert blood_app.count_compatible_donors_for_request('AB+') == 3
+    assert blood_app.count_compatible_donors_for_request('O-') == 1
+    assert blood_app.count_compatible_donors_for_request('XX') == 0
+    emails = {d['email'] for d in blood_app.get_compatible_donors_for_request('A+')}
+    assert emails == {'oneg@test.com', 'apos@test.com'}
+
+
+def test_request_and_donate_flow(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'donor@test.com', 'O-')
+
+    login(client, 'requestor', 'req@test.com')
+    response = client.post('/request', data={'blood_group': 'A+', 'units': '2'})
+    assert response.status_code == 302
+    request_id = blood_app.get_user_requests('req@test.com')[0]['id']
+    assert client.get('/dashboard').status_code == 200
+    client.get('/logout')
+
+    login(client, 'donor', 'donor@test.com')
+    assert [r['id'] for r in blood_app.get_compatible_active_requests('O-')] == [request_id]
+    assert blood_app.get_compatible_active_requests('AB+') == []
+    assert blood_app.count_compatible_active_requests('O-') == 1
+    assert blood_app.count_compatible_active_requests('AB+') == 0
+    assert blood_app.count_active_requests() == 1
+    assert client.get('/donors').status_code == 200
+
+    response = client.post(f'/donate-blood/{request_id}')
+    assert response.status_code == 302
+    assert blood_app.storage.get_request(request_id)['status'] == 'Confirmed'
+    assert blood_app.get_active_requests() == []
+    assert [r['id'] for r in blood_app.get_donor_accepted_requests('donor@test.com')] == [request_id]
+    assert blood_app.storage.get_donation_history('donor@test.com')[0]['request_id'] == request_id
+    assert client.get('/dashboard').status_code == 200
+
+
+def test_donor_cools_down_after_donating(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'donor@test.com', 'O-')
+    blood_app.storage.add_requests([make_request('R1', 'A+'), make_request('R2', 'A+')])
+    assert blood_app.count_compatible_donors_for_request('A+') == 1
+
+    login(client, 'donor', 'donor@test.com')
+    client.post('/donate-blood/R1')
+    assert blood_app.count_compatible_donors_for_request('A+') == 0
+    assert blood_app.get_compatible_donors_for_request('A+') == []
+
+    # A second donation is refused until the cooldown ends
+    response = client.post('/donate-blood/R2', follow_redirects=True)
+    assert b'can donate again from' in response.data
+    assert blood_app.storage.get_request('R2')['status'] == 'Requested'
+    assert b'Donation cooldown' in client.get('/dashboard').data
+
+def test_requests_expire_from_the_active_set(client, monkeypatch):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    login(client, 'requestor', 'req@test.com')
+
+    # Requests never expire unless asked to
+    assert b'Default: no expiry' in client.get('/request').data
+    client.post('/request', data={'blood_group': 'A+', 'units': '1'})
+    assert blood_app.get_user_requests('req@test.com')[0]['expires_at'] is None
+    assert blood_app.expiry_scheduler.pending() == 0
+
+    monkeypatch.setitem(blood_app.app.config, 'REQUEST_TTL_HOURS', 168)
+    assert b'Default: 168 hours' in client.get('/request').data
+    client.post('/request', data={'blood_group': 'A+', 'units': '1', 'expires_in_hours': '2'})
+    client.post('/request', data={'blood_group': 'A+', 'units': '1', 'expires_in_hours': '0'})
+    client.post('/request', data={'blood_group': 'A+', 'units': '1'})
+    _, short, forever, default = blood_app.get_user_requests('req@test.com')
+    assert forever['expires_at'] is None
+    assert short['expires_at'] < default['expires_at']
+    assert blood_app.expiry_scheduler.pending() == 2
+
+    # Run the scheduler three hours ahead: only the 2-hour request expires
+    assert blood_app.expiry_scheduler.run_due(time.time() + 3 * 3600) == 1
+    assert blood_app.storage.get_request(short['id'])['status'] == 'Expired'
+    assert blood_app.count_active_requests() == 3
+    assert b'No donor accepted this request in time' in client.get('/dashboard').data
+    assert blood_app.outbox.flush()
+    assert [n['kind'] for n in blood_app.outbox.transport.sent].count('request_expired') == 1
+
+    # A request past its expiry is refused even before the scheduler runs
+    blood_app.storage.add_request(dict(make_request('OLD', 'A+'), expires_at='2020-01-01 00:00:00'))
+    register(client, 'donor', 'donor@test.com', 'O-')
+    login(client, 'donor', 'donor@test.com')
+    response = client.post('/donate-blood/OLD', follow_redirects=True)
+    assert b'This request has expired' in response.data
+    assert blood_app.storage.get_request('OLD')['status'] == 'Expired'
+
+
+def test_bulk_request_api_reports_per_item_results(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'donor@test.com', 'O-')
+    assert client.post('/api/requests', json=[]).status_code == 401
+
+    login(client, 'requestor', 'req@test.com')
+    response = client.post('/api/requests', json={'requests': [
+        {'blood_group': 'A+', 'units': 2, 'expires_in_hours': 24},
+        {'blood_group': 'Z+', 'units': 1},
+        {'blood_group': 'O-', 'units': '0'},
+        {'blood_group': 'B+', 'units': 2.5},
+        'not an object',
+        {'blood_group': 'AB-', 'units': '3', 'latitude': 51.5, 'longitude': -0.1,
+         'expires_in_hours': 0},
+    ]})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['created'], body['failed']) == (2, 4)
+    assert [sorted(r) for r in body['results']] == [['id', 'index'], ['error', 'index'],
+                                                     ['error', 'index'], ['error', 'index'],
+                                                     ['error', 'index'], ['id', 'index']]
+    assert body['results'][1]['error'] == 'Unknown blood group: Z+!'
+    assert body['results'][2]['error'] == 'Units must be greater than 0!'
+    assert body['results'][3]['error'] == 'Units must be a valid number!'
+    created = [blood_app.storage.get_request(r['id']) for r in body['results'] if 'id' in r]
+    assert [(r['blood_group'], r['units'], r['expires_at'] is None) for r in created] == \
+        [('A+', 2, False), ('AB-', 3, True)]
+    assert blood_app.count_active_requests() == 2
+
+    assert client.post('/api/requests', json=[{'units': 1}]).status_code == 400
+    assert client.post('/api/requests', data='nope').status_code == 400
+    blood_app.app.config['BULK_REQUEST_MAX_ITEMS'], limit = 1, blood_app.app.config['BULK_REQUEST_MAX_ITEMS']
+    try:
+        assert client.post('/api/requests', json=[{}, {}]).status_code == 413
+    finally:
+        blood_app.app.config['BULK_REQUEST_MAX_ITEMS'] = limit
+
+    login(client, 'donor', 'donor@test.com')
+    assert client.post('/api/requests', json=[]).status_code == 403
+
+
+def test_metrics_endpoint_exports_latency_and_engine_calls(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    login(client, 'requestor', 'req@test.com')
+    calls_before = blood_app.metrics.calls('get_compatible_donors')
+    client.post('/request', data={'blood_group': 'A+', 'units': '1'})
+    client.get('/dashboard')
+    assert blood_app.metrics.calls('get_compatible_donors') > calls_before
+
+    # The live feed's fan-out lookups are counted too
+    calls_before = blood_app.metrics.calls('get_compatible_donors')
+    blood_app.request_feed.publish(make_request('R1', 'O-'))
+    assert blood_app.metrics.calls('get_compatible_donors') == calls_before + 1
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE blood_http_request_duration_seconds histogram' in text
+    assert 'blood_http_request_duration_seconds_bucket{endpoint="dashboard",method="GET",le="+Inf"}' in text
+    assert 'blood_http_requests_total{endpoint="request_blood",method="POST",status="302"}' in text
+    assert 'blood_ai_engine_calls_total{function="get_compatible_donors"}' in text
+    assert 'function="filter_compatible_donors"' not in text
+    assert 'blood_notification_queue_depth ' in text
+
+    # Buckets are cumulative and end at the count
+    dashboard = [line for line in text.splitlines()
+                 if line.startswith('blood_http_request_duration_seconds_') and 'endpoint="dashboard"' in line]
+    buckets = [int(line.rsplit(' ', 1)[1]) for line in dashboard if '_bucket' in line]
+    count = int([line for line in dashboard if '_count' in line][0].rsplit(' ', 1)[1])
+    assert buckets == sorted(buckets) and buckets[-1] == count >= 1
+
+
+def test_request_profiler_aggregates_per_endpoint(client, tmp_path, monkeypatch):
+    assert client.get('/profile-stats').get_json() == {'enabled': False}
+
+    from blood_profiler import RequestProfiler
+    profiles = tmp_path / 'profiles'
+    monkeypatch.setattr(blood_app, 'request_profiler',
+                        RequestProfiler(str(profiles), sample_rate=1.0))
+    register(client, 'requestor', 'req@test.com', 'A+')
+    login(client, 'requestor', 'req@test.com')
+    client.get('/dashboard')
+    client.get('/dashboard')
+
+    stats = client.get('/profile-stats').get_json()
+    assert stats['enabled'] and stats['kept'] >= 4
+    assert {'dashboard', 'login'} <= set(stats['endpoints'])
+    assert (profiles / 'dashboard.prof').exists()
+
+
+def test_metrics_count_requests_that_raise(client, monkeypatch):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    login(client, 'requestor', 'req@test.com')
+
+    def broken_storage():
+        raise RuntimeError('storage unavailable')
+
+    def failures():
+        sample = 'blood_http_requests_total{endpoint="dashboard",method="GET",status="500"} '
+        lines = [line for line in blood_app.metrics.render().splitlines() if line.startswith(sample)]
+        return int(lines[0].rsplit(' ', 1)[1]) if lines else 0
+
+    before = failures()
+    monkeypatch.setattr(blood_app, 'get_current_user', broken_storage)
+    with pytest.raises(RuntimeError):
+        client.get('/dashboard')
+    assert failures() == before + 1
+
+
+def test_donors_and_dashboard_are_paginated(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'donor@test.com', 'O-')
+    blood_app.storage.add_requests([make_request(f'REQ_{i:04d}', 'A+') for i in range(5)])
+
+    login(client, 'donor', 'donor@test.com')
+    seen = []
+    path = '/donors?per_page=2'
+    while path:
+        html = client.get(path).get_data(as_text=True)
+        seen.extend(f'REQ_{i:04d}' for i in range(5) if f'REQ_{i:04d}' in html)
+        assert '<strong>5</strong> compatible request(s)' in html
+        marker = html.find('/donors?after=')
+        path = html[marker:html.index('"', marker)].replace('&amp;', '&') if marker != -1 else None
+    assert seen == [f'REQ_{i:04d}' for i in range(5)]
+    client.get('/logout')
+
+    login(client, 'requestor', 'req@test.com')
+    html = client.get('/dashboard?per_page=3').get_data(as_text=True)
+    assert 'REQ_0002' in html and 'REQ_0003' not in html
+    html = client.get('/dashboard?per_page=3&after=999999').get_data(as_text=True)
+    assert 'REQ_0000' not in html
+
+
+def test_page_cache_invalidated_by_relevant_requests(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'o@test.com', 'O-')
+    register(client, 'donor', 'ab@test.com', 'AB+')
+    ab_client = blood_app.app.test_client()
+    login(ab_client, 'donor', 'ab@test.com')
+    login(client, 'donor', 'o@test.com')
+
+    client.get('/donors')
+    client.get('/donors')
+    ab_client.get('/donors')
+    ab_client.get('/donors')
+    stats = client.get('/cache-stats').get_json()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+    # An O- request is visible to O- donors only: the AB+ view stays cached
+    client.get('/logout')
+    login(client, 'requestor', 'req@test.com')
+    client.post('/request', data={'blood_group': 'O-', 'units': '2'})
+    request_id = blood_app.storage.requests_with_status('Requested')[0]['id']
+    client.get('/logout')
+    login(client, 'donor', 'o@test.com')
+
+    assert request_id.encode() in client.get('/donors').data
+    assert request_id.encode() not in ab_client.get('/donors').data
+    stats = blood_app.page_cache.stats()
+    assert (stats['hits'], stats['misses']) == (3, 3)
+
+    # Confirming it drops the O- view again and refreshes the donor dashboard
+    client.get('/dashboard')
+    client.post(f'/donate-blood/{request_id}', follow_redirects=True)
+    assert request_id.encode() in client.get('/dashboard').data
+    assert request_id.encode() not in client.get('/donors').data
+
+
+def test_listings_answer_conditional_gets(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'o@test.com', 'O-')
+    login(client, 'donor', 'o@test.com')
+    client.get('/dashboard')  # shows the login flash message
+
+    for path in ('/donors', '/dashboard'):
+        first = client.get(path)
+        assert first.status_code == 200 and first.headers['ETag']
+        again = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+        assert again.status_code == 304 and again.data == b''
+
+    # Any new request changes the totals these pages show
+    etag = client.get('/donors').headers['ETag']
+    blood_app.storage.add_request(make_request('R1', 'B+'))
+    changed = client.get('/donors', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+    # Pages carrying a flash message are not reused
+    client.get('/request')
+    response = client.get('/dashboard', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and 'ETag' not in response.headers
+
+
+def test_pages_follow_writes_from_another_worker(client, tmp_path):
+    if not isinstance(blood_app.storage, SQLiteStorage):
+        pytest.skip('only SQLite is shared between worker processes')
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'o@test.com', 'O-')
+    login(client, 'donor', 'o@test.com')
+    client.get('/dashboard')  # shows the login flash message
+
+    etags = {path: client.get(path).headers['ETag'] for path in ('/donors', '/dashboard')}
+    for path in etags:
+        client.get(path)  # cached
+
+    # Another worker's handle on the same database
+    other_worker = create_storage('sqlite', str(tmp_path / 'blood_bank.db'))
+    other_worker.add_request(make_request('REQ_OTHER', 'A+'))
+    other_worker.close()
+
+    donors = client.get('/donors', headers={'If-None-Match': etags['/donors']})
+    assert donors.status_code == 200 and b'REQ_OTHER' in donors.data
+    assert client.get('/donors', headers={'If-None-Match': donors.headers['ETag']}).status_code == 304
+
+    dashboard = client.get('/dashboard', headers={'If-None-Match': etags['/dashboard']})
+    assert dashboard.status_code == 200 and dashboard.headers['ETag'] != etags['/dashboard']
+
+
+def test_event_stream_pushes_compatible_requests(client, monkeypatch):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'o@test.com', 'O-')
+    login(client, 'donor', 'o@test.com')
+    requestor = blood_app.app.test_client()
+    login(requestor, 'requestor', 'req@test.com')
+
+    # Off by default: no stream, and /donors does not subscribe
+    assert client.get('/events').status_code == 404
+    assert b'EventSource' not in client.get('/donors').data
+    monkeypatch.setitem(blood_app.app.config, 'EVENT_FEED_ENABLED', True)
+    assert b'EventSource' in client.get('/donors').data
+
+    response = client.get('/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    assert blood_app.request_feed.subscriber_count('O-') == 1
+
+    requestor.post('/request', data={'blood_group': 'B-', 'units': '3'})
+    request_id = blood_app.storage.requests_with_status('Requested')[0]['id']
+    event = next(chunks).decode()
+    assert event.startswith(f'id: {request_id}\nevent: request\n')
+    assert '"units": 3' in event
+
+    response.close()
+    assert blood_app.request_feed.subscriber_count() == 0
+
+
+def test_request_and_confirmation_notifications(client, swap):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    register(client, 'donor', 'o@test.com', 'O-')
+    # A slow channel must not slow the routes down
+    swap('outbox', NotificationOutbox(StubTransport(delay=0.6)))
+    login(client, 'requestor', 'req@test.com')
+
+    started = time.perf_counter()
+    client.post('/request', data={'blood_group': 'A+', 'units': '2'})
+    assert time.perf_counter() - started < 0.3
+    request_id = blood_app.storage.requests_with_status('Requested')[0]['id']
+
+    client.get('/logout')
+    login(client, 'donor', 'o@test.com')
+    client.post(f'/donate-blood/{request_id}')
+
+    assert blood_app.outbox.flush(timeout=10)
+    sent = blood_app.outbox.transport.sent
+    assert [n['kind'] for n in sent] == ['request_created', 'request_confirmed']
+    assert sent[0]['donor_groups'] == ['A+', 'A-', 'O+', 'O-']
+    assert sent[1]['recipient'] == 'req@test.com'
+    stats = client.get('/notification-stats').get_json()
+    assert stats['delivered'] == 2 and stats['queue_depth'] == 0
+
+
+def test_dashboard_lists_nearest_compatible_donors(client):
+    register(client, 'requestor', 'req@test.com', 'A+')
+    for email, name, group, lat, lon in [('near@test.com', 'Near Donor', 'O-', '51.51', '-0.13'),
+                                         ('far@test.com', 'Far Donor', 'O-', '48.85', '2.35'),
+                                         ('wrong@test.com', 'Wrong Group', 'B+', '51.51', '-0.13')]:
+        client.post('/register/donor', data={
+            'name': name, 'email': email, 'password': 'secret', 'confirm_password': 'secret',
+            'blood_group': group, 'latitude': lat, 'longitude': lon})
+    response = client.post('/register/donor', data={
+        'name': 'Bad', 'email': 'bad@test.com', 'password': 'secret',
+        'confirm_password': 'secret', 'blood_group': 'O-', 'latitude': '95', 'longitude': '0'})
+    assert b'valid latitude and longitude' in response.data
+    assert blood_app.storage.get_user('bad@test.com') is None
+
+    login(client, 'requestor', 'req@test.com')
+    client.post('/request', data={'blood_group': 'A+', 'units': '1',
+                                  'latitude': '51.50', 'longitude': '-0.12'})
+    page = client.get('/dashboard').data.decode()
+    assert 'Nearest compatible donors' in page
+    assert 'Near Donor (O-)' in page
+    assert 'Far Donor' not in page and 'Wrong Group' not in page
+
+
+def test_password_hash_upgraded_on_login(client, swap):
+    register(client, 'donor', 'donor@test.com', 'O-')
+    old_hash = blood_app.storage.get_user('donor@test.com')['password']
+    assert old_hash.startswith('pbkdf2:sha256:1000$')
+
+    # Raise the configured cost: the next successful login rehashes
+    swap('password_hasher', PasswordHasher('pbkdf2:sha256:2000', workers=2))
+    login(client, 'donor', 'donor@test.com', password='wrong')
+    assert blood_app.storage.get_user('donor@test.com')['password'] == old_hash
+
+    response = login(client, 'donor', 'donor@test.com')
+    assert response.status_code == 302
+    new_hash = blood_app.storage.get_user('donor@test.com')['password']
+    assert new_hash.startswith('pbkdf2:sha256:2000$')
+    assert not blood_app.password_hasher.needs_rehash(new_hash)
+
+    client.get('/logout')
+    assert login(client, 'donor', 'donor@test.com').status_code == 302
+
+
+def test_importing_the_app_starts_no_threads_or_hashes():
+    probe = ("import threading, app; "
+             "print(threading.active_count(), app.password_hasher._prefix, "
+             "app.outbox._dispatcher, app.expiry_scheduler._thread)")
+    result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=dict(os.environ, BLOOD_STORAGE_BACKEND='memory'), check=True)
+    assert result.stdout.split() == ['1', 'None', 'None', 'None']
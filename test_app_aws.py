@@ -1,3 +1,4 @@
+import json
 import os
 import boto3
 import pytest
@@ -63,4 +64,24 @@ def client():
         app_aws.app.config['TESTING'] = True
 
         with app_aws.app.test_client() as test_client:
-            yield test_client
\ No newline at end of file
+            yield test_client
+
+
+def test_notifications_reach_the_configured_topic(client):
+    import app_aws
+
+    # Capture what the topic set by the fixture receives
+    sqs = boto3.client('sqs', region_name='us-east-1')
+    queue_url = sqs.create_queue(QueueName='notifications')['QueueUrl']
+    queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url,
+                                         AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+    app_aws.sns.subscribe(TopicArn=app_aws.SNS_TOPIC_ARN, Protocol='sqs', Endpoint=queue_arn)
+
+    app_aws.send_notification('New User Signup', 'User ann has signed up.')
+    assert app_aws.notification_outbox.flush()
+
+    messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10)['Messages']
+    assert len(messages) == 1
+    body = json.loads(messages[0]['Body'])
+    assert body['TopicArn'] == app_aws.SNS_TOPIC_ARN
+    assert (body['Subject'], body['Message']) == ('New User Signup', 'User ann has signed up.')
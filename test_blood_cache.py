@@ -0,0 +1,14 @@
+from blood_cache import PageCache
+
+
+def test_page_cache_lru_eviction():
+    cache = PageCache(max_entries=2)
+    cache.put('a', 1, tags=['x'])
+    cache.put('b', 2, tags=['y'])
+    assert cache.get('a') == 1
+    cache.put('c', 3, tags=['x'])
+    assert cache.get('b') is None
+    cache.invalidate('x')
+    assert cache.get('a') is None and cache.get('c') is None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['invalidations'] == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from blood_events import FeedFullError, RequestFeed
+
+
+def make_request(request_id, blood_group):
+    return {'id': request_id, 'blood_group': blood_group, 'units': 1,
+            'timestamp': '2026-01-01 00:00:00'}
+
+
+def test_request_feed_fans_out_by_compatibility():
+    feed = RequestFeed(max_subscribers=3)
+    o_neg, a_pos, ab_pos = feed.subscribe('O-'), feed.subscribe('A+'), feed.subscribe('AB+')
+    with pytest.raises(FeedFullError):
+        feed.subscribe('B+')
+
+    assert feed.publish(make_request('R1', 'A+')) == 2
+    assert feed.publish(make_request('R2', 'O-')) == 1
+    assert [e['id'] for e in o_neg.wait(0)] == ['R1', 'R2']
+    assert [e['id'] for e in a_pos.wait(0)] == ['R1']
+    assert ab_pos.wait(0) == []
+
+    feed.unsubscribe(o_neg)
+    feed.unsubscribe(o_neg)
+    assert feed.subscriber_count() == 2
+    assert feed.publish(make_request('R3', 'O-')) == 0
@@ -0,0 +1,27 @@
+import time
+
+from blood_expiry import ExpiryScheduler, expiry_time
+
+
+def test_scheduler_pops_due_requests_in_order():
+    expired = []
+    scheduler = ExpiryScheduler(lambda request_id: expired.append(request_id) or request_id != 'R2')
+    for request_id, expires_at in [('R3', '2099-01-03 00:00:00'), ('R1', '2099-01-01 00:00:00'),
+                                   ('R2', '2099-01-02 00:00:00')]:
+        scheduler.schedule(request_id, expires_at)
+    scheduler.schedule('R4', None)
+
+    assert scheduler.run_due(expiry_time('2098-12-31 00:00:00')) == 0
+    # R2 was confirmed meanwhile: its entry is dropped but not counted
+    assert scheduler.run_due(expiry_time('2099-01-02 00:00:00')) == 1
+    assert expired == ['R1', 'R2']
+    assert scheduler.stats()['pending'] == 1
+    assert scheduler.stats()['next_expiry'] == '2099-01-03 00:00:00'
+
+    # Real time: a request due now is expired by the background thread
+    scheduler.schedule('R5', '2000-01-01 00:00:00')
+    deadline = time.time() + 5
+    while 'R5' not in expired and time.time() < deadline:
+        time.sleep(0.01)
+    assert expired[-1] == 'R5'
+    scheduler.close()
@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from blood_import import DonorImporter, main
+from blood_storage import JournaledMemoryStorage, create_storage
+
+
+@pytest.fixture(scope="function", params=['memory', 'journal', 'sqlite'])
+def storage(request, tmp_path):
+    backend = create_storage(request.param, sqlite_path=str(tmp_path / 'blood_bank.db'),
+                             journal_dir=str(tmp_path / 'journal'))
+    yield backend
+    backend.close()
+
+
+def test_donor_csv_import(storage):
+    lines = [
+        'name,email,blood_group,password,password_hash,latitude,longitude,last_donation',
+        'Ann,ann@test.com,O-,secret,,51.5,-0.1,2026-03-01',
+        'Bob,bob@test.com,A+,,pbkdf2:sha256:1000$salt$abc,,,',
+        'Bad Group,bad@test.com,Q+,secret,,,,',
+        'No Password,nopw@test.com,B+,,,,,',
+        'Ann Again,ann@test.com,O-,secret,,,,',
+        'Cal,cal@test.com,B+,secret,,,,2026-13-01',
+        'Dee,dee@test.com,AB+,secret,,,,',
+    ]
+    errors = []
+    importer = DonorImporter(storage, 'pbkdf2:sha256:1000', chunk_size=2, workers=2,
+                             on_error=lambda line, message: errors.append((line, message)))
+    stats = importer.run(lines)
+
+    assert {key: stats[key] for key in ('rows', 'imported', 'duplicates', 'invalid', 'donations')} == \
+        {'rows': 7, 'imported': 3, 'duplicates': 1, 'invalid': 3, 'donations': 1}
+    assert [line for line, _ in errors] == [4, 5, 7]
+    assert storage.get_user('ann@test.com')['password'].startswith('pbkdf2:sha256:1000$')
+    assert storage.get_user('bob@test.com')['password'] == 'pbkdf2:sha256:1000$salt$abc'
+    assert storage.get_user('ann@test.com')['latitude'] == 51.5
+    assert storage.count_donors(['O-', 'A+', 'AB+'], eligible_on=date(2026, 4, 1)) == 2
+
+    with pytest.raises(ValueError):
+        DonorImporter(storage).run(['email,blood_group'])
+
+
+def test_email_repeated_within_a_chunk_records_one_donation(storage):
+    lines = [
+        'name,email,blood_group,password_hash,last_donation',
+        'Ann,ann@test.com,O-,pbkdf2:sha256:1000$salt$abc,2026-03-01',
+        'Ann Again,ann@test.com,O-,pbkdf2:sha256:1000$salt$def,2026-04-01',
+    ]
+    stats = DonorImporter(storage, chunk_size=10, workers=1).run(lines)
+
+    assert (stats['imported'], stats['duplicates'], stats['donations']) == (1, 1, 1)
+    assert storage.get_user('ann@test.com')['name'] == 'Ann'
+    # Only Ann's March donation counts: she can give again in April
+    assert storage.count_donors(['O-'], eligible_on=date(2026, 6, 1)) == 1
+
+
+def test_future_last_donation_is_rejected(storage):
+    errors = []
+    lines = [
+        'name,email,blood_group,password_hash,last_donation',
+        f'Ann,ann@test.com,O-,pbkdf2:sha256:1000$salt$abc,{date.today().year + 1}-01-01',
+    ]
+    stats = DonorImporter(storage, workers=1,
+                          on_error=lambda line, message: errors.append(message)).run(lines)
+
+    assert (stats['invalid'], stats['imported']) == (1, 0)
+    assert 'future' in errors[0]
+    assert storage.get_user('ann@test.com') is None
+
+
+def test_import_refuses_a_journal_held_by_the_app(tmp_path, capsys):
+    csv_path = tmp_path / 'donors.csv'
+    csv_path.write_text('name,email,blood_group,password\nAnn,ann@test.com,O-,secret\n')
+    journal_dir = str(tmp_path / 'journal')
+    args = [str(csv_path), '--backend', 'journal', '--journal-dir', journal_dir,
+            '--hash-method', 'pbkdf2:sha256:1000', '--workers', '1']
+
+    running_app = JournaledMemoryStorage(journal_dir)
+    assert main(args) == 2
+    assert 'stop the app' in capsys.readouterr().err
+    running_app.close()
+
+    assert main(args) == 0
+    restarted = JournaledMemoryStorage(journal_dir)
+    assert restarted.get_user('ann@test.com')['blood_group'] == 'O-'
+    restarted.close()
@@ -0,0 +1,9 @@
+from blood_metrics import Metrics
+
+
+def test_counters_are_exported_before_the_first_call():
+    metrics = Metrics(prefix='blood')
+    lookup = metrics.counted('get_compatible_donors', lambda group: [group])
+    assert 'blood_ai_engine_calls_total{function="get_compatible_donors"} 0' in metrics.render()
+    lookup('O-')
+    assert metrics.calls('get_compatible_donors') == 1
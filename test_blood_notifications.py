@@ -0,0 +1,49 @@
+import boto3
+from moto import mock_aws
+
+from blood_notifications import NotificationOutbox, SNSTransport, StubTransport
+
+
+def test_outbox_retries_with_backoff():
+    outbox = NotificationOutbox(StubTransport(fail_times=2), batch_size=10, base_backoff=0.01)
+    for n in range(25):
+        outbox.enqueue('test', f'subject {n}', 'message')
+    assert outbox.flush(timeout=10)
+    stats = outbox.stats()
+    assert stats['delivered'] == 25 and stats['dead'] == 0
+    assert stats['retries'] == 20          # the first two batches of 10 failed once
+    assert sorted(n['subject'] for n in outbox.transport.sent) == sorted(f'subject {n}' for n in range(25))
+    outbox.close()
+
+    outbox = NotificationOutbox(StubTransport(fail_times=100), max_attempts=3, base_backoff=0.01)
+    outbox.enqueue('test', 'subject', 'message')
+    assert outbox.flush(timeout=10)
+    assert (outbox.stats()['dead'], outbox.stats()['retries']) == (1, 2)
+    outbox.close()
+
+
+def test_sns_transport_publishes_in_batches():
+    with mock_aws():
+        sns = boto3.client('sns', region_name='us-east-1')
+        topic_arn = sns.create_topic(Name='blood-requests')['TopicArn']
+        transport = SNSTransport(topic_arn, client=sns)
+        batch = [{'subject': f'Request {n}', 'message': 'A+ needed'} for n in range(23)]
+        assert transport.send(batch) == []
+
+
+def test_sns_transport_retries_only_the_failed_chunk():
+    class FlakySNS:
+        def __init__(self):
+            self.calls = 0
+
+        def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+            self.calls += 1
+            if self.calls == 2:
+                raise ConnectionError('endpoint unreachable')
+            return {'Successful': [{'Id': e['Id']} for e in PublishBatchRequestEntries]}
+
+    client = FlakySNS()
+    transport = SNSTransport('arn:aws:sns:us-east-1:123456789012:blood', client=client)
+    batch = [{'subject': f'Request {n}', 'message': 'A+ needed'} for n in range(23)]
+    assert transport.send(batch) == batch[10:20]
+    assert client.calls == 3
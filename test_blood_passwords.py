@@ -0,0 +1,25 @@
+import threading
+
+import pytest
+
+from blood_passwords import HasherBusyError, PasswordHasher
+
+
+def test_password_hasher_is_bounded():
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait()
+
+    blocker = threading.Thread(target=hasher._run, args=(slow_hash,))
+    blocker.start()
+    started.wait()
+    with pytest.raises(HasherBusyError):
+        hasher.hash('secret')
+    release.set()
+    blocker.join()
+    assert hasher.verify(hasher.hash('secret'), 'secret')
+    hasher.close()
@@ -0,0 +1,27 @@
+import os
+import pstats
+
+from blood_profiler import RequestProfiler
+
+
+def test_keeps_sampled_and_slow_requests(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), slow_ms=100, max_bytes=10_000_000,
+                               rng=lambda: 1.0)
+    assert not profiler.finish(profiler.start(), 'dashboard', 0.01)   # fast: discarded
+    assert profiler.finish(profiler.start(), 'dashboard', 0.5)        # slow: kept
+    assert profiler.stats()['profiled'] == 2 and profiler.stats()['kept'] == 1
+    pstats.Stats(str(tmp_path / 'dashboard.prof'))
+
+    # Neither sampled nor a slow threshold: nothing is profiled
+    assert RequestProfiler(str(tmp_path), sample_rate=0.5, rng=lambda: 0.9).start() is None
+
+
+def test_profiles_one_request_at_a_time_and_rotates(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, max_bytes=1, backups=2)
+    token = profiler.start()
+    assert profiler.start() is None and profiler.stats()['busy'] == 1
+    profiler.finish(token, 'api/requests', 0.01)
+    profiler.finish(profiler.start(), 'api/requests', 0.01)
+    profiler.finish(profiler.start(), 'api/requests', 0.01)
+    assert sorted(os.listdir(tmp_path)) == ['api_requests.prof.1', 'api_requests.prof.2']
+    assert profiler.stats()['rotations'] == 3
@@ -0,0 +1,568 @@
+import os
+import threading
+import time
+
+import pytest
+
+from blood_storage import JournaledMemoryStorage, JournalLockedError, RequestStore, create_storage
+
+
+def make_request(request_id, blood_group, requestor='req@test.com'):
+    return {
+        'id': request_id,
+        'blood_group': blood_group,
+        'units': 1,
+        'requestor_email': requestor,
+        'donor_email': None,
+        'status': 'Requested',
+        'timestamp': '2026-01-01 00:00:00'
+    }
+
+
+def make_user(email, role, blood_group):
+    return {
+        'id': f'ID_{email}',
+        'name': email,
+        'email': email,
+        'password': 'hash',
+        'blood_group': blood_group,
+        'role': role
+    }
+
+
+@pytest.fixture(scope="function", params=['memory', 'journal', 'sqlite'])
+def storage(request, tmp_path):
+    backend = create_storage(request.param, sqlite_path=str(tmp_path / 'blood_bank.db'),
+                             journal_dir=str(tmp_path / 'journal'))
+    yield backend
+    backend.close()
+
+
+# --------------------------------------------------
+# IN-MEMORY REQUEST STORE
+# --------------------------------------------------
+
+def test_request_store_indexes():
+    store = RequestStore()
+    store.add(make_request('R1', 'A+'))
+    store.add(make_request('R2', 'O-', requestor='other@test.com'))
+    store.add(make_request('R3', 'A+'))
+
+    assert store.get('R2')['blood_group'] == 'O-'
+    assert store.get('missing') is None
+    assert [r['id'] for r in store.by_requestor('req@test.com')] == ['R1', 'R3']
+    assert [r['id'] for r in store.with_status('Requested')] == ['R1', 'R2', 'R3']
+    assert [r['id'] for r in store.with_status('Requested', ['A+'])] == ['R1', 'R3']
+
+    store.update_status('R1', 'Confirmed', donor_email='donor@test.com')
+    assert [r['id'] for r in store.with_status('Requested', ['A+', 'O-'])] == ['R2', 'R3']
+    assert [r['id'] for r in store.by_donor('donor@test.com', status='Confirmed')] == ['R1']
+    assert store.get('R1')['donor_email'] == 'donor@test.com'
+
+    with pytest.raises(ValueError):
+        store.add(make_request('R1', 'B+'))
+
+
+def test_request_store_counts_under_concurrency():
+    store = RequestStore()
+    groups = ['A+', 'O-', 'B+', 'AB-']
+
+    def worker(thread_no):
+        for i in range(200):
+            request_id = f'T{thread_no}_{i}'
+            store.add(make_request(request_id, groups[i % 4]))
+            if i % 2:
+                store.update_status(request_id, 'Confirmed', donor_email=f'd{thread_no}@test.com')
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.count('Requested') == 800
+    assert store.count('Confirmed') == 800
+    assert store.count('Requested', ['A+', 'B+']) == 800
+    assert store.count('Requested', ['O-']) == 0
+    assert store.count('Requested') == len(store.with_status('Requested'))
+    assert store.count('Confirmed', ['O-', 'AB-']) == 800
+
+
+def test_concurrent_claims_have_exactly_one_winner():
+    store = RequestStore()
+    request_count, donor_count = 500, 16
+    for i in range(request_count):
+        store.add(make_request(f'R{i}', 'A+'))
+
+    wins = [[] for _ in range(donor_count)]
+    barrier = threading.Barrier(donor_count)
+
+    def donor(donor_no):
+        barrier.wait()
+        for i in range(request_count):
+            if store.claim(f'R{i}', f'donor{donor_no}@test.com') is not None:
+                wins[donor_no].append(f'R{i}')
+
+    threads = [threading.Thread(target=donor, args=(n,)) for n in range(donor_count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    claimed = [request_id for donor_wins in wins for request_id in donor_wins]
+    assert sorted(claimed) == sorted(f'R{i}' for i in range(request_count))
+    assert store.count('Requested') == 0
+    assert store.count('Confirmed') == request_count
+    for donor_no, donor_wins in enumerate(wins):
+        assert [r['id'] for r in store.by_donor(f'donor{donor_no}@test.com')] == donor_wins
+
+    attempts = request_count * donor_count
+    print(f"\n  {attempts:,} concurrent claim attempts in {elapsed * 1000:.1f} ms "
+          f"({attempts / elapsed:,.0f} claims/sec)")
+
+
+def test_claims_on_other_stripes_are_not_blocked():
+    store = RequestStore()
+    store.add(make_request('HELD', 'A+'))
+    held_stripe = store._stripe_lock('HELD')
+    other = next(f'R{i}' for i in range(1000) if store._stripe_lock(f'R{i}') is not held_stripe)
+    store.add(make_request(other, 'A+'))
+
+    # While HELD's stripe is busy, a claim on it waits...
+    results = []
+    with held_stripe:
+        waiting = threading.Thread(target=lambda: results.append(store.claim('HELD', 'a@test.com')))
+        waiting.start()
+        waiting.join(0.2)
+        assert waiting.is_alive() and results == []
+        # ...but a claim on a request in another stripe goes through
+        assert store.claim(other, 'b@test.com')['donor_email'] == 'b@test.com'
+        assert store.count('Confirmed') == 1
+    waiting.join()
+    assert results[0]['donor_email'] == 'a@test.com'
+    assert store.claim('HELD', 'late@test.com') is None
+
+
+# --------------------------------------------------
+# BACKEND CONTRACT (memory + sqlite)
+# --------------------------------------------------
+
+def test_users_and_donor_groups(storage):
+    assert storage.add_user(make_user('oneg@test.com', 'donor', 'O-'))
+    assert storage.add_user(make_user('apos@test.com', 'donor', 'A+'))
+    assert storage.add_user(make_user('req@test.com', 'requestor', 'A+'))
+    assert not storage.add_user(make_user('oneg@test.com', 'donor', 'B+'))
+
+    assert storage.get_user('apos@test.com')['blood_group'] == 'A+'
+    assert storage.get_user('missing@test.com') is None
+    assert {d['email'] for d in storage.all_donors()} == {'oneg@test.com', 'apos@test.com'}
+    assert [d['email'] for d in storage.donors_for_groups(['O-'])] == ['oneg@test.com']
+    assert storage.count_donors(['A+', 'O-']) == 2
+    assert storage.count_donors([]) == 0
+
+
+def test_request_indexes_and_claims(storage):
+    storage.add_request(make_request('R1', 'A+'))
+    storage.add_requests([make_request('R2', 'O-', requestor='other@test.com'),
+                          make_request('R3', 'A+')])
+    with pytest.raises(ValueError):
+        storage.add_requests([make_request('R4', 'B+'), make_request('R1', 'B+')])
+    assert storage.get_request('R4') is None
+
+    assert [r['id'] for r in storage.requests_by_requestor('req@test.com')] == ['R1', 'R3']
+    assert [r['id'] for r in storage.requests_with_status('Requested')] == ['R1', 'R2', 'R3']
+    assert [r['id'] for r in storage.requests_with_status('Requested', ['A+'])] == ['R1', 'R3']
+    assert storage.count_requests('Requested', ['A+', 'O-']) == 3
+
+    assert storage.claim_request('R1', 'donor@test.com')['status'] == 'Confirmed'
+    assert storage.claim_request('R1', 'late@test.com') is None
+    assert storage.claim_request('missing', 'donor@test.com') is None
+    assert [r['id'] for r in storage.requests_by_donor('donor@test.com', 'Confirmed')] == ['R1']
+    assert storage.count_requests('Requested') == 2
+
+    storage.update_request_status('R2', 'Cancelled')
+    assert storage.get_request('R2')['status'] == 'Cancelled'
+    assert storage.get_request('R2')['donor_email'] is None
+
+
+def test_donation_history(storage):
+    entry = {'request_id': 'R1', 'blood_group': 'A+', 'requestor_email': 'req@test.com',
+             'date_time': '2026-01-01 00:00:00'}
+    storage.add_donation('donor@test.com', entry)
+    storage.add_donation('donor@test.com', dict(entry, request_id='R2'))
+    assert [e['request_id'] for e in storage.get_donation_history('donor@test.com')] == ['R1', 'R2']
+    assert storage.get_donation_history('nobody@test.com') == []
+
+
+def test_expire_request_only_moves_open_requests(storage):
+    storage.add_requests([dict(make_request('R1', 'A+'), expires_at='2026-05-01 12:00:00'),
+                          dict(make_request('R2', 'A+'), expires_at='2026-05-01 13:00:00'),
+                          make_request('R3', 'A+')])
+    assert sorted(storage.pending_expiries()) == [('R1', '2026-05-01 12:00:00'),
+                                                  ('R2', '2026-05-01 13:00:00')]
+    storage.claim_request('R2', 'donor@test.com')
+
+    assert storage.expire_request('R1')['status'] == 'Expired'
+    assert storage.expire_request('R1') is None
+    assert storage.expire_request('R2') is None
+    assert storage.get_request('R2')['status'] == 'Confirmed'
+    assert [r['id'] for r in storage.requests_with_status('Requested')] == ['R3']
+    assert storage.count_requests('Expired', ['A+']) == 1
+    assert storage.pending_expiries() == []
+
+
+def test_donation_cooldown_hides_donors_until_eligible(storage):
+    from datetime import date
+
+    storage.add_user(located_donor('recent@test.com', 'O-', 51.51, -0.13))
+    storage.add_user(located_donor('rested@test.com', 'O-', 51.52, -0.13))
+    storage.add_user(make_user('other@test.com', 'donor', 'A+'))
+    entry = {'request_id': 'R1', 'blood_group': 'A+', 'requestor_email': 'req@test.com',
+             'date_time': '2026-03-01 10:00:00'}
+    storage.add_donation('recent@test.com', entry)
+    assert storage.get_user('recent@test.com')['next_eligible'] == '2026-04-26'
+
+    groups = ['O-', 'A+']
+    cooling, after = date(2026, 4, 25), date(2026, 4, 26)
+    assert storage.count_donors(groups) == 3
+    assert storage.count_donors(groups, eligible_on=cooling) == 2
+    assert sorted(d['email'] for d in storage.donors_for_groups(groups, eligible_on=cooling)) == \
+        ['other@test.com', 'rested@test.com']
+    assert [d['email'] for d in storage.nearest_donors(51.51, -0.13, ['O-'], k=5,
+                                                       eligible_on=cooling)] == ['rested@test.com']
+
+    # The cooldown ends on its day; a later donation pushes it further out
+    assert storage.count_donors(groups, eligible_on=after) == 3
+    assert len(storage.nearest_donors(51.51, -0.13, ['O-'], k=5, eligible_on=after)) == 2
+    storage.add_donation('rested@test.com', dict(entry, date_time='2026-04-20 09:00:00'))
+    assert storage.count_donors(['O-'], eligible_on=after) == 1
+    assert storage.count_donors(['O-'], eligible_on=date(2026, 6, 15)) == 2
+
+
+def test_journal_restores_donation_cooldowns(tmp_path):
+    from datetime import date
+
+    directory = str(tmp_path / 'journal')
+    entry = {'request_id': 'R1', 'blood_group': 'B+', 'requestor_email': 'req@test.com',
+             'date_time': '2026-03-01 10:00:00'}
+    storage = JournaledMemoryStorage(directory)
+    storage.add_user(make_user('snap@test.com', 'donor', 'B+'))
+    storage.add_donation('snap@test.com', entry)
+    storage.snapshot()
+    storage.add_user(make_user('tail@test.com', 'donor', 'B+'))
+    storage.add_donation('tail@test.com', entry)
+    storage.close()
+
+    restored = JournaledMemoryStorage(directory)
+    assert restored.count_donors(['B+'], eligible_on=date(2026, 4, 1)) == 0
+    assert restored.count_donors(['B+'], eligible_on=date(2026, 4, 26)) == 2
+    restored.close()
+
+
+def test_bulk_users_and_donations(storage):
+    from datetime import date
+
+    added = storage.add_users([make_user('a@test.com', 'donor', 'O-'),
+                               make_user('b@test.com', 'donor', 'A+'),
+                               make_user('a@test.com', 'donor', 'B+')])
+    assert [u['email'] for u in added] == ['a@test.com', 'b@test.com']
+    assert storage.add_users([make_user('b@test.com', 'donor', 'A+')]) == []
+    assert storage.count_donors(['O-', 'A+', 'B+']) == 2
+
+    entry = {'request_id': 'IMPORTED', 'blood_group': 'O-', 'requestor_email': '',
+             'date_time': '2026-03-01 00:00:00'}
+    tag = storage.change_tag(['A+'])
+    storage.add_donations([('a@test.com', entry),
+                           ('b@test.com', dict(entry, blood_group='A+')),
+                           ('b@test.com', dict(entry, blood_group='A+', date_time='2026-02-01 00:00:00'))])
+    assert storage.change_tag(['A+']) != tag
+    assert len(storage.get_donation_history('b@test.com')) == 2
+    assert storage.count_donors(['O-', 'A+'], eligible_on=date(2026, 4, 1)) == 0
+    assert storage.count_donors(['O-', 'A+'], eligible_on=date(2026, 4, 26)) == 2
+
+
+def test_change_tags_follow_group_writes(storage):
+    start = storage.change_tag(['A+', 'O-'])
+    storage.add_request(make_request('R1', 'A+'))
+    after_add = storage.change_tag(['A+', 'O-'])
+    assert after_add != start
+
+    # Writes to other groups leave the tag alone
+    storage.add_request(make_request('R2', 'B+'))
+    storage.add_user(make_user('donor@test.com', 'donor', 'AB+'))
+    storage.add_user(make_user('req@test.com', 'requestor', 'O-'))
+    assert storage.change_tag(['A+', 'O-']) == after_add
+    assert storage.change_tag() != storage.change_tag(['A+'])
+
+    tags = [storage.change_tag(['A+'])]
+    storage.claim_request('R1', 'donor@test.com')
+    tags.append(storage.change_tag(['A+']))
+    assert storage.claim_request('R1', 'other@test.com') is None
+    assert storage.change_tag(['A+']) == tags[-1]
+    storage.add_donation('donor@test.com', {'request_id': 'R1', 'blood_group': 'A+',
+                                            'requestor_email': 'req@test.com',
+                                            'date_time': '2026-01-01 00:00:00'})
+    tags.append(storage.change_tag(['A+']))
+    storage.update_request_status('R1', 'Requested')
+    tags.append(storage.change_tag(['A+']))
+    assert len(set(tags)) == 4
+
+
+def test_concurrent_backend_claims(storage):
+    for i in range(50):
+        storage.add_request(make_request(f'R{i}', 'O+'))
+    winners = []
+
+    def donor(donor_no):
+        for i in range(50):
+            if storage.claim_request(f'R{i}', f'donor{donor_no}@test.com') is not None:
+                winners.append(f'R{i}')
+
+    threads = [threading.Thread(target=donor, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(winners) == sorted(f'R{i}' for i in range(50))
+    assert storage.count_requests('Confirmed') == 50
+
+
+# --------------------------------------------------
+# JOURNAL + SNAPSHOTS
+# --------------------------------------------------
+
+def fill(storage):
+    storage.add_user(make_user('donor@test.com', 'donor', 'O-'))
+    storage.add_user(make_user('req@test.com', 'requestor', 'A+'))
+    storage.add_requests([make_request(f'R{i}', 'A+') for i in range(5)])
+    storage.claim_request('R1', 'donor@test.com')
+    storage.add_donation('donor@test.com', {'request_id': 'R1', 'blood_group': 'A+',
+                                            'requestor_email': 'req@test.com',
+                                            'date_time': '2026-01-01 00:00:00'})
+    storage.update_request_status('R3', 'Cancelled')
+
+
+def assert_filled(storage):
+    assert storage.get_user('donor@test.com')['role'] == 'donor'
+    assert storage.count_donors(['O-']) == 1
+    assert [r['id'] for r in storage.requests_with_status('Requested', ['A+'])] == ['R0', 'R2', 'R4']
+    assert storage.get_request('R1')['donor_email'] == 'donor@test.com'
+    assert storage.get_request('R3')['status'] == 'Cancelled'
+    assert [e['request_id'] for e in storage.get_donation_history('donor@test.com')] == ['R1']
+
+
+def test_journal_replay_after_restart(tmp_path):
+    storage = create_storage('journal', journal_dir=str(tmp_path))
+    fill(storage)
+    # A second process on the same journal would interleave its entries
+    with pytest.raises(JournalLockedError):
+        create_storage('journal', journal_dir=str(tmp_path))
+    storage.close()
+
+    restarted = create_storage('journal', journal_dir=str(tmp_path))
+    assert_filled(restarted)
+    restarted.add_request(make_request('R5', 'B+'))
+    restarted.close()
+
+    again = create_storage('journal', journal_dir=str(tmp_path))
+    assert again.get_request('R5')['blood_group'] == 'B+'
+    again.close()
+
+
+def test_snapshot_compacts_journal(tmp_path):
+    storage = JournaledMemoryStorage(str(tmp_path), snapshot_every=1_000_000)
+    fill(storage)
+    storage.snapshot()
+    storage.add_request(make_request('R5', 'B+'))
+    storage.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert names == ['LOCK', 'journal-000000000006.jsonl', 'snapshot-000000000006.json']
+
+    restarted = JournaledMemoryStorage(str(tmp_path))
+    assert_filled(restarted)
+    assert restarted.get_request('R5')['status'] == 'Requested'
+    restarted.close()
+
+
+def test_group_commit_and_torn_tail(tmp_path):
+    storage = JournaledMemoryStorage(str(tmp_path), sync_interval=0.01, snapshot_every=3)
+    fill(storage)
+    deadline = time.time() + 5
+    while not any(name.startswith('snapshot-') for name in os.listdir(tmp_path)):
+        assert time.time() < deadline, "background snapshot was not written"
+        time.sleep(0.01)
+    storage.close()
+
+    # Simulate a crash in the middle of a journal write
+    segment = sorted(n for n in os.listdir(tmp_path) if n.startswith('journal-'))[-1]
+    with open(tmp_path / segment, 'a', encoding='utf-8') as handle:
+        handle.write('{"op": "add_requests", "requ')
+
+    restarted = JournaledMemoryStorage(str(tmp_path))
+    assert_filled(restarted)
+    restarted.close()
+
+
+# --------------------------------------------------
+# SHARED STATE ACROSS PROCESSES (sqlite)
+# --------------------------------------------------
+
+def _worker_register_and_claim(path, worker_no, results):
+    storage = create_storage('sqlite', sqlite_path=path)
+    storage.add_user(make_user(f'worker{worker_no}@test.com', 'donor', 'O-'))
+    wins = sum(storage.claim_request(f'R{i}', f'worker{worker_no}@test.com') is not None
+               for i in range(40))
+    results.put(wins)
+    storage.close()
+
+
+def test_sqlite_state_is_shared_between_processes(tmp_path):
+    import multiprocessing
+
+    path = str(tmp_path / 'shared.db')
+    # Opened before forking, like an app preloaded by a prefork server
+    parent = create_storage('sqlite', sqlite_path=path)
+    parent.add_requests([make_request(f'R{i}', 'A+') for i in range(40)])
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    workers = [context.Process(target=_worker_register_and_claim, args=(path, n, results))
+               for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    assert sum(results.get() for _ in workers) == 40
+    assert parent.count_requests('Confirmed') == 40
+    assert parent.count_donors(['O-']) == 4
+    parent.close()
+
+
+# --------------------------------------------------
+# KEYSET PAGINATION
+# --------------------------------------------------
+
+def collect_pages(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = fetch(after=cursor, limit=limit)
+        pages.append([r['id'] for r in page])
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages(storage):
+    groups = ['A+', 'O-', 'B+']
+    storage.add_requests([make_request(f'R{i}', groups[i % 3],
+                                       requestor='req@test.com' if i % 2 else 'other@test.com')
+                          for i in range(10)])
+    storage.claim_request('R3', 'donor@test.com')
+
+    pages = collect_pages(lambda **kw: storage.page_requests_with_status('Requested', **kw), 4)
+    assert pages == [['R0', 'R1', 'R2', 'R4'], ['R5', 'R6', 'R7', 'R8'], ['R9']]
+
+    pages = collect_pages(
+        lambda **kw: storage.page_requests_with_status('Requested', ['A+', 'B+'], **kw), 3)
+    assert pages == [['R0', 'R2', 'R5'], ['R6', 'R8', 'R9']]
+
+    pages = collect_pages(lambda **kw: storage.page_requests_by_requestor('req@test.com', **kw), 5)
+    assert pages == [['R1', 'R3', 'R5', 'R7', 'R9']]
+    assert storage.page_requests_with_status('Requested', ['AB-']) == ([], None)
+
+
+def test_keyset_cursor_survives_inserts(storage):
+    storage.add_requests([make_request(f'R{i}', 'A+') for i in range(5)])
+    first, cursor = storage.page_requests_with_status('Requested', ['A+'], limit=2)
+    assert [r['id'] for r in first] == ['R0', 'R1']
+
+    # New requests and claims between page loads neither repeat nor skip rows
+    storage.add_request(make_request('R5', 'A+'))
+    storage.claim_request('R0', 'donor@test.com')
+    second, cursor = storage.page_requests_with_status('Requested', ['A+'], after=cursor, limit=2)
+    assert [r['id'] for r in second] == ['R2', 'R3']
+    third, cursor = storage.page_requests_with_status('Requested', ['A+'], after=cursor, limit=2)
+    assert [r['id'] for r in third] == ['R4', 'R5']
+    assert cursor is None
+
+
+# --------------------------------------------------
+# DONOR LOCATIONS
+# --------------------------------------------------
+
+def located_donor(email, blood_group, latitude, longitude):
+    return dict(make_user(email, 'donor', blood_group), latitude=latitude, longitude=longitude)
+
+
+def test_nearest_donors(storage):
+    storage.add_user(located_donor('soho@test.com', 'O-', 51.513, -0.136))
+    storage.add_user(located_donor('camden@test.com', 'A+', 51.539, -0.142))
+    storage.add_user(located_donor('brixton@test.com', 'B+', 51.461, -0.115))
+    storage.add_user(located_donor('oxford@test.com', 'O-', 51.752, -1.258))
+    storage.add_user(make_user('nowhere@test.com', 'donor', 'O-'))
+
+    # Near Trafalgar Square, A+ can receive from O- and A+ donors
+    found = storage.nearest_donors(51.508, -0.128, ['A+', 'A-', 'O+', 'O-'], k=5, radius_km=20)
+    assert [d['email'] for d in found] == ['soho@test.com', 'camden@test.com']
+    assert found[0]['distance_km'] < found[1]['distance_km'] < 5
+    assert [d['email'] for d in storage.nearest_donors(51.508, -0.128, ['O-'], k=1,
+                                                       radius_km=200)] == ['soho@test.com']
+    assert len(storage.nearest_donors(51.508, -0.128, ['O-'], k=5, radius_km=200)) == 2
+
+    # Across the antimeridian (Fiji)
+    storage.add_user(located_donor('east@test.com', 'AB+', -17.0, 179.95))
+    storage.add_user(located_donor('west@test.com', 'AB+', -17.0, -179.95))
+    found = storage.nearest_donors(-17.0, -179.99, ['AB+'], k=5, radius_km=30)
+    assert [d['email'] for d in found] == ['west@test.com', 'east@test.com']
+
+
+def test_location_grid_matches_brute_force():
+    import random
+
+    from blood_geo import GeoGrid, haversine_km
+
+    rng = random.Random(7)
+    grid = GeoGrid(cell_km=10)
+    points = []
+    for n in range(5000):
+        # Clustered around London and the antimeridian, plus global noise
+        if n % 3 == 0:
+            lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        else:
+            lat, lon = rng.gauss(51.5, 1), (rng.gauss(0 if n % 2 else 180, 1) + 180) % 360 - 180
+        group = rng.choice(['A+', 'B+', 'O-'])
+        grid.add(group, lat, lon, n)
+        points.append((group, lat, lon, n))
+
+    for _ in range(100):
+        lat, lon = rng.choice([(51.5, 0.0), (51.5, 179.99), (89.8, 10.0), (-89.9, -70.0)])
+        groups = rng.sample(['A+', 'B+', 'O-'], 2)
+        k, radius = rng.choice([1, 5, 25]), rng.choice([5, 50, 500, 20000])
+        expected = sorted(haversine_km(lat, lon, plat, plon) for group, plat, plon, _ in points
+                          if group in groups and haversine_km(lat, lon, plat, plon) <= radius)[:k]
+        found = [distance for distance, _ in grid.nearest(lat, lon, groups, k, radius)]
+        assert found == pytest.approx(expected)
+
+
+def test_sqlite_adds_location_columns_to_old_databases(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (email TEXT PRIMARY KEY, id TEXT NOT NULL, name TEXT NOT NULL, "
+                 "password TEXT NOT NULL, blood_group TEXT NOT NULL, role TEXT NOT NULL)")
+    conn.execute("INSERT INTO users VALUES ('old@test.com', 'ID', 'Old', 'hash', 'O-', 'donor')")
+    conn.commit()
+    conn.close()
+
+    storage = create_storage('sqlite', sqlite_path=path)
+    assert storage.get_user('old@test.com')['latitude'] is None
+    assert storage.get_user('old@test.com')['next_eligible'] == ''
+    storage.add_user(located_donor('new@test.com', 'O-', 10.0, 10.0))
+    assert [d['email'] for d in storage.nearest_donors(10.0, 10.01, ['O-'])] == ['new@test.com']
+    storage.close()
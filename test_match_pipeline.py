@@ -0,0 +1,82 @@
+import io
+import json
+
+import blood_match_pipeline
+from blood_ai_engine import filter_compatible_donors, get_all_blood_groups
+from blood_match_pipeline import main, run_pipeline
+
+
+def write_donors(path, count):
+    groups = get_all_blood_groups()
+    donors = [{'email': f'donor{i}@test.com', 'blood_group': groups[(i * 5) % 8]}
+              for i in range(count)]
+    with open(path, 'w', encoding='utf-8') as handle:
+        for donor in donors:
+            handle.write(json.dumps(donor) + '\n')
+    return donors
+
+
+def test_parallel_output_matches_serial(tmp_path):
+    donors_path = tmp_path / 'donors.jsonl'
+    donors = write_donors(donors_path, 250)
+
+    serial_out, parallel_out = io.StringIO(), io.StringIO()
+    serial = run_pipeline(str(donors_path), workers=1, shard_size=40, matches_out=serial_out)
+    parallel = run_pipeline(str(donors_path), workers=2, shard_size=40, matches_out=parallel_out)
+
+    assert serial == parallel
+    assert serial_out.getvalue() == parallel_out.getvalue()
+    assert serial['donors'] == 250
+    assert serial['shards'] == 7
+    for group in get_all_blood_groups():
+        assert serial['compatible_counts'][group] == len(filter_compatible_donors(donors, group))
+
+    rows = [json.loads(line) for line in serial_out.getvalue().splitlines()]
+    assert [row['row'] for row in rows] == list(range(250))
+
+
+def test_parallel_reads_a_bounded_window_of_shards(tmp_path, monkeypatch):
+    donors_path = tmp_path / 'donors.jsonl'
+    write_donors(donors_path, 250)
+
+    read = []
+    read_line_shards = blood_match_pipeline.read_line_shards
+
+    def counting_shards(path, shard_size):
+        for shard in read_line_shards(path, shard_size):
+            read.append(len(shard))
+            yield shard
+
+    class FirstWrite(io.StringIO):
+        shards_read = None
+
+        def write(self, text):
+            if self.shards_read is None:
+                self.shards_read = len(read)
+            return super().write(text)
+
+    monkeypatch.setattr(blood_match_pipeline, 'read_line_shards', counting_shards)
+    out = FirstWrite()
+    summary = run_pipeline(str(donors_path), workers=2, shard_size=10, matches_out=out)
+
+    assert summary['shards'] == len(read) == 25
+    # The first result is merged before more than 2 x workers shards are read
+    assert out.shards_read <= 4
+
+
+def test_cli_reports_open_requests(tmp_path, capsys):
+    donors_path = tmp_path / 'donors.jsonl'
+    donors = write_donors(donors_path, 30)
+    requests_path = tmp_path / 'requests.jsonl'
+    with open(requests_path, 'w', encoding='utf-8') as handle:
+        handle.write(json.dumps({'id': 'R1', 'blood_group': 'O-', 'units': 1, 'status': 'Requested'}) + '\n')
+        handle.write(json.dumps({'id': 'R2', 'blood_group': 'A+', 'units': 2, 'status': 'Confirmed'}) + '\n')
+
+    assert main([str(donors_path), '--requests', str(requests_path), '--workers', '1']) == 0
+    captured = capsys.readouterr()
+    summary = json.loads(captured.out)
+
+    assert list(summary['compatible_counts']) == ['O-']
+    assert summary['requests'] == [{'id': 'R1', 'blood_group': 'O-', 'units': 1,
+                                    'compatible_donors': len(filter_compatible_donors(donors, 'O-'))}]
+    assert 'donors/sec' in captured.err